@@ -212,6 +212,29 @@ def get_app(domain, app_id, wrap_cls=None, latest=False, target=None):
                      = get_latest_build_doc(domain, app_id)
     Use wrap_app() if you need the wrapped object.
     """
+    app = _get_app_doc(domain, app_id, latest=latest, target=target)
+    try:
+        return wrap_app(app, wrap_cls=wrap_cls)
+    except DocTypeError:
+        raise Http404()
+
+
+def get_lazy_app(domain, app_id, latest=False, target=None):
+    """
+    Same as get_app, but returns a LazyApplication, which only wraps the
+    app's modules and forms if they are used.
+    """
+    from corehq.apps.app_manager.lazy_app import LazyApplication
+    from corehq.apps.app_manager.util import get_correct_app_class
+    app = _get_app_doc(domain, app_id, latest=latest, target=target)
+    try:
+        wrap_cls = get_correct_app_class(app)
+    except DocTypeError:
+        raise Http404()
+    return LazyApplication(app, wrap_cls=wrap_cls)
+
+
+def _get_app_doc(domain, app_id, latest=False, target=None):
     from .models import Application
     if not app_id:
         raise Http404()
@@ -240,10 +263,7 @@ def get_app(domain, app_id, wrap_cls=None, latest=False, target=None):
 
     if domain and app['domain'] != domain:
         raise Http404()
-    try:
-        return wrap_app(app, wrap_cls=wrap_cls)
-    except DocTypeError:
-        raise Http404()
+    return app
 
 
 @quickcache(['domain', 'include_remote'], timeout=24 * 60 * 60)
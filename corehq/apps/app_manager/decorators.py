@@ -14,7 +14,7 @@ from couchdbkit.exceptions import ResourceConflict
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
 from corehq import toggles
-from corehq.apps.app_manager.dbaccessors import get_app
+from corehq.apps.app_manager.dbaccessors import get_app, get_lazy_app
 from corehq.apps.app_manager.exceptions import (
     BuildConflictException,
     CaseError,
@@ -116,7 +116,7 @@ def safe_cached_download(f):
             if latest_enabled_build:
                 request.app = latest_enabled_build
             else:
-                request.app = get_app(domain, app_id, latest=latest, target=target)
+                request.app = get_lazy_app(domain, app_id, latest=latest, target=target)
             if not request.app.doc_type.endswith(DELETED_SUFFIX):
                 response = f(request, *args, **kwargs)
                 if request.app.copy_of is not None and request.app.is_released:
@@ -0,0 +1,84 @@
+from copy import deepcopy
+
+# App-level attributes that don't depend on the app's modules and forms, and
+# so can be read without wrapping them
+SHELL_ATTRIBUTES = frozenset([
+    '_id',
+    '_rev',
+    'build_profiles',
+    'build_spec',
+    'built_on',
+    'copy_of',
+    'doc_type',
+    'domain',
+    'fetch_attachment',
+    'fetch_jar',
+    'get_id',
+    'id',
+    'is_released',
+    'langs',
+    'last_released',
+    'lazy_fetch_attachment',
+    'name',
+    'use_j2me_endpoint',
+    'version',
+])
+
+
+# Attributes of LazyApplication itself, set in __init__
+INSTANCE_ATTRIBUTES = frozenset(['_app_doc', '_wrap_cls', '_shell', '_app'])
+
+
+class LazyApplication(object):
+    """Application that only wraps its modules and forms when they are used
+
+    Wrapping a large app's modules and forms dominates the time taken to
+    load it, while many views only need app-level settings. Those are read
+    from a copy of the app wrapped without its modules. Any other attribute
+    wraps the whole app, which is used for everything from then on, so
+    changes (and saves) are always made to the fully wrapped app.
+    """
+
+    def __init__(self, app_doc, wrap_cls=None):
+        self.__dict__.update(
+            _app_doc=app_doc,
+            _wrap_cls=wrap_cls,
+            _shell=None,
+            _app=None,
+        )
+
+    @property
+    def is_wrapped(self):
+        return self._app is not None
+
+    @property
+    def wrapped(self):
+        """The fully wrapped app"""
+        from corehq.apps.app_manager.dbaccessors import wrap_app
+        if self._app is None:
+            self.__dict__['_app'] = wrap_app(self._app_doc, wrap_cls=self._wrap_cls)
+            self.__dict__['_shell'] = None
+        return self._app
+
+    def _get_shell(self):
+        from corehq.apps.app_manager.dbaccessors import wrap_app
+        if self._shell is None:
+            shell_doc = deepcopy({key: value for key, value in self._app_doc.items() if key != 'modules'})
+            shell_doc['modules'] = []
+            self.__dict__['_shell'] = wrap_app(shell_doc, wrap_cls=self._wrap_cls)
+        return self._shell
+
+    def __getattr__(self, name):
+        if name in INSTANCE_ATTRIBUTES or name.startswith('__'):
+            # Not set on instances created without __init__, e.g. by copy or
+            # pickle, which look up special methods before setting state
+            raise AttributeError(name)
+        if self._app is None and name in SHELL_ATTRIBUTES:
+            return getattr(self._get_shell(), name)
+        return getattr(self.wrapped, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.wrapped, name, value)
+
+    def __repr__(self):
+        return '<LazyApplication {} ({})>'.format(self._app_doc.get('_id'), self._app_doc.get('doc_type'))
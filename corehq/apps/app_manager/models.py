@@ -10,6 +10,8 @@ import re
 import types
 import uuid
 from collections import Counter, OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from copy import deepcopy
 from distutils.version import LooseVersion
 from functools import wraps
@@ -133,6 +135,7 @@ from corehq.apps.app_manager.util import (
     get_latest_app_release_by_location,
     get_latest_enabled_build_for_profile,
     get_latest_enabled_versions_per_profile,
+    get_unique_id_index,
     is_remote_app,
     is_usercase_in_use,
     module_offers_search,
@@ -200,6 +203,20 @@ ANDROID_LOGO_PROPERTY_MAPPING = {
 LATEST_APK_VALUE = 'latest'
 LATEST_APP_VALUE = 0
 
+# Rendered XForms are cached by form source, form version and a hash of the
+# rest of the app. Bump the key version when XForm generation changes.
+XFORM_CACHE_KEY_VERSION = 1
+XFORM_CACHE_TIMEOUT = 24 * 60 * 60
+# app fields that change with every build and are left out of build cache keys
+BUILD_CACHE_IGNORED_APP_FIELDS = (
+    '_id', '_rev', '_attachments', 'external_blobs', 'multimedia_map', 'version', 'copy_of',
+    'built_on', 'built_with', 'build_comment', 'comment_from', 'is_released', 'last_released',
+    'date_created', 'last_modified', 'short_url', 'short_odk_url', 'short_odk_media_url',
+    'build_broken', 'build_broken_reason', 'has_submissions',
+)
+# number of forms validated with formplayer at once during a build
+FORM_VALIDATION_WORKERS = 8
+
 
 def jsonpath_update(datum_context, value):
     field = datum_context.path.fields[0]
@@ -1108,24 +1125,14 @@ class FormBase(DocumentSchema):
     def validate_form(self):
         vc = self.get_validation_cache()
         if vc is None:
-            # todo: now that we don't use formtranslate, does this still apply?
-            # formtranslate requires all attributes to be valid xpaths, but
-            # vellum namespaced attributes aren't
-            form = self.wrapped_xform()
-            form.strip_vellum_ns_attributes()
+            source = self.get_validation_source()
             try:
-                if form.xml is not None:
-                    validate_xform(self.get_app().domain, etree.tostring(form.xml, encoding='utf-8'))
+                if source is not None:
+                    validate_xform(self.get_app().domain, source)
             except XFormValidationError as e:
-                validation_dict = {
-                    "fatal_error": e.fatal_error,
-                    "validation_problems": e.validation_problems,
-                    "version": e.version,
-                }
-                vc = json.dumps(validation_dict)
+                vc = self.cache_validation_result(e)
             else:
-                vc = ""
-            self.set_validation_cache(vc)
+                vc = self.cache_validation_result(None)
         if vc:
             try:
                 raise XFormValidationError(**json.loads(vc))
@@ -1134,6 +1141,35 @@ class FormBase(DocumentSchema):
                 return self.validate_form()
         return self
 
+    def get_validation_source(self):
+        """The form XML to send to formplayer for validation, or None if
+        the form has no XML"""
+        # todo: now that we don't use formtranslate, does this still apply?
+        # formtranslate requires all attributes to be valid xpaths, but
+        # vellum namespaced attributes aren't
+        form = self.wrapped_xform()
+        form.strip_vellum_ns_attributes()
+        if form.xml is None:
+            return None
+        return etree.tostring(form.xml, encoding='utf-8')
+
+    def cache_validation_result(self, error):
+        """
+        :param error: the XFormValidationError raised by validation, or None
+        if the form is valid
+        :returns: the new validation cache value
+        """
+        if error is None:
+            vc = ""
+        else:
+            vc = json.dumps({
+                "fatal_error": error.fatal_error,
+                "validation_problems": error.validation_problems,
+                "version": error.version,
+            })
+        self.set_validation_cache(vc)
+        return vc
+
     def is_a_disabled_release_form(self):
         return self.is_release_notes_form and not self.enable_release_notes
 
@@ -4872,8 +4908,90 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
     def default_language(self):
         return self.langs[0] if len(self.langs) > 0 else "en"
 
-    def fetch_xform(self, form, build_profile_id=None):
-        return form.validate_form().render_xform(build_profile_id)
+    def fetch_xform(self, form, build_profile_id=None, app_hash=None):
+        """
+        :param app_hash: result of ``get_xform_cache_app_hash``. If given,
+        the XForm is looked up in and saved to the XForm cache.
+        """
+        if app_hash is None:
+            return form.validate_form().render_xform(build_profile_id)
+        key = self.get_xform_cache_key(form, build_profile_id, app_hash)
+        xform = cache.get(key)
+        if xform is None:
+            xform = form.validate_form().render_xform(build_profile_id)
+            cache.set(key, xform, XFORM_CACHE_TIMEOUT)
+        return xform
+
+    def get_xform_cache_app_hash(self):
+        """Hash of the parts of the app that can affect any rendered XForm
+
+        Form versions and validation results are left out since they change
+        between builds without affecting the other forms in the app; each
+        form's own version is part of its cache key. Domain toggles are
+        included since some of them change XForm generation.
+        """
+        source = {
+            key: value for key, value in self.to_json().items()
+            if key not in BUILD_CACHE_IGNORED_APP_FIELDS
+        }
+        source['modules'] = [
+            dict(module, forms=[
+                {key: value for key, value in form.items() if key not in ('version', 'validation_cache')}
+                for form in module.get('forms', [])
+            ])
+            for module in source.get('modules', [])
+        ]
+        source['toggles'] = sorted(toggles.toggles_enabled_for_domain(self.domain))
+        return hashlib.sha1(json.dumps(source, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get_xform_cache_key(self, form, build_profile_id, app_hash):
+        source = form.source
+        if isinstance(source, str):
+            source = source.encode('utf-8')
+        digest = hashlib.sha1(repr((
+            XFORM_CACHE_KEY_VERSION,
+            form.unique_id,
+            form.get_version(),
+            build_profile_id,
+            app_hash,
+            hashlib.sha1(source).hexdigest(),
+        )).encode('utf-8')).hexdigest()
+        return 'app-xform-{}-{}'.format(self.domain, digest)
+
+    def validate_forms_concurrently(self, forms):
+        """Validate forms that have no cached validation result
+
+        Formplayer is called for several forms at once and the results are
+        stored on the forms, so that ``validate_form`` does not make any
+        requests for them afterwards.
+        """
+        pending = []
+        for form in forms:
+            if form.get_validation_cache() is None:
+                try:
+                    source = form.get_validation_source()
+                except XFormException as e:
+                    raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+                if source is not None:
+                    pending.append((form, source))
+        if len(pending) < 2:
+            return
+
+        with ThreadPoolExecutor(max_workers=FORM_VALIDATION_WORKERS) as executor:
+            results = [
+                (form, executor.submit(validate_xform, self.domain, source))
+                for form, source in pending
+            ]
+        for form, result in results:
+            try:
+                result.result()
+            except XFormValidationError as e:
+                form.cache_validation_result(e)
+            except XFormValidationFailed:
+                # leave it uncached so validate_form retries and reports the failure
+                continue
+            else:
+                form.cache_validation_result(None)
 
     @time_method()
     def set_form_versions(self):
@@ -4888,6 +5006,7 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
         if not latest_build:
             return
         force_new_version = self.build_profiles != latest_build.build_profiles
+        app_hash = self.get_xform_cache_app_hash()
         for form_stuff in self.get_forms(bare=False):
             filename = 'files/%s' % self.get_form_filename(**form_stuff)
             form = form_stuff["form"]
@@ -4906,7 +5025,7 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
                     # so that that's not treated as the diff
                     previous_form_version = previous_form.get_version()
                     form.version = previous_form_version
-                    my_hash = _hash(self.fetch_xform(form))
+                    my_hash = _hash(self.fetch_xform(form, app_hash=app_hash))
                     if previous_hash != my_hash:
                         form.version = None
             else:
@@ -4973,9 +5092,8 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
         })
         return s
 
-    @time_method()
-    def create_profile(self, is_odk=False, with_media=False,
-                       build_profile_id=None, commcare_flavor=None):
+    def _get_app_profile(self):
+        """The properties and features set in every profile file of the app"""
         self__profile = self.profile
         app_profile = defaultdict(dict)
 
@@ -5019,6 +5137,18 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
                 'force': True,
                 'value': self.recovery_measures_url,
             }
+        return app_profile
+
+    @time_method()
+    def create_profile(self, is_odk=False, with_media=False,
+                       build_profile_id=None, commcare_flavor=None, app_profile=None):
+        """
+        :param app_profile: result of ``_get_app_profile``, to share between
+        the profile files of a build
+        """
+        self__profile = self.profile
+        if app_profile is None:
+            app_profile = self._get_app_profile()
 
         if with_media:
             profile_url = self.media_profile_url if not is_odk else (self.odk_media_profile_url + '?latest=true')
@@ -5134,30 +5264,56 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
     def get_form_filename(cls, type=None, form=None, module=None):
         return 'modules-%s/forms-%s.xml' % (module.id, form.id)
 
+    def _time_file(self, filename):
+        """Time the generation of a build file if the build is being timed"""
+        if self.timing_context.is_started():
+            return self.timing_context(filename)
+        return nullcontext()
+
     @time_method()
     def _make_language_files(self, prefix, build_profile_id):
-        return {
-            "{}{}/app_strings.txt".format(prefix, lang): self.create_app_strings(lang, build_profile_id).encode('utf-8')
-            for lang in ['default'] + self.get_build_langs(build_profile_id)
-        }
+        files = {}
+        for lang in ['default'] + self.get_build_langs(build_profile_id):
+            filename = "{}{}/app_strings.txt".format(prefix, lang)
+            with self._time_file(filename):
+                files[filename] = self.create_app_strings(lang, build_profile_id).encode('utf-8')
+        return files
 
     @time_method()
     def _get_form_files(self, prefix, build_profile_id):
-        files = {}
-        for form_stuff in self.get_forms(bare=False):
-            def exclude_form(form):
-                return isinstance(form, ShadowForm) or form.is_a_disabled_release_form()
+        def exclude_form(form):
+            return isinstance(form, ShadowForm) or form.is_a_disabled_release_form()
 
-            if not exclude_form(form_stuff['form']):
-                filename = prefix + self.get_form_filename(**form_stuff)
-                form = form_stuff['form']
-                try:
-                    files[filename] = self.fetch_xform(form, build_profile_id=build_profile_id)
-                except XFormValidationFailed:
-                    raise XFormException(_('Unable to validate the forms due to a server error. '
-                                           'Please try again later.'))
-                except XFormException as e:
-                    raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+        forms = [
+            (prefix + self.get_form_filename(**form_stuff), form_stuff['form'])
+            for form_stuff in self.get_forms(bare=False)
+            if not exclude_form(form_stuff['form'])
+        ]
+        app_hash = self.get_xform_cache_app_hash()
+        cache_keys = {
+            filename: self.get_xform_cache_key(form, build_profile_id, app_hash)
+            for filename, form in forms
+        }
+        cached = cache.get_many(list(cache_keys.values()))
+        with self._time_file("validate_forms_concurrently"):
+            self.validate_forms_concurrently([
+                form for filename, form in forms if cache_keys[filename] not in cached
+            ])
+
+        files = {}
+        for filename, form in forms:
+            with self._time_file(filename):
+                xform = cached.get(cache_keys[filename])
+                if xform is None:
+                    try:
+                        xform = self.fetch_xform(form, build_profile_id=build_profile_id)
+                    except XFormValidationFailed:
+                        raise XFormException(_('Unable to validate the forms due to a server error. '
+                                               'Please try again later.'))
+                    except XFormException as e:
+                        raise XFormException(_('Error in form "{}": {}').format(trans(form.name), e))
+                    cache.set(cache_keys[filename], xform, XFORM_CACHE_TIMEOUT)
+                files[filename] = xform
         return files
 
     @time_method()
@@ -5166,39 +5322,34 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
         self.set_form_versions()
         self.set_media_versions()
         prefix = '' if not build_profile_id else build_profile_id + '/'
-        files = {
-            '{}profile.xml'.format(prefix): self.create_profile(is_odk=False, build_profile_id=build_profile_id),
-            '{}profile.ccpr'.format(prefix): self.create_profile(is_odk=True, build_profile_id=build_profile_id),
-            '{}media_profile.xml'.format(prefix):
-                self.create_profile(is_odk=False, with_media=True, build_profile_id=build_profile_id),
-            '{}media_profile.ccpr'.format(prefix):
-                self.create_profile(is_odk=True, with_media=True, build_profile_id=build_profile_id),
-            '{}suite.xml'.format(prefix): self.create_suite(build_profile_id),
-            '{}media_suite.xml'.format(prefix): self.create_media_suite(build_profile_id),
-        }
+        flavors = [None]
         if self.commcare_flavor:
-            files['{}profile-{}.xml'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=False,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
-            files['{}profile-{}.ccpr'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
-            files['{}media_profile-{}.xml'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=False,
-                with_media=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
-            files['{}media_profile-{}.ccpr'.format(prefix, self.commcare_flavor)] = self.create_profile(
-                is_odk=True,
-                with_media=True,
-                build_profile_id=build_profile_id,
-                commcare_flavor=self.commcare_flavor,
-            )
+            flavors.append(self.commcare_flavor)
+
+        files = {}
+        app_profile = self._get_app_profile()
+        for commcare_flavor in flavors:
+            suffix = '-{}'.format(commcare_flavor) if commcare_flavor else ''
+            for name, is_odk, with_media in [
+                ('profile{}.xml', False, False),
+                ('profile{}.ccpr', True, False),
+                ('media_profile{}.xml', False, True),
+                ('media_profile{}.ccpr', True, True),
+            ]:
+                filename = prefix + name.format(suffix)
+                with self._time_file(filename):
+                    files[filename] = self.create_profile(
+                        is_odk=is_odk,
+                        with_media=with_media,
+                        build_profile_id=build_profile_id,
+                        commcare_flavor=commcare_flavor,
+                        app_profile=app_profile,
+                    )
+
+        with self._time_file('{}suite.xml'.format(prefix)):
+            files['{}suite.xml'.format(prefix)] = self.create_suite(build_profile_id)
+        with self._time_file('{}media_suite.xml'.format(prefix)):
+            files['{}media_suite.xml'.format(prefix)] = self.create_media_suite(build_profile_id)
 
         practice_user_restore = self.create_practice_user_restore(build_profile_id)
         if practice_user_restore:
@@ -5219,9 +5370,48 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
         except IndexError:
             raise ModuleNotFoundException(_("Could not find module with index {}".format(i)))
 
+    def _get_unique_id_index(self, rebuild=False):
+        """Map of module and form unique ids to their positions in the app
+
+        Built from the raw JSON, which is much cheaper than wrapping every
+        module and form. Entries can go stale when modules or forms are
+        moved, so callers must check the object found at a position.
+        """
+        if rebuild or getattr(self, '_unique_id_index', None) is None:
+            self._unique_id_index = get_unique_id_index(self.to_json())
+        return self._unique_id_index
+
+    def _find_by_unique_id(self, unique_id, get_object):
+        """Look up a module or form using the unique id index
+
+        :param get_object: function taking the position from the index and
+        returning the object at that position, or None if it doesn't match
+        """
+        for rebuild in (False, True):
+            position = self._get_unique_id_index(rebuild).get(unique_id)
+            if position is not None:
+                try:
+                    obj = get_object(position)
+                except (IndexError, ModuleNotFoundException, FormNotFoundException):
+                    obj = None
+                if obj is not None and obj.unique_id == unique_id:
+                    return obj
+        return None
+
+    def _get_module_at(self, position):
+        if len(position) == 1:
+            return self.get_module(position[0])
+
+    def _get_form_at(self, position):
+        if len(position) == 2:
+            return self.get_module(position[0]).get_form(position[1])
+
     def get_module_by_unique_id(self, unique_id, error=''):
         def matches(module):
             return module.get_or_create_unique_id() == unique_id
+        module = self._find_by_unique_id(unique_id, self._get_module_at)
+        if module is not None:
+            return module
         for obj in self.get_modules():
             if matches(obj):
                 return obj
@@ -5255,6 +5445,13 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
     def get_form(self, form_unique_id, bare=True):
         def matches(form):
             return form.get_unique_id() == form_unique_id
+        form = self._find_by_unique_id(form_unique_id, self._get_form_at)
+        if form is not None:
+            return form if bare else {
+                'type': 'module_form',
+                'module': form.get_module(),
+                'form': form
+            }
         for obj in self.get_forms(bare):
             if matches(obj if bare else obj['form']):
                 return obj
@@ -5263,6 +5460,9 @@ class Application(ApplicationBase, ApplicationMediaMixin, ApplicationIntegration
              % (self.id, form_unique_id)))
 
     def get_form_location(self, form_unique_id):
+        form = self._find_by_unique_id(form_unique_id, self._get_form_at)
+        if form is not None:
+            return form.get_module().id, form.id
         for m_index, module in enumerate(self.get_modules()):
             for f_index, form in enumerate(module.get_forms()):
                 if form_unique_id == form.unique_id:
@@ -2,12 +2,14 @@ from abc import ABCMeta, abstractmethod, abstractproperty
 
 
 class BaseSuiteContributor(metaclass=ABCMeta):
-    def __init__(self, suite, app, modules, build_profile_id=None):
+    def __init__(self, suite, app, modules, build_profile_id=None, fragments=None):
+        from corehq.apps.app_manager.suite_xml.fragments import ModuleFragmentCache
         from corehq.apps.app_manager.suite_xml.sections.entries import EntriesHelper
         self.suite = suite
         self.app = app
         self.modules = modules
         self.build_profile_id = build_profile_id
+        self.fragments = fragments or ModuleFragmentCache(app, modules, build_profile_id, enabled=False)
         self.entries_helper = EntriesHelper(app, modules, build_profile_id=self.build_profile_id)
 
     @property
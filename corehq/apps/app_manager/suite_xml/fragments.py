@@ -0,0 +1,170 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from lxml import etree
+
+from corehq import privileges, toggles
+from corehq.apps.accounting.utils import domain_has_privilege
+from corehq.apps.app_manager.suite_xml import xml_models
+from corehq.apps.app_manager.util import is_usercase_in_use
+
+# Bump when suite generation changes so that stale fragments are not reused
+FRAGMENT_CACHE_KEY_VERSION = 3
+FRAGMENT_CACHE_TIMEOUT = 24 * 60 * 60
+
+# form fields that change between builds without affecting the suite
+IGNORED_FORM_FIELDS = ('version', 'validation_cache')
+
+
+class ModuleFragmentCache(object):
+    """Cache of the suite elements contributed by each module
+
+    Fragments are keyed by a hash of the module, the modules it is linked
+    to (root, child, shadow, source, parent select and case list form
+    modules), an index of the structure of every module in the app, the
+    app-level settings and the domain's toggles, privileges and usercase
+    setting, so that a build only regenerates the elements of modules that
+    changed. Form XML is not part of the module, so on CommTrack apps, whose
+    entries depend on it, a hash of each form's source is included too.
+
+    Cached fragments are copies made before post-processing, so the
+    suite's post-processors still run over the whole suite.
+    """
+
+    def __init__(self, app, modules, build_profile_id=None, enabled=True):
+        self.app = app
+        self.modules = modules
+        self.build_profile_id = build_profile_id
+        self.enabled = enabled
+        self._app_hash = None
+
+    def get_elements(self, section, module, generate):
+        """Get the cached elements of a suite section for a module
+
+        :param generate: function returning the module's elements for
+        the section, called on a cache miss
+        """
+        if not self.enabled:
+            return generate()
+
+        key = self._get_key(section, module)
+        cached = cache.get(key)
+        if cached is not None:
+            return [_deserialize_element(data) for data in cached]
+
+        elements = generate()
+        cache.set(key, [_serialize_element(element) for element in elements], FRAGMENT_CACHE_TIMEOUT)
+        return elements
+
+    def _get_key(self, section, module):
+        if self._app_hash is None:
+            self._app_hash = self._get_app_hash()
+        digest = _hash([
+            FRAGMENT_CACHE_KEY_VERSION,
+            section,
+            self.build_profile_id,
+            self._app_hash,
+            module.id,
+            [_get_module_source(m, self.app.commtrack_enabled) for m in self._get_linked_modules(module)],
+        ])
+        return 'suite-fragment-{}-{}'.format(self.app.domain, digest)
+
+    def _get_app_hash(self):
+        from corehq.apps.app_manager.models import BUILD_CACHE_IGNORED_APP_FIELDS
+        source = {
+            key: value for key, value in self.app.to_json().items()
+            if key not in BUILD_CACHE_IGNORED_APP_FIELDS and key != 'modules'
+        }
+        source['module_index'] = [_get_module_index_entry(module) for module in self.modules]
+        source['multimedia_paths'] = sorted(self.app.multimedia_map)
+        source['build_langs'] = self.app.get_build_langs(self.build_profile_id)
+        source['toggles'] = sorted(toggles.toggles_enabled_for_domain(self.app.domain))
+        source['privileges'] = _get_domain_privileges(self.app.domain)
+        source['usercase'] = bool(is_usercase_in_use(self.app.domain))
+        return _hash(source)
+
+    def _get_linked_modules(self, module):
+        by_id = {m.unique_id: m for m in self.modules}
+        linked_ids = [module.unique_id]
+        linked_ids.extend(_get_module_links(module))
+        form_ids = {form.unique_id for form in module.get_forms()}
+        for other in self.modules:
+            if module.unique_id in _get_module_links(other):
+                linked_ids.append(other.unique_id)
+            elif _get_case_list_form_id(other) in form_ids:
+                linked_ids.append(other.unique_id)
+        case_list_form_id = _get_case_list_form_id(module)
+        if case_list_form_id:
+            linked_ids.extend(
+                m.unique_id for m in self.modules
+                if any(form.unique_id == case_list_form_id for form in m.get_forms())
+            )
+        seen = set()
+        linked = []
+        for unique_id in linked_ids:
+            if unique_id in by_id and unique_id not in seen:
+                seen.add(unique_id)
+                linked.append(by_id[unique_id])
+        return linked
+
+
+def _get_domain_privileges(domain):
+    return [slug for slug in privileges.MAX_PRIVILEGES if domain_has_privilege(domain, slug)]
+
+
+def _get_module_links(module):
+    """Unique ids of the modules a module refers to directly"""
+    links = [
+        getattr(module, 'root_module_id', None),
+        getattr(module, 'source_module_id', None),
+    ]
+    parent_select = getattr(module, 'parent_select', None)
+    if parent_select and parent_select.active:
+        links.append(parent_select.module_id)
+    return [link for link in links if link]
+
+
+def _get_case_list_form_id(module):
+    case_list_form = getattr(module, 'case_list_form', None)
+    return case_list_form.form_id if case_list_form else None
+
+
+def _get_module_index_entry(module):
+    return [
+        module.unique_id,
+        module.module_type,
+        getattr(module, 'case_type', None),
+        getattr(module, 'put_in_root', None),
+        _get_module_links(module),
+        [
+            [form.unique_id, form.form_type, form.xmlns, getattr(form, 'requires', None)]
+            for form in module.get_forms()
+        ],
+    ]
+
+
+def _get_module_source(module, include_form_sources=False):
+    source = dict(module.to_json())
+    source['forms'] = [
+        {key: value for key, value in form.items() if key not in IGNORED_FORM_FIELDS}
+        for form in source.get('forms', [])
+    ]
+    if include_form_sources:
+        # EntriesHelper checks form XML for the supply point session variable
+        source['form_sources'] = [_hash(getattr(form, 'source', None) or '') for form in module.get_forms()]
+    return source
+
+
+def _hash(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def _serialize_element(element):
+    return type(element).__name__, etree.tostring(element.node)
+
+
+def _deserialize_element(data):
+    class_name, xml = data
+    return getattr(xml_models, class_name)(etree.fromstring(xml))
@@ -6,8 +6,10 @@ import six.moves.urllib.error
 import six.moves.urllib.parse
 import six.moves.urllib.request
 
+from corehq import toggles
 from corehq.apps.app_manager import id_strings
 from corehq.apps.app_manager.exceptions import MediaResourceError
+from corehq.apps.app_manager.suite_xml.fragments import ModuleFragmentCache
 from corehq.apps.app_manager.suite_xml.features.scheduler import (
     SchedulerFixtureContributor,
 )
@@ -55,14 +57,22 @@ from corehq.apps.hqmedia.models import HQMediaMapItem
 class SuiteGenerator(object):
     descriptor = "Suite File"
 
-    def __init__(self, app, build_profile_id=None):
+    def __init__(self, app, build_profile_id=None, use_fragment_cache=None):
+        """
+        :param use_fragment_cache: whether to reuse cached per-module suite
+        elements. Defaults to the INCREMENTAL_SUITE_GENERATION toggle.
+        """
         self.app = app
         self.modules = list(app.get_modules())
         self.suite = Suite(version=self.app.version, descriptor=self.descriptor)
         self.build_profile_id = build_profile_id
+        if use_fragment_cache is None:
+            use_fragment_cache = toggles.INCREMENTAL_SUITE_GENERATION.enabled(app.domain)
+        self.fragments = ModuleFragmentCache(app, self.modules, build_profile_id, enabled=use_fragment_cache)
 
     def add_section(self, contributor_cls):
-        contributor = contributor_cls(self.suite, self.app, self.modules, self.build_profile_id)
+        contributor = contributor_cls(self.suite, self.app, self.modules, self.build_profile_id,
+                                      fragments=self.fragments)
         section = contributor.section_name
         section_elements = contributor.get_section_elements()
         getattr(self.suite, section).extend(section_elements)
@@ -89,11 +99,19 @@ class SuiteGenerator(object):
             training_menu = None
 
         for module in self.modules:
-            self.suite.entries.extend(entries.get_module_contributions(module))
-
-            self.suite.menus.extend(
-                menus.get_module_contributions(module, training_menu)
-            )
+            self.suite.entries.extend(self.fragments.get_elements(
+                'entries', module, lambda: entries.get_module_contributions(module)
+            ))
+
+            if training_menu:
+                # training modules add commands to the shared training menu
+                # as a side effect, so menus can't be taken from the cache
+                module_menus = menus.get_module_contributions(module, training_menu)
+            else:
+                module_menus = self.fragments.get_elements(
+                    'menus', module, lambda: menus.get_module_contributions(module, training_menu)
+                )
+            self.suite.menus.extend(module_menus)
 
         if training_menu:
             self.suite.menus.append(training_menu)
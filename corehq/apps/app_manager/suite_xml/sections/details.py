@@ -61,60 +61,68 @@ class DetailContributor(SectionContributor):
 
         elements = []
         for module in self.modules:
-            for detail_type, detail, enabled in module.get_details():
-                if not enabled:
-                    continue
+            elements.extend(self.fragments.get_elements(
+                self.section_name, module, lambda: self.get_module_contributions(module)
+            ))
+
+        if toggles.MOBILE_UCR.enabled(self.app.domain):
+            if any([getattr(m, 'report_context_tile', False) for m in self.app.get_modules()]):
+                elements.append(self._get_report_context_tile_detail())
+
+        return elements
 
-                if detail.custom_xml:
-                    elements.append(self._get_custom_xml_detail(module, detail, detail_type))
+    def get_module_contributions(self, module):
+        elements = []
+        for detail_type, detail, enabled in module.get_details():
+            if not enabled:
+                continue
+
+            if detail.custom_xml:
+                elements.append(self._get_custom_xml_detail(module, detail, detail_type))
+            else:
+                if detail.sort_nodeset_columns_for_detail():
+                    # list of DetailColumnInfo named tuples
+                    detail_column_infos = get_detail_column_infos_for_tabs_with_sorting(detail)
                 else:
-                    if detail.sort_nodeset_columns_for_detail():
-                        # list of DetailColumnInfo named tuples
-                        detail_column_infos = get_detail_column_infos_for_tabs_with_sorting(detail)
+                    detail_column_infos = get_detail_column_infos(
+                        detail_type,
+                        detail,
+                        include_sort=detail_type.endswith('short'),
+                    )  # list of DetailColumnInfo named tuples
+                if detail_column_infos:
+                    if detail.use_case_tiles:
+                        helper = CaseTileHelper(self.app, module, detail,
+                                                detail_type, self.build_profile_id)
+                        elements.append(helper.build_case_tile_detail())
                     else:
-                        detail_column_infos = get_detail_column_infos(
+                        print_template_path = None
+                        if detail.print_template:
+                            print_template_path = detail.print_template['path']
+                        locale_id = id_strings.detail_title_locale(detail_type)
+                        title = Text(locale_id=locale_id) if locale_id else Text()
+                        d = self.build_detail(
+                            module,
                             detail_type,
                             detail,
-                            include_sort=detail_type.endswith('short'),
-                        )  # list of DetailColumnInfo named tuples
-                    if detail_column_infos:
-                        if detail.use_case_tiles:
-                            helper = CaseTileHelper(self.app, module, detail,
-                                                    detail_type, self.build_profile_id)
-                            elements.append(helper.build_case_tile_detail())
-                        else:
-                            print_template_path = None
-                            if detail.print_template:
-                                print_template_path = detail.print_template['path']
-                            locale_id = id_strings.detail_title_locale(detail_type)
-                            title = Text(locale_id=locale_id) if locale_id else Text()
-                            d = self.build_detail(
-                                module,
-                                detail_type,
-                                detail,
-                                detail_column_infos,
-                                tabs=list(detail.get_tabs()),
-                                id=id_strings.detail(module, detail_type),
-                                title=title,
-                                print_template=print_template_path,
-                            )
-                            if d:
-                                elements.append(d)
-
-                    # add the persist case context if needed and if
-                    # case tiles are present and have their own persistent block
-                    if (detail.persist_case_context and
-                            not (detail.use_case_tiles and detail.persist_tile_on_forms)):
-                        d = self._get_persistent_case_context_detail(module, detail.persistent_case_context_xml)
-                        elements.append(d)
-
-            if module.fixture_select.active:
-                d = self._get_fixture_detail(module)
-                elements.append(d)
-
-        if toggles.MOBILE_UCR.enabled(self.app.domain):
-            if any([getattr(m, 'report_context_tile', False) for m in self.app.get_modules()]):
-                elements.append(self._get_report_context_tile_detail())
+                            detail_column_infos,
+                            tabs=list(detail.get_tabs()),
+                            id=id_strings.detail(module, detail_type),
+                            title=title,
+                            print_template=print_template_path,
+                        )
+                        if d:
+                            elements.append(d)
+
+                # add the persist case context if needed and if
+                # case tiles are present and have their own persistent block
+                if (detail.persist_case_context and
+                        not (detail.use_case_tiles and detail.persist_tile_on_forms)):
+                    d = self._get_persistent_case_context_detail(module, detail.persistent_case_context_xml)
+                    elements.append(d)
+
+        if module.fixture_select.active:
+            d = self._get_fixture_detail(module)
+            elements.append(d)
 
         return elements
 
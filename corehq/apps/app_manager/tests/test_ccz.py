@@ -11,6 +11,7 @@ from corehq.apps.app_manager.tests.app_factory import AppFactory
 from corehq.apps.app_manager.xform_builder import XFormBuilder
 from corehq.apps.hqmedia.models import CommCareImage
 from corehq.apps.hqmedia.tasks import (
+    _zip_files_for_ccz,
     check_ccz_multimedia_integrity,
     find_missing_locale_ids_in_ccz,
 )
@@ -65,6 +66,25 @@ class CCZTest(TestCase):
         self.assertEqual(len(errors), 1)
         self.assertIn('commcare/icon.png', errors[0])
 
+    def test_stream_prefetched_multimedia(self):
+        icon_path = 'jr://file/commcare/icon.png'
+        self.module.set_icon('en', icon_path)
+        self.factory.app.create_mapping(self.image, icon_path, save=False)
+
+        media_objects = list(self.factory.app.get_media_objects(remove_unused=True))
+        files, errors = iter_media_files(media_objects, prefetch=2)
+        files = itertools.chain(files, [('media_suite.xml', self.factory.app.create_media_suite())])
+        dummy, zip_path = tempfile.mkstemp()
+        self.addCleanup(os.remove, zip_path)
+        contents = _zip_files_for_ccz(zip_path, files, 10, 50.0, 2, zipfile.ZIP_DEFLATED, None)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(contents.names, {'commcare/icon.png', 'media_suite.xml'})
+        self.assertEqual(contents.get_multimedia_errors(), [])
+        self.assertEqual(check_ccz_multimedia_integrity(self.domain, zip_path), [])
+        with zipfile.ZipFile(zip_path) as z:
+            self.assertEqual(z.read('commcare/icon.png'), self.image.get_display_file(return_type=False))
+
     def _create_multimedia_integrity_zip(self, media_suite, media_objects):
         # Creates a limited zip, containing only media suite and multimedia files
         files, errors = iter_media_files(media_objects)
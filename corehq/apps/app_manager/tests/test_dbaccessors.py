@@ -18,6 +18,7 @@ from corehq.apps.app_manager.dbaccessors import (
     get_built_app_ids_with_submissions_for_app_id,
     get_built_app_ids_with_submissions_for_app_ids_and_versions,
     get_current_app,
+    get_lazy_app,
     get_latest_app_ids_and_versions,
     get_latest_build_doc,
     get_latest_released_app_doc,
@@ -288,6 +289,16 @@ class TestAppGetters(TestCase):
         app = get_app(self.domain, self.app_id, latest=True)
         self.assertEqual(app.version, 4)
 
+    def test_get_lazy_app(self):
+        app = get_lazy_app(self.domain, self.app_id, latest=True)
+        self.assertEqual(app.version, 4)
+        self.assertTrue(app.is_released)
+        self.assertFalse(app.is_wrapped)
+
+        form = app.get_module(0).get_form(0)
+        self.assertTrue(app.is_wrapped)
+        self.assertEqual(app.get_form(form.unique_id).unique_id, form.unique_id)
+
     def test_get_latest_released_app_doc(self):
         app_doc = get_latest_released_app_doc(self.domain, self.app_id)
         self.assertEqual(app_doc['version'], 4)
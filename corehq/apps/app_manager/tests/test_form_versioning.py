@@ -2,6 +2,7 @@ from django.test.testcases import SimpleTestCase, TestCase
 
 from unittest.mock import patch
 
+from corehq.apps.app_manager.exceptions import XFormException
 from corehq.apps.app_manager.models import (
     Application,
     Form,
@@ -167,3 +168,53 @@ class FormIdTest(SimpleTestCase):
         self.assertNotEqual(original_form_id2, new_form_id2)
         self.assertEqual(new_form_id1, copy.get_module(0).get_form(0).form_links[0].form_id)
         self.assertEqual(new_form_id2, copy.get_module(0).get_form(0).form_links[1].form_id)
+
+
+@patch('corehq.apps.app_manager.models.toggles.toggles_enabled_for_domain', return_value=set())
+class XFormCacheKeyTest(SimpleTestCase):
+
+    def setUp(self):
+        self.app = Application.new_app('domain', 'Foo')
+        self.app.modules.append(Module(forms=[Form(), Form()]))
+        self.form0 = self.app.get_module(0).get_form(0)
+        self.form1 = self.app.get_module(0).get_form(1)
+        self.form0.source = get_simple_form(xmlns='xmlns-0')
+        self.form1.source = get_simple_form(xmlns='xmlns-1')
+
+    def get_key(self):
+        return self.app.get_xform_cache_key(self.form0, None, self.app.get_xform_cache_app_hash())
+
+    def test_other_form_versions_ignored(self, *args):
+        key = self.get_key()
+        self.form1.version = 3
+        self.form1.validation_cache = ""
+        self.assertEqual(key, self.get_key())
+
+    def test_form_version_and_source(self, *args):
+        key = self.get_key()
+        self.form0.version = 3
+        versioned_key = self.get_key()
+        self.assertNotEqual(key, versioned_key)
+        self.form0.source = get_simple_form(xmlns='xmlns-0.1')
+        self.assertNotEqual(versioned_key, self.get_key())
+
+    def test_app_changes(self, toggles_mock):
+        key = self.get_key()
+        self.app.langs = ['en', 'fra']
+        langs_key = self.get_key()
+        self.assertNotEqual(key, langs_key)
+        toggles_mock.return_value = {'DONT_INDEX_SAME_CASETYPE'}
+        self.assertNotEqual(langs_key, self.get_key())
+
+
+class ValidateFormsConcurrentlyTest(SimpleTestCase):
+
+    def test_invalid_xml_names_form(self):
+        app = Application.new_app('domain', 'Foo')
+        app.modules.append(Module(forms=[Form(), Form()]))
+        form = app.get_module(0).get_form(0)
+        form.name = {'en': 'Broken Form'}
+        form.source = '<h:html><h:head>'
+        app.get_module(0).get_form(1).source = get_simple_form(xmlns='xmlns-1')
+        with self.assertRaisesRegex(XFormException, 'Error in form "Broken Form": Error parsing XML'):
+            app.validate_forms_concurrently(app.get_forms())
@@ -0,0 +1,37 @@
+import copy
+import pickle
+
+from django.test import SimpleTestCase
+
+from corehq.apps.app_manager.lazy_app import LazyApplication
+from corehq.apps.app_manager.models import Application, Module
+
+
+class LazyApplicationTest(SimpleTestCase):
+
+    def _get_lazy_app(self):
+        app = Application(domain='lazy-app-test', name='foo', version=3, modules=[Module()])
+        return LazyApplication(app.to_json())
+
+    def test_shell_attributes(self):
+        app = self._get_lazy_app()
+        self.assertEqual(app.name, 'foo')
+        self.assertFalse(app.is_wrapped)
+        self.assertEqual(len(app.get_modules()), 1)
+        self.assertTrue(app.is_wrapped)
+
+    def test_copy(self):
+        app = copy.copy(self._get_lazy_app())
+        self.assertEqual(app.name, 'foo')
+        self.assertEqual(len(app.get_modules()), 1)
+
+    def test_pickle(self):
+        app = pickle.loads(pickle.dumps(self._get_lazy_app()))
+        self.assertEqual(app.version, 3)
+        self.assertFalse(app.is_wrapped)
+        self.assertEqual(len(app.get_modules()), 1)
+
+    def test_uninitialized(self):
+        app = LazyApplication.__new__(LazyApplication)
+        with self.assertRaises(AttributeError):
+            app.name
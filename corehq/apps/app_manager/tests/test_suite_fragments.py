@@ -0,0 +1,95 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from corehq.apps.app_manager.models import Application
+from corehq.apps.app_manager.suite_xml.fragments import ModuleFragmentCache
+from corehq.apps.app_manager.suite_xml.generator import SuiteGenerator
+from corehq.apps.app_manager.tests.util import (
+    SuiteMixin,
+    TestXmlMixin,
+    patch_get_xform_resource_overrides,
+)
+
+FORM_SOURCE = '''<h:html xmlns:h="http://www.w3.org/1999/xhtml" xmlns="http://www.w3.org/2002/xforms">
+    <h:head>
+        <model>
+            <instance>
+                <data xmlns="http://example.com/fragment-test">{}</data>
+            </instance>
+        </model>
+    </h:head>
+    <h:body/>
+</h:html>'''
+
+TEST_APPS = [
+    'app',
+    'app_case_detail_instances',
+    'app_case_sharing',
+    'app_graphing',
+    'app_no_case_sharing',
+    'app_print_detail',
+    'call-center',
+    'multi-sort',
+    'owner-name',
+    'shadow_module',
+    'shadow_module_cases',
+    'shadow_module_forms_only',
+    'sort-only-value',
+    'suite-advanced',
+    'tiered-select',
+    'tiered-select-3',
+]
+
+
+@patch_get_xform_resource_overrides()
+@patch('corehq.apps.app_manager.suite_xml.fragments._get_domain_privileges', return_value=[])
+class IncrementalSuiteTest(SimpleTestCase, TestXmlMixin, SuiteMixin):
+    file_path = ('data', 'suite')
+
+    def _generate_suite(self, app, use_fragment_cache):
+        return SuiteGenerator(app, use_fragment_cache=use_fragment_cache).generate_suite()
+
+    def test_incremental_suite_matches_full_suite(self, *args):
+        for app_tag in TEST_APPS:
+            with self.subTest(app=app_tag):
+                app = Application.wrap(self.get_json(app_tag))
+                full_suite = self._generate_suite(app, use_fragment_cache=False)
+                # the first run may fill the cache and the second reads from it
+                self.assertXmlEqual(full_suite, self._generate_suite(app, use_fragment_cache=True))
+                self.assertXmlEqual(full_suite, self._generate_suite(app, use_fragment_cache=True))
+
+    def test_changed_module_is_regenerated(self, *args):
+        app = Application.wrap(self.get_json('suite-advanced'))
+        original_suite = self._generate_suite(app, use_fragment_cache=True)
+
+        module = app.get_module(0)
+        module.case_details.short.columns[0].field = 'changed_property'
+        changed_suite = self._generate_suite(app, use_fragment_cache=True)
+
+        self.assertNotIn(b'changed_property', original_suite)
+        self.assertIn(b'changed_property', changed_suite)
+        self.assertXmlEqual(self._generate_suite(app, use_fragment_cache=False), changed_suite)
+
+    def test_changed_privileges_change_key(self, get_domain_privileges, *args):
+        app = Application.wrap(self.get_json('suite-advanced'))
+        module = app.get_module(0)
+        key = ModuleFragmentCache(app, list(app.get_modules()))._get_key('details', module)
+
+        get_domain_privileges.return_value = ['usercase']
+        self.assertNotEqual(key, ModuleFragmentCache(app, list(app.get_modules()))._get_key('details', module))
+
+    def test_changed_form_source_changes_key(self, *args):
+        for commtrack_enabled in (True, False):
+            with self.subTest(commtrack_enabled=commtrack_enabled):
+                app = Application.wrap(self.get_json('suite-advanced'))
+                app.commtrack_enabled = commtrack_enabled
+                module = app.get_module(0)
+                form = module.get_form(0)
+                form.source = FORM_SOURCE.format('<name/>')
+                key = ModuleFragmentCache(app, list(app.get_modules()))._get_key('entries', module)
+
+                form.source = FORM_SOURCE.format('<supply_point_id/>')
+                changed_key = ModuleFragmentCache(app, list(app.get_modules()))._get_key('entries', module)
+                # Only CommTrack entries depend on the form XML
+                self.assertEqual(key != changed_key, commtrack_enabled)
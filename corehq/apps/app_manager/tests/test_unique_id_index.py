@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+
+from corehq.apps.app_manager.exceptions import FormNotFoundException
+from corehq.apps.app_manager.tests.app_factory import AppFactory
+
+
+class UniqueIdIndexTest(SimpleTestCase):
+
+    def setUp(self):
+        self.factory = AppFactory(build_version='2.9.0')
+        self.m0, self.m0f0 = self.factory.new_basic_module('m0', 'case')
+        self.m0f1 = self.factory.new_form(self.m0)
+        self.m1, self.m1f0 = self.factory.new_basic_module('m1', 'case')
+        self.app = self.factory.app
+
+    def test_lookups(self):
+        self.assertEqual(self.app.get_form_location(self.m0f1.unique_id), (0, 1))
+        self.assertEqual(self.app.get_form_location(self.m1f0.unique_id), (1, 0))
+        self.assertEqual(self.app.get_form(self.m1f0.unique_id).unique_id, self.m1f0.unique_id)
+        self.assertEqual(self.app.get_module_by_unique_id(self.m1.unique_id).id, 1)
+
+        form = self.app.get_form(self.m0f1.unique_id, bare=False)
+        self.assertEqual(form['module'].unique_id, self.m0.unique_id)
+        self.assertEqual(form['form'].unique_id, self.m0f1.unique_id)
+
+    def test_lookups_after_moves(self):
+        # build the index before changing the app
+        self.assertEqual(self.app.get_form_location(self.m0f0.unique_id), (0, 0))
+
+        self.app.modules.insert(0, self.app.modules.pop(1))
+        self.app.get_module(1).forms.pop(0)
+        self.assertEqual(self.app.get_module_by_unique_id(self.m0.unique_id).id, 1)
+        self.assertEqual(self.app.get_form_location(self.m0f1.unique_id), (1, 0))
+        self.assertEqual(self.app.get_form_location(self.m1f0.unique_id), (0, 0))
+        with self.assertRaises(FormNotFoundException):
+            self.app.get_form(self.m0f0.unique_id)
+
+    def test_new_form(self):
+        self.assertEqual(self.app.get_form_location(self.m0f0.unique_id), (0, 0))
+        form = self.factory.new_form(self.m1)
+        self.assertEqual(self.app.get_form_location(form.unique_id), (1, 1))
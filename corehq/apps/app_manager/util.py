@@ -430,6 +430,22 @@ def get_cloudcare_session_data(domain_name, form, couch_user):
     return session_data
 
 
+def get_unique_id_index(app_source):
+    """
+    Accepts the raw JSON of an app and returns a dict mapping the unique ID of
+    each module to ``(module_index,)`` and of each form to
+    ``(module_index, form_index)``.
+    """
+    index = {}
+    for m, module in enumerate(app_source.get('modules') or []):
+        if module.get('unique_id'):
+            index[module['unique_id']] = (m,)
+        for f, form in enumerate(module.get('forms') or []):
+            if form.get('unique_id'):
+                index[form['unique_id']] = (m, f)
+    return index
+
+
 def update_form_unique_ids(app_source, ids_map, update_all=True):
     """
     Accepts an ids_map translating IDs in app_source to the desired replacement
@@ -1,7 +1,11 @@
+import threading
 import time
 import uuid
 from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
+from django.db import connections
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
@@ -10,6 +14,7 @@ from couchdbkit import NoResultFound
 from casexml.apps.case.const import CASE_TAG_DATE_OPENED
 from casexml.apps.case.mock import CaseBlock, CaseBlockError
 from couchexport.export import SCALAR_NEVER_WAS
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 from soil.progress import TaskProgressManager
 
@@ -22,12 +27,16 @@ from corehq.apps.hqcase.utils import CASEBLOCK_CHUNKSIZE, submit_case_blocks
 from corehq.apps.locations.models import SQLLocation
 from corehq.apps.receiverwrapper.rate_limiter import rate_limit_submission
 from corehq.apps.users.cases import get_wrapped_owner
+from corehq.apps.users.dbaccessors import get_user_docs_by_username
 from corehq.apps.users.models import CouchUser
 from corehq.apps.users.util import format_username
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors
 from corehq.form_processor.models import STANDARD_CHARFIELD_LENGTH
+from corehq.sql_db.util import get_db_alias_for_partitioned_doc
 from corehq.toggles import (
     BULK_UPLOAD_DATE_OPENED,
     CASE_IMPORT_DATA_DICTIONARY_VALIDATION,
+    CASE_IMPORT_PARALLEL_SUBMISSION,
     DOMAIN_PERMISSIONS_MIRROR,
 )
 from corehq.util.metrics import metrics_counter, metrics_histogram
@@ -42,6 +51,11 @@ from .util import EXTERNAL_ID, RESERVED_FIELDS, lookup_case
 RowAndCase = namedtuple('RowAndCase', ['row', 'case'])
 ALL_LOCATIONS = 'ALL_LOCATIONS'
 
+# number of rows whose cases and owners are looked up together
+ROW_CHUNK_SIZE = 500
+# number of case shards whose case blocks are submitted concurrently
+SUBMISSION_WORKERS = 4
+
 
 def do_import(spreadsheet, config, domain, task=None, record_form_callback=None):
     has_domain_column = 'domain' in [c.lower() for c in spreadsheet.get_header_columns()]
@@ -84,9 +98,12 @@ class _Importer(object):
         self.record_form_callback = record_form_callback
         self.results = import_results or _ImportResults()
         self.owner_accessor = _OwnerAccessor(domain, self.user)
+        self.case_lookup = _CaseLookup(domain)
         self.uncreated_external_ids = set()
         self._unsubmitted_caseblocks = []
         self.multi_domain = multi_domain
+        self.parallel_submission = CASE_IMPORT_PARALLEL_SUBMISSION.enabled(domain)
+        self._results_lock = threading.Lock()
         if CASE_IMPORT_DATA_DICTIONARY_VALIDATION.enabled(self.domain):
             self.fields_to_validate = fields_to_validate(domain, config.case_type)
         else:
@@ -95,41 +112,79 @@ class _Importer(object):
 
     def do_import(self, spreadsheet):
         with TaskProgressManager(self.task, src="case_importer") as progress_manager:
-            for row_num, row in enumerate(spreadsheet.iter_row_dicts(), start=1):
-                progress_manager.set_progress(row_num - 1, spreadsheet.max_row)
-                if row_num == 1:
-                    continue  # skip first row (header row)
-
-                try:
-                    # check if there's a domain column, if true it's value should
-                    # match the current domain, else skip the row.
-                    if self.multi_domain:
-                        if self.domain != row.get('domain'):
-                            continue
-                    self.import_row(row_num, row)
-                except exceptions.CaseRowErrorList as errors:
-                    self.results.add_errors(row_num, errors)
-                except exceptions.CaseRowError as error:
-                    self.results.add_error(row_num, error)
+            rows = self._iter_rows(spreadsheet, progress_manager)
+            for chunk in chunked(rows, ROW_CHUNK_SIZE):
+                self.import_rows(chunk)
 
             self.commit_caseblocks()
             return self.results.to_json()
 
+    def _iter_rows(self, spreadsheet, progress_manager):
+        for row_num, row in enumerate(spreadsheet.iter_row_dicts(), start=1):
+            progress_manager.set_progress(row_num - 1, spreadsheet.max_row)
+            if row_num == 1:
+                continue  # skip first row (header row)
+
+            # check if there's a domain column, if true it's value should
+            # match the current domain, else skip the row.
+            if self.multi_domain:
+                if self.domain != row.get('domain'):
+                    continue
+            yield row_num, row
+
+    def import_rows(self, rows):
+        """Imports a chunk of rows, looking up their cases and owners in bulk
+
+        :param rows: list of (row_num, raw_row) tuples
+        """
+        case_rows = []
+        for row_num, raw_row in rows:
+            with self._row_errors(row_num):
+                row = self._get_case_import_row(raw_row)
+                if row:
+                    case_rows.append((row_num, row))
+
+        self.case_lookup.prefetch(
+            lookup for row_num, row in case_rows for lookup in row.get_case_lookups()
+        )
+        self.owner_accessor.prefetch_names(row.uploaded_owner_name for row_num, row in case_rows)
+
+        for row_num, row in case_rows:
+            with self._row_errors(row_num):
+                self._import_case_row(row_num, row)
+
+    @contextmanager
+    def _row_errors(self, row_num):
+        try:
+            yield
+        except exceptions.CaseRowErrorList as errors:
+            self.results.add_errors(row_num, errors)
+        except exceptions.CaseRowError as error:
+            self.results.add_error(row_num, error)
+
     def import_row(self, row_num, raw_row):
+        row = self._get_case_import_row(raw_row)
+        if row:
+            self._import_case_row(row_num, row)
+
+    def _get_case_import_row(self, raw_row):
         search_id = self._parse_search_id(raw_row)
         fields_to_update = self._populate_updated_fields(raw_row)
         if not any(fields_to_update.values()):
             # if the row was blank, just skip it, no errors
-            return
+            return None
 
-        row = _CaseImportRow(
+        return _CaseImportRow(
             search_id=search_id,
             fields_to_update=fields_to_update,
             config=self.config,
             domain=self.domain,
             user_id=self.user.user_id,
             owner_accessor=self.owner_accessor,
+            case_lookup=self.case_lookup,
         )
+
+    def _import_case_row(self, row_num, row):
         if row.relies_on_uncreated_case(self.uncreated_external_ids):
             self.commit_caseblocks()
         if row.is_new_case and not self.config.create_new_cases:
@@ -156,16 +211,52 @@ class _Importer(object):
     def add_caseblock(self, caseblock):
         self._unsubmitted_caseblocks.append(caseblock)
         # check if we've reached a reasonable chunksize and if so, submit
-        if len(self._unsubmitted_caseblocks) >= CASEBLOCK_CHUNKSIZE:
+        chunksize = CASEBLOCK_CHUNKSIZE
+        if self.parallel_submission:
+            chunksize *= SUBMISSION_WORKERS
+        if len(self._unsubmitted_caseblocks) >= chunksize:
             self.commit_caseblocks()
 
     def commit_caseblocks(self):
         if self._unsubmitted_caseblocks:
-            self.submit_and_process_caseblocks(self._unsubmitted_caseblocks)
-            self.results.num_chunks += 1
+            if self.parallel_submission:
+                self.results.num_chunks += self._submit_by_shard(self._unsubmitted_caseblocks)
+            else:
+                self.submit_and_process_caseblocks(self._unsubmitted_caseblocks)
+                self.results.num_chunks += 1
             self._unsubmitted_caseblocks = []
+            # cases have now been created for these, so look them up again
+            self.case_lookup.forget(self.uncreated_external_ids)
             self.uncreated_external_ids = set()
 
+    def _submit_by_shard(self, caseblocks):
+        """Submits the case blocks of each case shard in a separate worker
+
+        Case blocks for the same case are always on the same shard, so are
+        still submitted in order.
+
+        :returns: the number of forms submitted
+        """
+        caseblocks_by_shard = defaultdict(list)
+        for caseblock in caseblocks:
+            caseblocks_by_shard[get_db_alias_for_partitioned_doc(caseblock.case.case_id)].append(caseblock)
+        shard_chunks = [
+            list(chunked(shard_caseblocks, CASEBLOCK_CHUNKSIZE, list))
+            for shard_caseblocks in caseblocks_by_shard.values()
+        ]
+        with ThreadPoolExecutor(max_workers=SUBMISSION_WORKERS) as executor:
+            for future in [executor.submit(self._submit_chunks, chunks) for chunks in shard_chunks]:
+                future.result()
+        return sum(len(chunks) for chunks in shard_chunks)
+
+    def _submit_chunks(self, chunks):
+        try:
+            for chunk in chunks:
+                self.submit_and_process_caseblocks(chunk)
+        finally:
+            # worker threads use their own database connections
+            connections.close_all()
+
     def submit_and_process_caseblocks(self, caseblocks):
         if not caseblocks:
             return
@@ -176,26 +267,31 @@ class _Importer(object):
                 raise Exception("Form error during case import: {}".format(form.problem))
         except Exception:
             notify_exception(None, "Case Importer: Uncaught failure submitting caseblocks")
-            for row_number, case in caseblocks:
-                self.results.add_error(row_number, exceptions.ImportErrorMessage())
+            with self._results_lock:
+                for row_number, case in caseblocks:
+                    self.results.add_error(row_number, exceptions.ImportErrorMessage())
         else:
-            if self.record_form_callback:
-                self.record_form_callback(form.form_id)
-            properties = {p for c in cases for p in c.dynamic_case_properties().keys()}
-            if self.config.case_type and len(properties):
-                add_inferred_export_properties.delay(
-                    'CaseImporter',
-                    self.domain,
-                    self.config.case_type,
-                    properties,
-                )
-            else:
-                _soft_assert = soft_assert(notify_admins=True)
-                _soft_assert(
-                    len(properties) == 0,
-                    'error adding inferred export properties in domain '
-                    '({}): {}'.format(self.domain, ", ".join(properties))
-                )
+            with self._results_lock:
+                self._process_submitted_cases(form, cases)
+
+    def _process_submitted_cases(self, form, cases):
+        if self.record_form_callback:
+            self.record_form_callback(form.form_id)
+        properties = {p for c in cases for p in c.dynamic_case_properties().keys()}
+        if self.config.case_type and len(properties):
+            add_inferred_export_properties.delay(
+                'CaseImporter',
+                self.domain,
+                self.config.case_type,
+                properties,
+            )
+        else:
+            _soft_assert = soft_assert(notify_admins=True)
+            _soft_assert(
+                len(properties) == 0,
+                'error adding inferred export properties in domain '
+                '({}): {}'.format(self.domain, ", ".join(properties))
+            )
 
     def pre_submit_hook(self):
         pass
@@ -315,8 +411,10 @@ class _TimedAndThrottledImporter(_Importer):
     def __init__(self, domain, config, task, record_form_callback, import_results=None, multi_domain=False):
         super().__init__(domain, config, task, record_form_callback, import_results, multi_domain)
 
+        # submissions are made from worker threads
+        self._timing_lock = threading.Lock()
         self._last_submission_duration = 1  # duration in seconds; start with a value of 1s
-        self._total_delayed_duration = 0  # sum of all rate limiter delays, in seconds
+        self._delays = []  # (start, end) of each rate limiter delay
 
     def do_import(self, spreadsheet):
         with TimingContext() as timer:
@@ -329,7 +427,7 @@ class _TimedAndThrottledImporter(_Importer):
             return results
 
     def _report_import_timings(self, timer, results):
-        active_duration = timer.duration - self._total_delayed_duration
+        active_duration = timer.duration - self._get_total_delayed_duration()
         rows_created = results['created_count']
         rows_updated = results['match_count']
         rows_failed = results['failed_count']
@@ -341,6 +439,12 @@ class _TimedAndThrottledImporter(_Importer):
             buckets=[50, 70, 100, 150, 250, 350, 500], bucket_tag='duration', bucket_unit='ms',
         )
 
+        rows_per_second = (rows_created + rows_updated + rows_failed) / max(active_duration, 1)
+        metrics_histogram(
+            'commcare.case_importer.rows_per_second', rows_per_second,
+            buckets=[1, 5, 10, 25, 50, 100, 250], bucket_tag='rows_per_second', bucket_unit='',
+        )
+
         for rows, status in ((rows_created, 'created'),
                              (rows_updated, 'updated'),
                              (rows_failed, 'error')):
@@ -348,11 +452,32 @@ class _TimedAndThrottledImporter(_Importer):
                 'status': status,
             })
 
+    def _get_total_delayed_duration(self):
+        """Returns the wall-clock time, in seconds, during which at least
+        one submission was being delayed by the rate limiter
+
+        Delays in worker threads can overlap, so they are not summed.
+        """
+        total = 0
+        delayed_until = None
+        with self._timing_lock:
+            delays = sorted(self._delays)
+        for start, end in delays:
+            if delayed_until is not None:
+                start = max(start, delayed_until)
+            if end > start:
+                total += end - start
+                delayed_until = end
+        return total
+
     def pre_submit_hook(self):
+        with self._timing_lock:
+            max_wait = self._last_submission_duration
+        start = time.time()
         if rate_limit_submission(
                 self.domain,
                 delay_rather_than_reject=True,
-                max_wait=self._last_submission_duration):
+                max_wait=max_wait):
             # the duration of the last submission is a combined heuristic
             # for the amount of load on the databases
             # and the amount of load that the requests from this import put on the databases.
@@ -362,11 +487,12 @@ class _TimedAndThrottledImporter(_Importer):
             # For a fully throttled domain, this will up to double
             # the amount of time the case import takes
             metrics_histogram(
-                'commcare.case_importer.import_delays', self._last_submission_duration,
+                'commcare.case_importer.import_delays', max_wait,
                 buckets=[5, 7, 10, 15, 25, 35, 50], bucket_tag='duration', bucket_unit='s',
                 tags={'domain': self.domain}
             )
-            self._total_delayed_duration += self._last_submission_duration
+            with self._timing_lock:
+                self._delays.append((start, time.time()))
 
     def submit_case_blocks(self, caseblocks):
         timer = None
@@ -375,17 +501,19 @@ class _TimedAndThrottledImporter(_Importer):
                 return super().submit_case_blocks(caseblocks)
         finally:
             if timer:
-                self._last_submission_duration = timer.duration
+                with self._timing_lock:
+                    self._last_submission_duration = timer.duration
 
 
 class _CaseImportRow(object):
-    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor):
+    def __init__(self, search_id, fields_to_update, config, domain, user_id, owner_accessor, case_lookup):
         self.search_id = search_id
         self.fields_to_update = fields_to_update
         self.config = config
         self.domain = domain
         self.user_id = user_id
         self.owner_accessor = owner_accessor
+        self.case_lookup = case_lookup
 
         self.case_name = fields_to_update.pop('name', None)
         self._check_case_name()
@@ -432,15 +560,21 @@ class _CaseImportRow(object):
         return any(lookup_id and lookup_id in uncreated_external_ids
                    for lookup_id in [self.search_id, self.parent_id, self.parent_external_id])
 
+    def get_case_lookups(self):
+        """The (search_field, search_id, case_type) lookups needed to import this row"""
+        return [
+            (self.config.search_field, self.search_id, self.config.case_type),
+            ('case_id', self.parent_id, self.parent_type),
+            ('external_id', self.parent_external_id, self.parent_type),
+        ]
+
     @cached_property
     def existing_case(self):
-        case, error = lookup_case(
+        case, error = self.case_lookup.lookup(
             self.config.search_field,
             self.search_id,
-            self.domain,
             self.config.case_type
         )
-        _log_case_lookup(self.domain)
         if error == LookupErrors.MultipleResults:
             raise exceptions.TooManyMatches()
         return case
@@ -465,9 +599,7 @@ class _CaseImportRow(object):
                 ('parent_external_id', 'external_id', self.parent_external_id),
         ]:
             if search_id:
-                parent_case, error = lookup_case(
-                    search_field, search_id, self.domain, self.parent_type)
-                _log_case_lookup(self.domain)
+                parent_case, error = self.case_lookup.lookup(search_field, search_id, self.parent_type)
                 if parent_case:
                     self.validate_parent_column()
                     if self.parent_relationship_type == 'child':
@@ -520,8 +652,82 @@ class _CaseImportRow(object):
         )
 
 
-def _log_case_lookup(domain):
-    case_load_counter("case_importer", domain)
+def _log_case_lookup(domain, num_cases=1):
+    case_load_counter("case_importer", domain)(num_cases)
+
+
+class _CaseLookup(object):
+    """Looks up the cases referred to by rows, by case_id or external_id
+
+    Results are the same as ``lookup_case``, but are fetched with bulk
+    queries for a chunk of rows at a time by ``prefetch``.
+    """
+
+    def __init__(self, domain):
+        self.domain = domain
+        self._results = {}
+
+    def prefetch(self, lookups):
+        """Replaces the cached results with those of the given lookups
+
+        :param lookups: iterable of (search_field, search_id, case_type) tuples
+        """
+        lookups = {lookup for lookup in lookups if lookup[1]}
+        case_accessors = CaseAccessors(self.domain)
+
+        case_ids = list({search_id for search_field, search_id, case_type in lookups
+                         if search_field == 'case_id'})
+        cases_by_id = {case.case_id: case for case in case_accessors.get_cases(case_ids)}
+
+        cases_by_external_id = defaultdict(list)
+        external_ids_by_type = defaultdict(set)
+        for search_field, search_id, case_type in lookups:
+            if search_field == EXTERNAL_ID:
+                external_ids_by_type[case_type].add(search_id)
+        for case_type, external_ids in external_ids_by_type.items():
+            for case in case_accessors.get_cases_by_external_ids(list(external_ids), case_type=case_type):
+                cases_by_external_id[(case.external_id, case_type)].append(case)
+        _log_case_lookup(self.domain, len(cases_by_id) + sum(map(len, cases_by_external_id.values())))
+
+        self._results = {}
+        for search_field, search_id, case_type in lookups:
+            if search_field == 'case_id':
+                case = cases_by_id.get(search_id)
+                if case and case.domain == self.domain and case.type == case_type:
+                    result = (case, None)
+                else:
+                    result = (None, LookupErrors.NotFound)
+            elif search_field == EXTERNAL_ID:
+                cases = cases_by_external_id[(search_id, case_type)]
+                if not cases:
+                    result = (None, LookupErrors.NotFound)
+                elif len(cases) > 1:
+                    result = (None, LookupErrors.MultipleResults)
+                else:
+                    result = (cases[0], None)
+            else:
+                continue
+            self._results[(search_field, search_id, case_type)] = result
+
+    def lookup(self, search_field, search_id, case_type):
+        """
+        Returns a tuple with case (if found) and an error code (if there
+        was an error in lookup).
+        """
+        key = (search_field, search_id, case_type)
+        if key not in self._results:
+            self._results[key] = lookup_case(search_field, search_id, self.domain, case_type)
+            _log_case_lookup(self.domain)
+        return self._results[key]
+
+    def forget(self, search_ids):
+        """Drops the results for the given search IDs, e.g. once cases have
+        been created with them
+        """
+        self._results = {
+            key: result for key, result in self._results.items()
+            if key[1] not in search_ids
+        }
 
 
 class _ImportResults(object):
@@ -593,6 +799,32 @@ class _OwnerAccessor(object):
     def get_id_from_name(self, name):
         return cached_function_call(self._get_id_from_name, name, self.name_cache)
 
+    def prefetch_names(self, names):
+        """Looks up the users among the given owner names in a single query
+
+        Names that don't belong to a user are looked up as groups and
+        locations when they are used.
+        """
+        names_by_username = {}
+        for name in names:
+            if name and name not in self.name_cache:
+                username = name if '@' in name else format_username(name, self.domain)
+                names_by_username[username] = name
+        if not names_by_username:
+            return
+
+        for user_doc in get_user_docs_by_username(names_by_username):
+            name = names_by_username.get(user_doc['username'])
+            if name is None or name in self.name_cache:
+                continue
+            owner = CouchUser.wrap_correctly(user_doc)
+            try:
+                self._check_owner(owner, 'owner_name')
+            except CaseRowError as err:
+                self.name_cache[name] = err
+            else:
+                self.name_cache[name] = owner._id
+
     def _get_id_from_name(self, name):
         '''
         :param name: A username, group name, or location name/site_code
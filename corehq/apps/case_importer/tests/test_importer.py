@@ -1,7 +1,9 @@
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.utils.dateparse import parse_datetime
 
 from celery import states
@@ -12,7 +14,7 @@ from casexml.apps.case.mock import CaseFactory, CaseStructure
 from casexml.apps.case.tests.util import delete_all_cases
 
 from corehq.apps.case_importer import exceptions
-from corehq.apps.case_importer.do_import import do_import
+from corehq.apps.case_importer.do_import import _Importer, _TimedAndThrottledImporter, do_import
 from corehq.apps.case_importer.tasks import bulk_import_async
 from corehq.apps.case_importer.tracking.models import CaseUploadRecord
 from corehq.apps.case_importer.util import ImporterConfig, WorksheetWrapper, \
@@ -195,6 +197,49 @@ class ImporterTest(TestCase):
         # shouldn't touch existing properties
         self.assertEqual('foo', case.get_case_property('importer_test_prop'))
 
+    def testCaseLookupsArePrefetched(self):
+        cases = self.factory.create_or_update_cases([
+            CaseStructure(attrs={'create': True, 'external_id': 'ext-{}'.format(i)})
+            for i in range(3)
+        ])
+        config = self._config(['external_id', 'age'], search_field='external_id')
+        file = make_worksheet_wrapper(
+            ['external_id', 'age'],
+            *[[case.external_id, 'age-{}'.format(i)] for i, case in enumerate(cases)]
+        )
+        with patch('corehq.apps.case_importer.do_import.lookup_case') as lookup_case:
+            res = do_import(file, config, self.domain)
+        lookup_case.assert_not_called()
+        self.assertEqual(0, res['created_count'])
+        self.assertEqual(3, res['match_count'])
+        self.assertFalse(res['errors'])
+
+    @flag_enabled('CASE_IMPORT_PARALLEL_SUBMISSION')
+    @patch('corehq.apps.case_importer.do_import.CASEBLOCK_CHUNKSIZE', 2)
+    def testParallelSubmissionByShard(self):
+        submitted_chunks = []
+
+        def get_shard(case_id):
+            return 'db{}'.format(int(case_id[-1], 16) % 2)
+
+        config = self._config(['case_id', 'age'])
+        file = make_worksheet_wrapper(
+            ['case_id', 'age'],
+            *[['case_id-{}'.format(i), 'age-{}'.format(i)] for i in range(12)]
+        )
+        with patch('corehq.apps.case_importer.do_import.get_db_alias_for_partitioned_doc', get_shard), \
+                patch('corehq.apps.case_importer.do_import.connections'), \
+                patch('corehq.apps.case_importer.do_import._Importer.submit_and_process_caseblocks',
+                      side_effect=submitted_chunks.append):
+            res = do_import(file, config, self.domain)
+
+        self.assertEqual(12, res['created_count'])
+        self.assertEqual(12, sum(len(chunk) for chunk in submitted_chunks))
+        self.assertEqual(len(submitted_chunks), res['num_chunks'])
+        for chunk in submitted_chunks:
+            self.assertLessEqual(len(chunk), 2)
+            self.assertEqual(1, len({get_shard(caseblock.case.case_id) for caseblock in chunk}))
+
     def testCaseLookupTypeCheck(self):
         [case] = self.factory.create_or_update_case(CaseStructure(attrs={
             'create': True,
@@ -687,6 +732,37 @@ class ImporterTest(TestCase):
         self.assertIn(exceptions.ExternalIdTooLong.title, res['errors'])
 
 
+class TimedAndThrottledImporterTest(SimpleTestCase):
+
+    def _get_importer(self):
+        with patch.object(_Importer, '__init__', return_value=None):
+            importer = _TimedAndThrottledImporter('importer-test', None, None, None)
+        importer.domain = 'importer-test'
+        return importer
+
+    def test_overlapping_delays(self):
+        importer = self._get_importer()
+        importer._delays = [(20, 25), (0, 10), (6, 8), (5, 12)]
+        self.assertEqual(importer._get_total_delayed_duration(), 17)
+
+    @patch('corehq.apps.case_importer.do_import.metrics_histogram')
+    @patch('corehq.apps.case_importer.do_import.rate_limit_submission')
+    def test_parallel_delays(self, rate_limit_submission, metrics_histogram):
+        def delay(*args, **kwargs):
+            time.sleep(0.2)
+            return True
+
+        rate_limit_submission.side_effect = delay
+        importer = self._get_importer()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for future in [executor.submit(importer.pre_submit_hook) for i in range(4)]:
+                future.result()
+
+        self.assertEqual(len(importer._delays), 4)
+        self.assertGreaterEqual(importer._get_total_delayed_duration(), 0.2)
+        self.assertLess(importer._get_total_delayed_duration(), 0.8)
+
+
 def make_worksheet_wrapper(*rows):
     return WorksheetWrapper(make_worksheet(rows))
 
@@ -4,6 +4,16 @@ from collections import namedtuple
 CASE_PROPERTIES_PATH = 'case_properties'
 VALUE = 'value'
 
+# Typed top-level fields for properties configured per domain
+# (see CaseSearchConfig.typed_properties)
+TYPED_PROPERTIES_PATH = 'typed_properties'
+# Every typed property has an `exact` field, plus a `numeric` or `date` field
+# if it has that type
+TYPED_EXACT = 'exact'
+TYPED_NUMERIC = 'numeric'
+TYPED_DATE = 'date'
+TYPED_PROPERTY_TYPES = (TYPED_EXACT, TYPED_NUMERIC, TYPED_DATE)
+
 # Case indices nested documents
 INDICES_PATH = 'indices'
 REFERENCED_ID = 'referenced_id'
@@ -26,6 +36,7 @@ INDEXED_ON = '@indexed_on'
 SYSTEM_PROPERTIES = [
     CASE_PROPERTIES_PATH,
     INDEXED_ON,
+    TYPED_PROPERTIES_PATH,
 ]
 
 # Properties that are inconsistent between case models stored in HQ and casedb
@@ -5,6 +5,7 @@ from django.utils.translation import ugettext as _
 from eulxml.xpath import parse as parse_xpath
 from eulxml.xpath.ast import FunctionCall, Step, UnaryExpression, serialize
 
+from corehq.apps.case_search.models import get_common_typed_properties
 from corehq.apps.case_search.xpath_functions import (
     XPATH_FUNCTIONS,
     XPathFunctionException,
@@ -16,6 +17,7 @@ from corehq.apps.es.case_search import (
     case_property_range_query,
     reverse_index_case_query,
 )
+from corehq.elastic import run_multi_query
 
 
 class CaseFilterError(Exception):
@@ -52,6 +54,9 @@ def print_ast(node):
 
 
 MAX_RELATED_CASES = 500000  # Limit each related case lookup to return 500,000 cases to prevent timeouts
+# Related case lookups with up to this many results are read from the batched
+# search, larger ones are scrolled
+RELATED_CASE_LOOKUP_SIZE = 1000
 
 
 OPERATOR_MAPPING = {
@@ -77,6 +82,8 @@ def build_filter_from_ast(domain, node, fuzzy=False):
 
     If fuzzy is true, all equality operations will be treated as fuzzy.
     """
+    typed_properties = get_common_typed_properties(domain)
+    related_case_lookups = _RelatedCaseLookups(domain, fuzzy)
 
     def _walk_related_cases(node):
         """Return a query that will fulfill the filter on the related case.
@@ -89,53 +96,42 @@ def build_filter_from_ast(domain, node, fuzzy=False):
         found in (1).
         3. Return the lowest of these ids as an related case query filter
         """
+        lookup, final_identifier = _get_related_case_lookup(node)
+        ids = related_case_lookups.get_ids(lookup)
+        return reverse_index_case_query(ids, final_identifier)
 
-        # fetch the ids of the highest level cases that match the case_property
-        # i.e. all the cases which have `property = 'value'`
-        ids = _parent_property_lookup(node)
+    def _get_related_case_lookup(node):
+        """Splits a node of the form `parent/grandparent/property = 'value'` into
+        the lookup needed to find the cases it refers to, i.e. the property
+        filter and the identifiers to walk down, `('property = "value"', 'grandparent')`,
+        and the identifier to filter on, `parent`
+        """
+        if isinstance(node.right, Step):
+            _raise_step_RHS(node)
+        property_query = '{} {} "{}"'.format(serialize(node.left.right), node.op, node.right)
 
         # get the related case path we need to walk, i.e. `parent/grandparent/property`
+        identifiers = []
         n = node.left
         while _is_related_case_lookup(n):
-            # This walks down the tree and finds case ids that match each identifier
-            # This is basically performing multiple "joins" to find related cases since ES
-            # doesn't have a way to relate models together
-
-            # Get the path to the related case, e.g. `parent/grandparent`
-            # On subsequent run throughs, it walks down the tree (e.g. n = [parent, /, grandparent])
+            # On each run through, walk down the tree (e.g. n = [parent, /, grandparent])
+            # to get the identifier of the next level of cases, e.g. `grandparent`
             n = n.left
-            identifier = serialize(n.right)  # the identifier at this step, e.g. `grandparent`
-
-            # get the ids of the cases that point at the previous level's cases
-            # this has the potential of being a very large list
-            ids = _child_case_lookup(ids, identifier=identifier)
-            if not ids:
-                break
+            identifiers.append(serialize(n.right))
 
         # after walking the full tree, get the final level we are interested in, i.e. `parent`
-        final_identifier = serialize(n.left)
-        return reverse_index_case_query(ids, final_identifier)
+        return (property_query,) + tuple(identifiers), serialize(n.left)
 
-    def _parent_property_lookup(node):
-        """given a node of the form `parent/foo = 'thing'`, return all case_ids where `foo = thing`
+    def _get_related_case_lookups(node):
+        """Returns the lookups for all of the related case filters that are
+        combined with `and` or `or` in the expression, so that they can be
+        run together
         """
-        if isinstance(node.right, Step):
-            _raise_step_RHS(node)
-        new_query = '{} {} "{}"'.format(serialize(node.left.right), node.op, node.right)
-
-        es_query = CaseSearchES().domain(domain).xpath_query(domain, new_query, fuzzy=fuzzy)
-        if es_query.count() > MAX_RELATED_CASES:
-            raise TooManyRelatedCasesError(
-                _("The related case lookup you are trying to perform would return too many cases"),
-                new_query
-            )
-
-        return es_query.scroll_ids()
-
-    def _child_case_lookup(case_ids, identifier):
-        """returns a list of all case_ids who have parents `case_id` with the relationship `identifier`
-        """
-        return CaseSearchES().domain(domain).get_child_cases(case_ids, identifier).scroll_ids()
+        if _is_related_case_lookup(node):
+            return [_get_related_case_lookup(node)[0]]
+        if getattr(node, 'op', None) in ('and', 'or'):
+            return _get_related_case_lookups(node.left) + _get_related_case_lookups(node.right)
+        return []
 
     def _is_related_case_lookup(node):
         """Returns whether a particular AST node is a related case lookup
@@ -182,7 +178,9 @@ def build_filter_from_ast(domain, node, fuzzy=False):
             # This is a leaf node
             case_property_name = serialize(node.left)
             value = _unwrap_function(node.right)
-            q = case_property_query(case_property_name, value, fuzzy=fuzzy)
+            q = case_property_query(
+                case_property_name, value, fuzzy=fuzzy, property_type=typed_properties.get(case_property_name)
+            )
 
             if node.op == '!=':
                 return filters.NOT(q)
@@ -204,7 +202,10 @@ def build_filter_from_ast(domain, node, fuzzy=False):
         try:
             case_property_name = serialize(node.left)
             value = _unwrap_function(node.right)
-            return case_property_range_query(case_property_name, **{COMPARISON_MAPPING[node.op]: value})
+            return case_property_range_query(
+                case_property_name, property_type=typed_properties.get(case_property_name),
+                **{COMPARISON_MAPPING[node.op]: value}
+            )
         except (TypeError, ValueError):
             raise CaseFilterError(
                 _("The right hand side of a comparison must be a number or date. "
@@ -242,9 +243,79 @@ def build_filter_from_ast(domain, node, fuzzy=False):
             serialize(node)
         )
 
+    related_case_lookups.prefetch(_get_related_case_lookups(node))
     return visit(node)
 
 
+class _RelatedCaseLookups:
+    """Finds the cases that related case filters refer to
+
+    A lookup is a tuple of a property filter followed by the identifiers
+    of the relationships to walk down from the cases that match it,
+    e.g. `('age > 10', 'grandparent')` finds the cases whose grandparent
+    index points to a case with `age > 10`.
+
+    Lookups are run a level at a time, with the queries at each level for
+    all of the lookups sent in one multi-search request. Lookups that share
+    a prefix share its results.
+    """
+
+    def __init__(self, domain, fuzzy):
+        self.domain = domain
+        self.fuzzy = fuzzy
+        self._ids_by_lookup = {}
+
+    def get_ids(self, lookup):
+        self.prefetch([lookup])
+        return self._ids_by_lookup[lookup]
+
+    def prefetch(self, lookups):
+        depth = max([len(lookup) for lookup in lookups], default=0)
+        for level in range(1, depth + 1):
+            queries = {}
+            for lookup in {lookup[:level] for lookup in lookups if len(lookup) >= level}:
+                if lookup in self._ids_by_lookup:
+                    continue
+                if level == 1:
+                    queries[lookup] = self._property_lookup_query(lookup[0])
+                    continue
+                case_ids = self._ids_by_lookup[lookup[:-1]]
+                if case_ids:
+                    queries[lookup] = self._child_case_lookup_query(case_ids, lookup[-1])
+                else:
+                    self._ids_by_lookup[lookup] = []
+            self._run_lookups(queries)
+
+    def _property_lookup_query(self, property_query):
+        """all cases where e.g. `foo = 'thing'`"""
+        return CaseSearchES().domain(self.domain).xpath_query(self.domain, property_query, fuzzy=self.fuzzy)
+
+    def _child_case_lookup_query(self, case_ids, identifier):
+        """all cases who have parents `case_ids` with the relationship `identifier`"""
+        return CaseSearchES().domain(self.domain).get_child_cases(case_ids, identifier)
+
+    def _run_lookups(self, queries):
+        if not queries:
+            return
+        lookups = list(queries)
+        results = run_multi_query(CaseSearchES.index, [
+            queries[lookup].exclude_source().size(RELATED_CASE_LOOKUP_SIZE).raw_query
+            for lookup in lookups
+        ])
+        for lookup, result in zip(lookups, results):
+            total = result['hits']['total']
+            hits = result['hits']['hits']
+            if len(lookup) == 1 and total > MAX_RELATED_CASES:
+                raise TooManyRelatedCasesError(
+                    _("The related case lookup you are trying to perform would return too many cases"),
+                    lookup[0]
+                )
+            if total <= len(hits):
+                self._ids_by_lookup[lookup] = [hit['_id'] for hit in hits]
+            else:
+                self._ids_by_lookup[lookup] = list(queries[lookup].scroll_ids())
+
+
 def build_filter_from_xpath(domain, xpath, fuzzy=False):
     error_message = _(
         "We didn't understand what you were trying to do with {}. "
@@ -0,0 +1,57 @@
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+
+from corehq.apps.case_search.models import get_typed_properties
+from corehq.apps.es import queries
+from corehq.apps.es.case_search import (
+    CaseSearchES,
+    case_property_query,
+    case_property_range_query,
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Compares the latency of case search queries on a typed property against
+    the same queries on the nested case_properties.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('case_property')
+        parser.add_argument('value', help="Value to search for with an exact match")
+        parser.add_argument('--gte', help="Also run a range query with this lower bound")
+        parser.add_argument('--lte', help="Also run a range query with this upper bound")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, domain, case_property, value, gte, lte, repeat, **options):
+        property_type = get_typed_properties(domain).get(case_property)
+        if not property_type:
+            raise CommandError("{} is not a typed property in {}".format(case_property, domain))
+
+        def exact_query(type_):
+            return case_property_query(case_property, value, property_type=type_)
+
+        def range_query(type_):
+            return case_property_range_query(case_property, gte=gte, lte=lte, property_type=type_)
+
+        benchmarks = [('exact', exact_query)]
+        if gte or lte:
+            benchmarks.append(('range', range_query))
+
+        print("{:<8}{:<10}{:>10}{:>14}".format("query", "layout", "count", "median ms"))
+        for name, get_query in benchmarks:
+            for layout, type_ in [('nested', None), ('typed', property_type)]:
+                query = CaseSearchES().domain(domain).add_query(get_query(type_), queries.MUST).size(0)
+                count, took = self._run(query, repeat)
+                print("{:<8}{:<10}{:>10}{:>14}".format(name, layout, count, took))
+
+    def _run(self, query, repeat):
+        timings = []
+        count = None
+        for i in range(repeat):
+            result = query.run()
+            count = result.total
+            timings.append(result.raw['took'])
+        return count, median(timings)
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from corehq.apps.case_search.const import TYPED_EXACT, TYPED_PROPERTY_TYPES
+from corehq.apps.case_search.models import (
+    get_typed_properties,
+    get_typed_properties_from_data_dictionary,
+    set_typed_properties,
+)
+
+
+class Command(BaseCommand):
+    help = """
+    Sets the case properties that a domain indexes as typed fields in the case
+    search index, and reindexes the domain's cases. By default these are the
+    date, number and multiple choice properties in the data dictionary.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument(
+            '--property', dest='properties', action='append', default=[], metavar='NAME[:TYPE]',
+            help="Only index these properties. TYPE is one of {} and defaults to the "
+                 "property's type in the data dictionary".format(', '.join(TYPED_PROPERTY_TYPES)),
+        )
+        parser.add_argument('--clear', action='store_true', help="Stop indexing typed properties")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, domain, properties, clear, dry_run, **options):
+        if clear:
+            typed_properties = {}
+        elif properties:
+            typed_properties = self._parse_properties(domain, properties)
+        else:
+            typed_properties = get_typed_properties_from_data_dictionary(domain)
+
+        print("Current typed properties: {}".format(get_typed_properties(domain)))
+        print("New typed properties: {}".format(typed_properties))
+        if not dry_run:
+            set_typed_properties(domain, typed_properties)
+            print("Reindexing cases for {}".format(domain))
+
+    def _parse_properties(self, domain, properties):
+        dictionary_types = get_typed_properties_from_data_dictionary(domain)
+        typed_properties = {}
+        for prop in properties:
+            name, _, type_ = prop.partition(':')
+            type_ = type_ or dictionary_types.get(name, TYPED_EXACT)
+            if type_ not in TYPED_PROPERTY_TYPES:
+                raise CommandError("Unknown type for {}: {}".format(name, type_))
+            if '.' in name:
+                raise CommandError("Property names cannot contain '.': {}".format(name))
+            typed_properties[name] = type_
+        return typed_properties
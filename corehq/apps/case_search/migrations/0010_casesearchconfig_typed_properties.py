@@ -0,0 +1,17 @@
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('case_search', '0009_delete_casesearchqueryaddition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='casesearchconfig',
+            name='typed_properties',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,10 +1,19 @@
 import attr
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import ArrayField, JSONField
+from django.core.cache import cache
 from django.db import models
 from django.forms import model_to_dict
 from django.utils.translation import ugettext as _
 
+from corehq.apps.case_search.const import (
+    TYPED_DATE,
+    TYPED_EXACT,
+    TYPED_NUMERIC,
+    TYPED_PROPERTY_TYPES,
+)
 from corehq.apps.case_search.exceptions import CaseSearchUserError
+from corehq.toggles import CASE_SEARCH_TYPED_PROPERTIES
+from corehq.util.cache_utils import bump_cache_generation, get_cache_generation
 from corehq.util.quickcache import quickcache
 
 CLAIM_CASE_TYPE = 'commcare-case-claim'
@@ -18,6 +27,10 @@ CASE_SEARCH_CASE_TYPE_KEY = "case_type"
 CASE_SEARCH_REGISTRY_ID_KEY = 'x_commcare_data_registry'
 CASE_SEARCH_CUSTOM_RELATED_CASE_PROPERTY_KEY = 'x_commcare_custom_related_case_property'
 
+# Seconds before writes to the case search index are visible to searches.
+# This is the index's refresh_interval (see pillowtop.index_settings).
+CASE_SEARCH_REFRESH_INTERVAL = 5
+
 CONFIG_KEYS_MAPPING = {
     CASE_SEARCH_CASE_TYPE_KEY: "case_types",
     CASE_SEARCH_REGISTRY_ID_KEY: "data_registry",
@@ -158,6 +171,11 @@ class CaseSearchConfig(models.Model):
     enabled = models.BooleanField(blank=False, null=False, default=False)
     fuzzy_properties = models.ManyToManyField(FuzzyProperties)
     ignore_patterns = models.ManyToManyField(IgnorePatterns)
+    # {case property name: one of TYPED_PROPERTY_TYPES}. For domains with the
+    # CASE_SEARCH_TYPED_PROPERTIES toggle, these properties are also indexed
+    # as typed top-level fields, which are used instead of the nested
+    # case_properties when searching on them.
+    typed_properties = JSONField(default=dict, blank=True)
 
     objects = GetOrNoneManager()
 
@@ -187,7 +205,9 @@ class CaseSearchConfig(models.Model):
 
         config.ignore_patterns.all().delete()
         config.fuzzy_properties.all().delete()
+        config.typed_properties = json_def.get('typed_properties', {})
         config.save()
+        _get_typed_properties.clear(domain)
 
         ignore_patterns = []
         for ignore_pattern in json_def['ignore_patterns']:
@@ -252,6 +272,106 @@ def disable_case_search(domain):
     return config
 
 
+# data dictionary types that are worth indexing as typed properties
+DATA_DICTIONARY_TYPED_PROPERTIES = {
+    'date': TYPED_DATE,
+    'number': TYPED_NUMERIC,
+    'select': TYPED_EXACT,
+}
+
+
+def get_typed_properties(domain):
+    if domain and CASE_SEARCH_TYPED_PROPERTIES.enabled(domain):
+        return _get_typed_properties(domain)
+    return {}
+
+
+@quickcache(['domain'], timeout=24 * 60 * 60, memoize_timeout=60)
+def _get_typed_properties(domain):
+    config = CaseSearchConfig.objects.get_or_none(pk=domain)
+    return config.typed_properties if config else {}
+
+
+def get_common_typed_properties(domains):
+    """Typed properties with the same type in all of the domains"""
+    if domains is None or isinstance(domains, str):
+        return get_typed_properties(domains)
+    common = None
+    for domain in domains:
+        typed_properties = get_typed_properties(domain)
+        if common is None:
+            common = dict(typed_properties)
+        else:
+            common = {
+                name: type_ for name, type_ in common.items()
+                if typed_properties.get(name) == type_
+            }
+    return common or {}
+
+
+def get_typed_properties_from_data_dictionary(domain):
+    """Returns the properties in the domain's data dictionary that have
+    a searchable type, excluding any that have different types in
+    different case types
+    """
+    from corehq.apps.data_dictionary.models import CaseProperty
+    typed_properties = {}
+    conflicting = set()
+    properties = (CaseProperty.objects
+                  .filter(case_type__domain=domain, deprecated=False,
+                          data_type__in=list(DATA_DICTIONARY_TYPED_PROPERTIES))
+                  .values_list('name', 'data_type'))
+    for name, data_type in properties:
+        type_ = DATA_DICTIONARY_TYPED_PROPERTIES[data_type]
+        if typed_properties.setdefault(name, type_) != type_:
+            conflicting.add(name)
+    return {
+        name: type_ for name, type_ in typed_properties.items()
+        # ES doesn't allow dots in field names
+        if name not in conflicting and '.' not in name
+    }
+
+
+def set_typed_properties(domain, typed_properties):
+    """Sets the domain's typed properties and reindexes its cases so that
+    they are populated. Until the reindex finishes, searches on newly typed
+    properties only match cases that have been reindexed.
+    """
+    from corehq.apps.case_search.tasks import reindex_case_search_for_domain
+    assert set(typed_properties.values()) <= set(TYPED_PROPERTY_TYPES), typed_properties
+    assert not any('.' in name for name in typed_properties), typed_properties
+
+    config, created = CaseSearchConfig.objects.get_or_create(pk=domain)
+    if config.typed_properties != typed_properties:
+        config.typed_properties = typed_properties
+        config.save()
+        _get_typed_properties.clear(domain)
+        reindex_case_search_for_domain.delay(domain)
+    return config
+
+
+def get_case_search_generation(domain):
+    """Changes whenever cases in the domain are written to the case search index"""
+    return get_cache_generation('case-search.{}'.format(domain))
+
+
+def bump_case_search_generation(domain):
+    bump_cache_generation('case-search.{}'.format(domain))
+
+
+def bump_case_search_generation_after_write(domain):
+    """Bumps the generation now, and again once cases just written to the
+    case search index are visible to searches, so that results cached
+    before the index is refreshed are not reused
+    """
+    from corehq.apps.case_search.tasks import bump_case_search_generation_task
+    bump_case_search_generation(domain)
+    # Writes made while a bump is scheduled are visible by the time it runs
+    if cache.add('case-search-generation-bump.{}'.format(domain), True, CASE_SEARCH_REFRESH_INTERVAL):
+        bump_case_search_generation_task.apply_async(
+            args=[domain], countdown=2 * CASE_SEARCH_REFRESH_INTERVAL)
+
+
 def case_search_enabled_domains():
     """Returns a list of all domains that have case search enabled
     """
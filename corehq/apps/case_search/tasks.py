@@ -1,5 +1,6 @@
 from celery.task import task
 
+from corehq.apps.case_search.models import bump_case_search_generation
 from corehq.pillows.case_search import (
     CaseSearchReindexerFactory,
     delete_case_search_cases,
@@ -14,3 +15,8 @@ def reindex_case_search_for_domain(domain):
 @task
 def delete_case_search_cases_for_domain(domain):
     delete_case_search_cases(domain)
+
+
+@task
+def bump_case_search_generation_task(domain):
+    bump_case_search_generation(domain)
@@ -12,16 +12,20 @@ from corehq.apps.app_manager.models import (
     DetailColumn,
 )
 from corehq.apps.app_manager.tests.app_factory import AppFactory
-from corehq.apps.case_search.const import IS_RELATED_CASE
-from corehq.apps.case_search.models import CaseSearchConfig
+from corehq.apps.case_search.const import IS_RELATED_CASE, RELEVANCE_SCORE
+from corehq.apps.case_search.models import (
+    CaseSearchConfig,
+    bump_case_search_generation,
+)
 from corehq.apps.domain.shortcuts import create_user
 from corehq.apps.es.tests.utils import (
     case_search_es_setup,
     case_search_es_teardown,
     es_test,
 )
+from corehq.util.test_utils import flag_enabled
 
-from ..utils import get_case_search_results
+from ..utils import _get_search_hits, get_case_search_results
 
 
 @es_test
@@ -94,3 +98,24 @@ class TestCaseSearchEndpoint(TestCase):
             ("Jane", None),
             ("Villanueva", "true"),
         ])
+
+    @flag_enabled('CASE_SEARCH_RESULT_CACHE')
+    def test_cached_results(self):
+        criteria = {'family': 'Villanueva', 'name': uuid.uuid4().hex}
+
+        def _names_and_scores(cases):
+            return [(case.name, case.get_case_property(RELEVANCE_SCORE)) for case in cases]
+
+        with mock.patch('corehq.apps.case_search.utils._get_search_hits', wraps=_get_search_hits) as search:
+            res = get_case_search_results(self.domain, ['person'], {'family': 'Villanueva'})
+            cached_res = get_case_search_results(self.domain, ['person'], {'family': 'Villanueva'})
+            self.assertEqual(search.call_count, 1)
+            self.assertItemsEqual(["Jane", "Xiomara", "Alba"], [case.name for case in cached_res])
+            self.assertEqual(_names_and_scores(res), _names_and_scores(cached_res))
+
+            get_case_search_results(self.domain, ['person'], criteria)
+            self.assertEqual(search.call_count, 2)
+
+            bump_case_search_generation(self.domain)
+            get_case_search_results(self.domain, ['person'], {'family': 'Villanueva'})
+            self.assertEqual(search.call_count, 3)
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import SimpleTestCase, TestCase
 
 from corehq.util.es.elasticsearch import ConnectionError
@@ -12,7 +14,7 @@ from corehq.apps.case_search.filter_dsl import (
 )
 from corehq.apps.es import CaseSearchES
 from corehq.apps.es.tests.utils import ElasticTestMixin, es_test
-from corehq.elastic import get_es_new, send_to_elasticsearch
+from corehq.elastic import get_es_new, run_multi_query, send_to_elasticsearch
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
 from corehq.pillows.case_search import transform_case_for_elasticsearch
 from corehq.pillows.mappings.case_search_mapping import CASE_SEARCH_INDEX_INFO
@@ -499,3 +501,15 @@ class TestFilterDslLookups(ElasticTestMixin, TestCase):
         built_filter = build_filter_from_ast(self.domain, parsed)
         self.checkQuery(expected_filter, built_filter, is_raw_query=True)
         self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
+
+    def test_related_case_lookups_are_batched(self):
+        parsed = parse_xpath(
+            "father/mother/house = 'Tyrell' and father/house = 'Tyrell' "
+            "and (father/name = 'Mace' or father/name = 'Renly')"
+        )
+        with patch('corehq.apps.case_search.filter_dsl.run_multi_query', wraps=run_multi_query) as run:
+            built_filter = build_filter_from_ast(self.domain, parsed)
+        # the property lookups, including the shared `house = "Tyrell"`, then the `mother` lookup
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual([len(call[0][1]) for call in run.call_args_list], [3, 1])
+        self.assertEqual([self.child_case_id], CaseSearchES().filter(built_filter).values_list('_id', flat=True))
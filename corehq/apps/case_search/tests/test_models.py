@@ -1,4 +1,4 @@
-from unittest.mock import call, patch
+from unittest.mock import Mock, call, patch
 
 from django.test import TestCase
 from django.utils.datastructures import MultiValueDict
@@ -10,6 +10,7 @@ from corehq.apps.case_search.models import (
     CASE_SEARCH_CUSTOM_RELATED_CASE_PROPERTY_KEY,
     CASE_SEARCH_REGISTRY_ID_KEY,
     CaseSearchRequestConfig,
+    bump_case_search_generation_after_write,
     disable_case_search,
     enable_case_search,
     extract_search_request_config,
@@ -90,3 +91,16 @@ def _make_request_dict(params):
         else:
             request_dict[key] = value
     return request_dict
+
+
+@patch('corehq.apps.case_search.tasks.bump_case_search_generation_task.apply_async')
+@patch('corehq.apps.case_search.models.bump_case_search_generation')
+def test_bump_case_search_generation_after_write(bump, apply_async):
+    cache = Mock()
+    cache.add.side_effect = [True, False]
+    with patch('corehq.apps.case_search.models.cache', cache):
+        bump_case_search_generation_after_write('meereen')
+        bump_case_search_generation_after_write('meereen')
+    # bumped for each write, and once more after the index is refreshed
+    eq(bump.call_args_list, [call('meereen'), call('meereen')])
+    apply_async.assert_called_once_with(args=['meereen'], countdown=10)
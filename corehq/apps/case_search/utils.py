@@ -1,6 +1,9 @@
+import hashlib
+import json
 import re
 from collections import defaultdict
 
+from django.core.cache import cache
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext as _
 
@@ -25,6 +28,8 @@ from corehq.apps.case_search.models import (
     UNSEARCHABLE_KEYS,
     CaseSearchConfig,
     extract_search_request_config,
+    get_case_search_generation,
+    get_common_typed_properties,
 )
 from corehq.apps.es import case_search, filters, queries
 from corehq.apps.es.case_search import (
@@ -39,6 +44,13 @@ from corehq.apps.registry.exceptions import (
     RegistryNotFound,
 )
 from corehq.apps.registry.helper import DataRegistryHelper
+from corehq.toggles import CASE_SEARCH_RESULT_CACHE
+from corehq.util.metrics import metrics_counter
+
+# Long enough to cover paging through results and repeated default searches.
+# The cache is also invalidated when the domain's cases change, but that can
+# happen just before ES makes the changes searchable.
+RESULT_CACHE_TIMEOUT = 60
 
 
 def get_case_search_results_from_request(domain, app_id, couch_user, request_dict):
@@ -64,6 +76,18 @@ def get_case_search_results(domain, case_types, criteria,
         helper = _QueryHelper(domain)
 
     case_search_criteria = CaseSearchCriteria(domain, case_types, criteria, query_domains)
+    if CASE_SEARCH_RESULT_CACHE.enabled(domain):
+        hits = _get_cached_search_hits(case_search_criteria)
+    else:
+        hits = _get_search_hits(case_search_criteria)
+
+    cases = [helper.wrap_case(hit, include_score=True) for hit in hits]
+    if app_id:
+        cases.extend(get_related_cases(helper, app_id, case_types, cases, custom_related_case_property))
+    return cases
+
+
+def _get_search_hits(case_search_criteria):
     try:
         search_es = case_search_criteria.search_es
     except TooManyRelatedCasesError:
@@ -76,17 +100,61 @@ def get_case_search_results(domain, case_types, criteria,
         raise CaseSearchUserError(str(e))
 
     try:
-        hits = search_es.run().raw_hits
+        return search_es.run().raw_hits
     except Exception as e:
         notify_exception(None, str(e), details=dict(
             exception_type=type(e),
         ))
         raise
 
-    cases = [helper.wrap_case(hit, include_score=True) for hit in hits]
-    if app_id:
-        cases.extend(get_related_cases(helper, app_id, case_types, cases, custom_related_case_property))
-    return cases
+
+def _get_cached_search_hits(case_search_criteria):
+    """Like `_get_search_hits`, but caches the ids and scores of the hits
+
+    On a cache hit, the cases are fetched from ES by id rather than
+    searching again.
+    """
+    cache_key = _get_result_cache_key(case_search_criteria)
+    cached_hits = cache.get(cache_key)
+    tags = {'domain': case_search_criteria.request_domain}
+    if cached_hits is not None:
+        metrics_counter('commcare.case_search.result_cache', tags={**tags, 'result': 'hit'})
+        return _get_hits_by_id(case_search_criteria.query_domains, cached_hits)
+
+    metrics_counter('commcare.case_search.result_cache', tags={**tags, 'result': 'miss'})
+    hits = _get_search_hits(case_search_criteria)
+    cache.set(cache_key, [(hit['_id'], hit['_score']) for hit in hits], RESULT_CACHE_TIMEOUT)
+    return hits
+
+
+def _get_result_cache_key(case_search_criteria):
+    query_domains = sorted(case_search_criteria.query_domains)
+    key = json.dumps({
+        'domain': case_search_criteria.request_domain,
+        'query_domains': query_domains,
+        'case_types': sorted(case_search_criteria.case_types),
+        'criteria': {
+            key: sorted(value) if isinstance(value, list) else value
+            for key, value in case_search_criteria.criteria.items()
+        },
+        'generations': [get_case_search_generation(domain) for domain in query_domains],
+    }, sort_keys=True)
+    return 'case-search-results.{}'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+
+def _get_hits_by_id(query_domains, ids_and_scores):
+    if not ids_and_scores:
+        return []
+    case_ids = [case_id for case_id, score in ids_and_scores]
+    hits_by_id = {
+        hit['_id']: hit for hit in
+        CaseSearchES().domain(query_domains).case_ids(case_ids).size(len(case_ids)).run().raw_hits
+    }
+    hits = []
+    for case_id, score in ids_and_scores:
+        if case_id in hits_by_id:
+            hits.append({**hits_by_id[case_id], '_score': score})
+    return hits
 
 
 def _get_registry_visible_domains(couch_user, domain, case_types, registry_slug):
@@ -211,7 +279,9 @@ class CaseSearchCriteria:
         if not match:
             raise CaseFilterError(_('Invalid date range format, {}'), key)
         startdate, enddate = value.split('__')[2:]
-        return case_property_range_query(key, gte=startdate, lte=enddate)
+        return case_property_range_query(
+            key, gte=startdate, lte=enddate, property_type=self._typed_properties.get(key)
+        )
 
     def _get_case_property_query(self, key, value):
         if isinstance(value, list) and '' in value:
@@ -220,11 +290,11 @@ class CaseSearchCriteria:
                 if '/' in key:
                     missing_filter = build_filter_from_xpath(self.query_domains, f'{key} = ""')
                 else:
-                    missing_filter = case_property_missing(key)
+                    missing_filter = case_property_missing(key, self._typed_properties.get(key))
                 value = value[0] if len(value) == 1 else value
                 return filters.OR(self._get_query(key, value), missing_filter)
             else:
-                return case_property_missing(key)
+                return case_property_missing(key, self._typed_properties.get(key))
         else:
             return self._get_query(key, value)
 
@@ -239,7 +309,7 @@ class CaseSearchCriteria:
             query = f'{key} = "{value}"'
             return build_filter_from_xpath(self.query_domains, query, fuzzy=fuzzy)
         else:
-            return case_property_query(key, value, fuzzy=fuzzy)
+            return case_property_query(key, value, fuzzy=fuzzy, property_type=self._typed_properties.get(key))
 
     def _remove_ignored_patterns(self, case_property, value):
         for to_remove in self._patterns_to_remove[case_property]:
@@ -249,6 +319,10 @@ class CaseSearchCriteria:
                 value = re.sub(to_remove, '', value)
         return value
 
+    @cached_property
+    def _typed_properties(self):
+        return get_common_typed_properties(self.query_domains)
+
     @cached_property
     def _patterns_to_remove(self):
         patterns_by_property = defaultdict(list)
@@ -23,6 +23,10 @@ from corehq.apps.case_search.const import (
     RELEVANCE_SCORE,
     SPECIAL_CASE_PROPERTIES,
     SYSTEM_PROPERTIES,
+    TYPED_DATE,
+    TYPED_EXACT,
+    TYPED_NUMERIC,
+    TYPED_PROPERTIES_PATH,
     VALUE,
 )
 from corehq.apps.es.cases import CaseES, owner
@@ -42,7 +46,8 @@ class CaseSearchES(CaseES):
             indexed_on,
         ] + super(CaseSearchES, self).builtin_filters
 
-    def case_property_query(self, case_property_name, value, clause=queries.MUST, fuzzy=False):
+    def case_property_query(self, case_property_name, value, clause=queries.MUST, fuzzy=False,
+                            property_type=None):
         """
         Search for all cases where case property with name `case_property_name`` has text value `value`
 
@@ -56,7 +61,7 @@ class CaseSearchES(CaseES):
         Can be chained with regular filters . Running a set_query after this will destroy it.
         Clauses can be any of SHOULD, MUST, or MUST_NOT
         """
-        return self.add_query(case_property_query(case_property_name, value, fuzzy), clause)
+        return self.add_query(case_property_query(case_property_name, value, fuzzy, property_type), clause)
 
     def regexp_case_property_query(self, case_property_name, regex, clause=queries.MUST):
         """
@@ -70,12 +75,13 @@ class CaseSearchES(CaseES):
         )
 
     def numeric_range_case_property_query(self, case_property_name, gt=None,
-                                          gte=None, lt=None, lte=None, clause=queries.MUST):
+                                          gte=None, lt=None, lte=None, clause=queries.MUST,
+                                          property_type=None):
         """
         Search for all cases where case property `case_property_name` fulfills the range criteria.
         """
         return self.add_query(
-            case_property_range_query(case_property_name, gt, gte, lt, lte),
+            case_property_range_query(case_property_name, gt, gte, lt, lte, property_type),
             clause
         )
 
@@ -137,14 +143,17 @@ def case_property_filter(case_property_name, value):
     )
 
 
-def case_property_query(case_property_name, value, fuzzy=False):
+def case_property_query(case_property_name, value, fuzzy=False, property_type=None):
     """
     Search for all cases where case property with name `case_property_name`` has text value `value`
+
+    `property_type` is the property's type if the domain indexes it as a
+    typed property (see ``CaseSearchConfig.typed_properties``)
     """
     if value is None:
         raise TypeError("You cannot pass 'None' as a case property value")
     if value == '':
-        return case_property_missing(case_property_name)
+        return case_property_missing(case_property_name, property_type)
     if fuzzy:
         return filters.OR(
             # fuzzy match
@@ -152,16 +161,22 @@ def case_property_query(case_property_name, value, fuzzy=False):
             # non-fuzzy match. added to improve the score of exact matches
             case_property_text_query(case_property_name, value),
         )
-    return exact_case_property_text_query(case_property_name, value)
+    return exact_case_property_text_query(case_property_name, value, property_type)
+
+
+def typed_property_field(case_property_name, property_type):
+    return '{}.{}.{}'.format(TYPED_PROPERTIES_PATH, case_property_name, property_type)
 
 
-def exact_case_property_text_query(case_property_name, value):
+def exact_case_property_text_query(case_property_name, value, property_type=None):
     """Filter by case property.
 
     This performs an exact match on the value in the case property, including
     letter casing and punctuation.
 
     """
+    if property_type:
+        return filters.term(typed_property_field(case_property_name, TYPED_EXACT), value)
     return queries.nested(
         CASE_PROPERTIES_PATH,
         queries.filtered(
@@ -188,7 +203,7 @@ def case_property_text_query(case_property_name, value, fuzziness='0'):
     )
 
 
-def case_property_range_query(case_property_name, gt=None, gte=None, lt=None, lte=None):
+def case_property_range_query(case_property_name, gt=None, gte=None, lt=None, lte=None, property_type=None):
     """Returns cases where case property `key` fall into the range provided.
 
     """
@@ -197,6 +212,8 @@ def case_property_range_query(case_property_name, gt=None, gte=None, lt=None, lt
     try:
         # numeric range
         kwargs = {key: float(value) for key, value in kwargs.items() if value is not None}
+        if property_type == TYPED_NUMERIC:
+            return queries.range_query(typed_property_field(case_property_name, TYPED_NUMERIC), **kwargs)
         return _base_property_query(
             case_property_name,
             queries.range_query("{}.{}.numeric".format(CASE_PROPERTIES_PATH, VALUE), **kwargs)
@@ -213,6 +230,8 @@ def case_property_range_query(case_property_name, gt=None, gte=None, lt=None, lt
     if not kwargs:
         raise TypeError()       # Neither a date nor number was passed in
 
+    if property_type == TYPED_DATE:
+        return queries.date_range(typed_property_field(case_property_name, TYPED_DATE), **kwargs)
     return _base_property_query(
         case_property_name,
         queries.date_range("{}.{}.date".format(CASE_PROPERTIES_PATH, VALUE), **kwargs)
@@ -246,10 +265,13 @@ def reverse_index_case_query(case_ids, identifier=None):
     )
 
 
-def case_property_missing(case_property_name):
+def case_property_missing(case_property_name, property_type=None):
     """case_property_name isn't set or is the empty string
 
     """
+    if property_type:
+        field = typed_property_field(case_property_name, TYPED_EXACT)
+        return filters.OR(filters.missing(field), filters.term(field, ''))
     return filters.OR(
         filters.NOT(
             queries.nested(
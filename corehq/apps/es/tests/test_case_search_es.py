@@ -21,6 +21,7 @@ from corehq.apps.case_search.models import (
     CaseSearchConfig,
     FuzzyProperties,
     IgnorePatterns,
+    _get_typed_properties,
 )
 from corehq.apps.case_search.utils import (
     CaseSearchCriteria,
@@ -40,13 +41,17 @@ from corehq.apps.es.case_search import (
 from corehq.apps.es.tests.utils import ElasticTestMixin, es_test
 from corehq.elastic import SIZE_LIMIT, get_es_new
 from corehq.form_processor.tests.utils import FormProcessorTestUtils
-from corehq.pillows.case_search import CaseSearchReindexerFactory
+from corehq.pillows.case_search import (
+    BulkCaseSearchPillowProcessor,
+    CaseSearchReindexerFactory,
+    transform_case_for_elasticsearch,
+)
 from corehq.pillows.mappings.case_search_mapping import (
     CASE_SEARCH_INDEX,
     CASE_SEARCH_INDEX_INFO,
 )
 from corehq.util.elastic import ensure_index_deleted
-from corehq.util.test_utils import create_and_save_a_case
+from corehq.util.test_utils import create_and_save_a_case, flag_enabled
 
 
 @es_test
@@ -264,6 +269,34 @@ class TestCaseSearchES(ElasticTestMixin, SimpleTestCase):
         self.checkQuery(query, expected, validate_query=False)
 
 
+class TestTransformCaseForElasticsearch(SimpleTestCase):
+
+    @patch('corehq.pillows.case_search.get_typed_properties')
+    def test_typed_properties(self, get_typed_properties):
+        get_typed_properties.return_value = {
+            'num': 'numeric',
+            'status': 'exact',
+            'missing': 'exact',
+            'name': 'exact',
+            'date_opened': 'date',
+            'closed_on': 'date',
+        }
+        doc = transform_case_for_elasticsearch({
+            '_id': 'c1',
+            'domain': 'test-domain',
+            'name': 'Arya',
+            'opened_on': '2020-03-01T12:00:00.000000Z',
+            'closed_on': None,
+            'case_json': {'num': 3, 'status': '', 'name': 'not the name'},
+        })
+        self.assertEqual(doc['typed_properties'], {
+            'num': {'exact': '3', 'numeric': '3'},
+            'status': {'exact': ''},
+            'name': {'exact': 'Arya'},
+            'date_opened': {'exact': '2020-03-01T12:00:00.000000Z', 'date': '2020-03-01T12:00:00.000000Z'},
+        })
+
+
 @es_test
 class TestCaseSearchLookups(TestCase):
 
@@ -472,6 +505,54 @@ class TestCaseSearchLookups(TestCase):
             ['c2', 'c3']
         )
 
+    def test_reindex_in_bulk(self):
+        process_changes_chunk = BulkCaseSearchPillowProcessor.process_changes_chunk
+        with patch.object(BulkCaseSearchPillowProcessor, 'process_changes_chunk', autospec=True,
+                          side_effect=process_changes_chunk) as process_chunk, \
+                patch.object(BulkCaseSearchPillowProcessor, 'process_change') as process_change:
+            self._bootstrap_cases_in_es_for_domain(self.domain, [
+                {'_id': 'c1', 'foo': 'redbeard'},
+                {'_id': 'c2', 'foo': 'blackbeard'},
+            ])
+
+        # The chunk was processed in bulk, without falling back to
+        # processing changes one at a time
+        process_chunk.assert_called_once()
+        process_change.assert_not_called()
+        self.assertItemsEqual(CaseSearchES().domain(self.domain).get_ids(), ['c1', 'c2'])
+
+    @flag_enabled('CASE_SEARCH_TYPED_PROPERTIES')
+    def test_typed_properties(self):
+        config = self._create_case_search_config()
+        config.typed_properties = {'num': 'numeric', 'dob': 'date', 'status': 'exact'}
+        config.save()
+        _get_typed_properties.clear(self.domain)
+        self.addCleanup(_get_typed_properties.clear, self.domain)
+
+        self._bootstrap_cases_in_es_for_domain(self.domain, [
+            {'_id': 'c1', 'num': '1', 'dob': date(2020, 3, 1), 'status': 'active'},
+            {'_id': 'c2', 'num': '2', 'dob': date(2020, 3, 2), 'status': 'active'},
+            {'_id': 'c3', 'num': '3', 'dob': date(2020, 3, 3), 'status': ''},
+            {'_id': 'c4', 'num': 'four', 'dob': 'unknown'},
+        ])
+        for xpath, expected in [
+            ("num >= 2", ['c2', 'c3']),
+            ("dob <= '2020-03-02'", ['c1', 'c2']),
+            ("status = 'active' and num < 2", ['c1']),
+            ("status = ''", ['c3', 'c4']),
+            ("num = 'four'", ['c4']),
+        ]:
+            query = CaseSearchES().domain(self.domain).xpath_query(self.domain, xpath)
+            self.assertIn('typed_properties.', query.dumps())
+            self.assertItemsEqual(query.get_ids(), expected, xpath)
+
+        criteria = CaseSearchCriteria(self.domain, [self.case_type], {
+            'dob': '__range__2020-03-02__2020-03-03',
+            'status': ['active', ''],
+        })
+        self.assertNotIn('"case_properties"', criteria.search_es.dumps())
+        self.assertItemsEqual(criteria.search_es.get_ids(), ['c2', 'c3'])
+
     def test_get_related_case_relationships(self):
         app = Application.new_app(self.domain, "Case Search App")
         module = app.add_module(Module.new_module("Search Module", "en"))
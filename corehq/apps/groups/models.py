@@ -30,6 +30,7 @@ from corehq.apps.groups.dbaccessors import (
 from corehq.apps.groups.exceptions import CantSaveException
 from corehq.apps.locations.models import SQLLocation
 from corehq.apps.users.models import CommCareUser, CouchUser
+from corehq.util.cache_utils import bump_cache_generation, get_cache_generation
 from corehq.util.quickcache import quickcache
 
 dt_no_Z_re = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{6})?$')
@@ -95,6 +96,7 @@ class Group(QuickCachedDocumentMixin, UndoableDocument):
         super(Group, self).clear_caches()
         self.by_domain.clear(self.__class__, self.domain)
         self.ids_by_domain.clear(self.__class__, self.domain)
+        bump_group_version(self.domain)
 
     def add_user(self, couch_user_id, save=True):
         user_added = False
@@ -293,3 +295,15 @@ class DeleteGroupRecord(DeleteDocRecord):
 
     def get_doc(self):
         return Group.get(self.doc_id)
+
+
+def get_group_version(domain):
+    """
+    Opaque token that changes whenever a group in the domain is saved or
+    deleted. Use it to key caches of group membership derived data.
+    """
+    return get_cache_generation('group-version-{}'.format(domain))
+
+
+def bump_group_version(domain):
+    bump_cache_generation('group-version-{}'.format(domain))
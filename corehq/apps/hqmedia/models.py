@@ -157,6 +157,12 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
                 content_type=self.get_mime_type(data, filename=original_filename),
                 domain=SHARED_DOMAIN,
             )
+        self.add_aux_media(attachment_id, original_filename=original_filename, username=username,
+                           media_meta=media_meta)
+        self.save()
+        return True
+
+    def add_aux_media(self, attachment_id, original_filename=None, username=None, media_meta=None):
         new_media = AuxMedia()
         new_media.uploaded_date = datetime.utcnow()
         new_media.attachment_id = attachment_id
@@ -166,10 +172,15 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
         if media_meta:
             new_media.media_meta = media_meta
         self.aux_media.append(new_media)
-        self.save()
-        return True
 
-    def add_domain(self, domain, owner=None, **kwargs):
+    @classmethod
+    def get_attachment_id_and_meta(cls, data, file_hash):
+        """
+        Returns the name of the attachment the data is stored in and its media_meta
+        """
+        return file_hash, {}
+
+    def add_domain(self, domain, owner=None, should_save=True, **kwargs):
         if len(self.owners) == 0:
             # this is intended to simulate migration--if it happens that a media file somehow gets no more owners
             # (which should be impossible) it will transfer ownership to all copiers... not necessarily a bad thing,
@@ -193,7 +204,8 @@ class CommCareMultimedia(BlobMixin, SafeSaveDocument):
 
         if domain not in self.valid_domains:
             self.valid_domains.append(domain)
-        self.save()
+        if should_save:
+            self.save()
 
     def get_display_file(self, return_type=True):
         if self.attachment_id:
@@ -347,18 +359,26 @@ class CommCareImage(CommCareMultimedia):
         search_view = 'hqmedia/image_search'
 
     def attach_data(self, data, original_filename=None, username=None, attachment_id=None, media_meta=None):
-        image = self.get_image_object(data)
-        attachment_id = "%dx%d" % image.size
-        attachment_id = "%s-%s.%s" % (self.file_hash, attachment_id, image.format)
+        attachment_id, image_meta = self.get_attachment_id_and_meta(data, self.file_hash)
         if not media_meta:
             media_meta = {}
-        media_meta["size"] = {
-            "width": image.size[0],
-            "height": image.size[1]
-        }
+        media_meta.update(image_meta)
         return super(CommCareImage, self).attach_data(data, original_filename=original_filename, username=username,
                                                       attachment_id=attachment_id, media_meta=media_meta)
 
+    @classmethod
+    def get_attachment_id_and_meta(cls, data, file_hash):
+        image = cls.get_image_object(data)
+        attachment_id = "%dx%d" % image.size
+        attachment_id = "%s-%s.%s" % (file_hash, attachment_id, image.format)
+        media_meta = {
+            "size": {
+                "width": image.size[0],
+                "height": image.size[1]
+            }
+        }
+        return attachment_id, media_meta
+
     def get_media_info(self, path, is_updated=False, original_path=None):
         info = super(CommCareImage, self).get_media_info(path, is_updated=is_updated, original_path=original_path)
         info['image_size'] = self.image_size_display()
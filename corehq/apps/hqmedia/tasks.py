@@ -1,9 +1,15 @@
+import hashlib
 import itertools
 import json
 import os
 import re
+import shutil
 import tempfile
+import time
 import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from wsgiref.util import FileWrapper
 
 from django.conf import settings
@@ -11,20 +17,40 @@ from django.utils.translation import ugettext as _
 
 from celery.task import task
 from celery.utils.log import get_task_logger
+from couchdbkit import BulkSaveError
 
+from dimagi.utils.chunked import chunked
+from dimagi.utils.couch import CriticalSection
 from dimagi.utils.logging import notify_exception
 from soil import DownloadBase
 from soil.util import expose_cached_download, expose_file_download
 
 from corehq import toggles
 from corehq.apps.app_manager.dbaccessors import get_app
+from corehq.apps.domain import SHARED_DOMAIN
 from corehq.apps.hqmedia.cache import BulkMultimediaStatusCache
+from corehq.apps.hqmedia.exceptions import BadMediaFileException
 from corehq.apps.hqmedia.models import CommCareMultimedia
+from corehq.blobs import CODES, NotFound, get_blob_db
 from corehq.util.files import file_extention_from_filename
+from corehq.util.metrics import metrics_counter
 
 logging = get_task_logger(__name__)
 
 MULTIMEDIA_EXTENSIONS = ('.mp3', '.wav', '.jpg', '.png', '.gif', '.3gp', '.mp4', '.zip', )
+MEDIA_SUITE_PATTERN = r'\bmedia_suite.xml\b'
+
+# files in a bulk multimedia upload are processed in batches of this size
+BULK_UPLOAD_BATCH_SIZE = 100
+# number of uploaded files hashed and written to the blob db concurrently
+BULK_UPLOAD_WORKERS = 8
+
+# number of multimedia files downloaded concurrently while writing a CCZ
+MEDIA_PREFETCH_WORKERS = 8
+
+CCZ_CACHE_BUCKET = 'ccz'
+CCZ_CACHE_TIMEOUT = 7 * 24 * 60  # minutes
+CCZ_BUILD_LOCK_TIMEOUT = 30 * 60  # seconds
 
 
 @task(serializer='pickle')
@@ -51,73 +77,237 @@ def process_bulk_upload_zip(processing_id, domain, app_id, username=None, share_
 
     zipped_files = uploaded_zip.namelist()
     status.total_files = len(zipped_files)
-    checked_paths = []
+    num_processed = 0
 
     try:
-        save_app = False
-        for index, path in enumerate(zipped_files):
-            status.update_progress(len(checked_paths))
-            checked_paths.append(path)
-            file_name = os.path.basename(path)
-            try:
-                data = uploaded_zip.read(path)
-            except Exception as e:
-                status.add_unmatched_path(path, _("Error reading file: %s" % e))
-                continue
+        with ThreadPoolExecutor(max_workers=BULK_UPLOAD_WORKERS) as executor:
+            upload = BulkMediaUpload(app, status, executor, username=username, share_media=share_media,
+                                     license_name=license_name, author=author,
+                                     attribution_notes=attribution_notes)
+            for paths in chunked(zipped_files, BULK_UPLOAD_BATCH_SIZE, list):
+                status.update_progress(num_processed)
+                upload.process_files(uploaded_zip, paths)
+                num_processed += len(paths)
+
+        if upload.save_app:
+            app.save()
+        status.update_progress(num_processed)
+    except Exception as e:
+        status.mark_with_error(_("Error while processing zip: %s" % e))
+    uploaded_zip.close()
 
-            media_class = CommCareMultimedia.get_class_by_data(data, filename=path)
-            if not media_class:
-                status.add_skipped_path(path, CommCareMultimedia.get_mime_type(data))
-                continue
+    status.complete = True
+    status.save()
 
-            app_paths = list(app.get_all_paths_of_type(media_class.__name__))
-            app_paths_lower = [p.lower() for p in app_paths]
-            form_path = media_class.get_form_path(path, lowercase=True)
 
-            if not form_path in app_paths_lower:
-                status.add_unmatched_path(path,
-                                          _("Did not match any %s paths in application." % media_class.get_nice_name()))
-                continue
+MediaUpload = namedtuple('MediaUpload', [
+    'path',
+    'media_class',
+    'file_hash',
+    'attachment_id',
+    'media_meta',
+    'content_type',
+    'data',
+])
 
-            index_of_path = app_paths_lower.index(form_path)
-            form_path = app_paths[index_of_path]  # this is the correct capitalization as specified in the form
 
-            multimedia = media_class.get_by_data(data)
-            if not multimedia:
-                status.add_unmatched_path(path,
-                                          _("Matching path found, but could not save the data to couch."))
-                continue
+class BulkMediaUpload(object):
+    """Matches the files of a bulk upload to the app's multimedia paths and
+    saves them a batch at a time
+
+    Files are identified and hashed, and new blobs are written, in worker
+    threads. Existing multimedia is looked up with one query per batch and
+    the multimedia docs are saved with one bulk save per batch.
+    """
 
-            is_new = form_path not in app.multimedia_map
-            is_updated = multimedia.attach_data(data,
-                                                original_filename=file_name,
-                                                username=username)
+    def __init__(self, app, status, executor, username=None, share_media=False,
+                 license_name=None, author=None, attribution_notes=None):
+        self.app = app
+        self.status = status
+        self.executor = executor
+        self.username = username
+        self.share_media = share_media
+        self.license_name = license_name
+        self.author = author
+        self.attribution_notes = attribution_notes
+        self.save_app = False
+        self._app_paths = {}
+        self._multimedia_by_hash = {}
+
+    def process_files(self, uploaded_zip, paths):
+        files = []
+        for path in paths:
+            try:
+                files.append((path, uploaded_zip.read(path)))
+            except Exception as e:
+                self.status.add_unmatched_path(path, _("Error reading file: %s" % e))
 
-            if not is_updated and not getattr(multimedia, '_id'):
-                status.add_unmatched_path(form_path,
-                                          _("Matching path found, but didn't save new multimedia correctly."))
+        matched = []
+        futures = [(path, self.executor.submit(_inspect_media_file, path, data)) for path, data in files]
+        for path, future in futures:
+            try:
+                upload, mime_type = future.result()
+            except BadMediaFileException as e:
+                self.status.add_unmatched_path(path, str(e))
                 continue
 
-            if is_updated or is_new:
-                multimedia.add_domain(domain, owner=True)
-                if share_media:
-                    multimedia.update_or_add_license(domain, type=license_name, author=author,
-                                                     attribution_notes=attribution_notes)
-                save_app = True
-                app.create_mapping(multimedia, form_path, save=False)
+            if not upload:
+                self.status.add_skipped_path(path, mime_type)
+                continue
 
-            media_info = multimedia.get_media_info(form_path, is_updated=is_updated, original_path=path)
-            status.add_matched_path(media_class, media_info)
+            form_path = self._get_app_path(upload.media_class, path)
+            if not form_path:
+                self.status.add_unmatched_path(path,
+                                               _("Did not match any %s paths in application."
+                                                 % upload.media_class.get_nice_name()))
+                continue
+            matched.append((upload, form_path))
+
+        if matched:
+            self._save_uploads(matched)
+
+    def _get_app_path(self, media_class, path):
+        """Returns the path in the app matching the uploaded path, with the
+        capitalization as specified in the form
+        """
+        if media_class not in self._app_paths:
+            self._app_paths[media_class] = {
+                app_path.lower(): app_path
+                for app_path in self.app.get_all_paths_of_type(media_class.__name__)
+            }
+        return self._app_paths[media_class].get(media_class.get_form_path(path, lowercase=True))
+
+    def _save_uploads(self, matched):
+        self._load_multimedia({upload.file_hash: upload.media_class for upload, form_path in matched})
+
+        blobs_to_put = {}
+        for upload, form_path in matched:
+            multimedia = self._multimedia_by_hash[upload.file_hash]
+            if upload.attachment_id not in multimedia.blobs:
+                blobs_to_put[upload.file_hash] = (multimedia, upload)
+        for future in [self.executor.submit(_put_media_blob, *args) for args in blobs_to_put.values()]:
+            future.result()
+
+        for upload, form_path in matched:
+            self._update_multimedia(self._multimedia_by_hash[upload.file_hash], upload)
+        failed_hashes = self._bulk_save({upload.file_hash for upload, form_path in matched})
+        for file_hash in failed_hashes & set(blobs_to_put):
+            # the multimedia will be saved again from the doc in the db,
+            # which doesn't refer to the blob written above
+            _delete_media_blob(*blobs_to_put[file_hash])
+
+        for upload, form_path in matched:
+            if upload.file_hash in failed_hashes:
+                multimedia = self._save_upload_individually(upload)
+            else:
+                multimedia = self._multimedia_by_hash[upload.file_hash]
+            self.app.create_mapping(multimedia, form_path, save=False)
+            media_info = multimedia.get_media_info(form_path, is_updated=True, original_path=upload.path)
+            self.status.add_matched_path(upload.media_class, media_info)
+        self.save_app = True
+
+    def _load_multimedia(self, media_classes_by_hash):
+        """Looks up the multimedia for the given file hashes in a single query,
+        creating new multimedia for files that haven't been uploaded before
+        """
+        file_hashes = [file_hash for file_hash in media_classes_by_hash
+                       if file_hash not in self._multimedia_by_hash]
+        if not file_hashes:
+            return
+        results = CommCareMultimedia.get_db().view(
+            'hqmedia/by_hash',
+            keys=file_hashes,
+            include_docs=True,
+        )
+        for result in results:
+            file_hash = result['key']
+            if file_hash not in self._multimedia_by_hash:
+                media_class = media_classes_by_hash[file_hash]
+                self._multimedia_by_hash[file_hash] = media_class.wrap(result['doc'])
+        for file_hash in file_hashes:
+            if file_hash not in self._multimedia_by_hash:
+                multimedia = media_classes_by_hash[file_hash]()
+                multimedia.file_hash = file_hash
+                self._multimedia_by_hash[file_hash] = multimedia
+
+    def _update_multimedia(self, multimedia, upload):
+        multimedia.last_modified = datetime.utcnow()
+        multimedia.add_aux_media(upload.attachment_id, original_filename=os.path.basename(upload.path),
+                                 username=self.username, media_meta=upload.media_meta)
+        multimedia.add_domain(self.app.domain, owner=True, should_save=False)
+        if self.share_media:
+            multimedia.update_or_add_license(self.app.domain, type=self.license_name, author=self.author,
+                                             attribution_notes=self.attribution_notes, should_save=False)
+
+    def _bulk_save(self, file_hashes):
+        """Saves the multimedia for the given file hashes, returning the hashes
+        of multimedia that could not be saved
+        """
+        docs = [self._multimedia_by_hash[file_hash] for file_hash in file_hashes]
+        try:
+            CommCareMultimedia.get_db().bulk_save(docs)
+        except BulkSaveError as e:
+            failed_ids = {error['id'] for error in e.errors}
+        else:
+            return set()
+
+        failed_hashes = set()
+        for doc in docs:
+            if doc._id in failed_ids:
+                failed_hashes.add(doc.file_hash)
+                # fetch it again when it is next needed
+                del self._multimedia_by_hash[doc.file_hash]
+        return failed_hashes
+
+    def _save_upload_individually(self, upload):
+        """Saves an upload the way single file uploads are saved, for multimedia
+        that was changed while the batch was being processed
+        """
+        multimedia = upload.media_class.get_by_hash(upload.file_hash)
+        multimedia.attach_data(upload.data, original_filename=os.path.basename(upload.path),
+                               username=self.username)
+        multimedia.add_domain(self.app.domain, owner=True)
+        if self.share_media:
+            multimedia.update_or_add_license(self.app.domain, type=self.license_name, author=self.author,
+                                             attribution_notes=self.attribution_notes)
+        return multimedia
+
+
+def _inspect_media_file(path, data):
+    """Identifies and hashes an uploaded file. Called in a worker thread.
+
+    :returns: A tuple of the file's ``MediaUpload`` and mime type. The
+    ``MediaUpload`` is ``None`` if the file isn't multimedia.
+    """
+    media_class = CommCareMultimedia.get_class_by_data(data, filename=path)
+    if not media_class:
+        return None, CommCareMultimedia.get_mime_type(data)
+    file_hash = media_class.generate_hash(data)
+    attachment_id, media_meta = media_class.get_attachment_id_and_meta(data, file_hash)
+    content_type = media_class.get_mime_type(data, filename=os.path.basename(path))
+    return MediaUpload(path, media_class, file_hash, attachment_id, media_meta, content_type, data), None
+
+
+def _put_media_blob(multimedia, upload):
+    """Writes an uploaded file to the blob db without saving the multimedia.
+    Called in a worker thread.
+    """
+    with multimedia.atomic_blobs(save=lambda: None):
+        multimedia.put_attachment(
+            upload.data,
+            upload.attachment_id,
+            content_type=upload.content_type,
+            domain=SHARED_DOMAIN,
+        )
 
-        if save_app:
-            app.save()
-        status.update_progress(len(checked_paths))
-    except Exception as e:
-        status.mark_with_error(_("Error while processing zip: %s" % e))
-    uploaded_zip.close()
 
-    status.complete = True
-    status.save()
+def _delete_media_blob(multimedia, upload):
+    """Deletes a blob written by ``_put_media_blob`` for multimedia that
+    could not be saved
+    """
+    meta = multimedia.external_blobs.get(upload.attachment_id)
+    if meta is not None:
+        get_blob_db().delete(key=meta.key)
 
 
 @task(serializer='pickle')
@@ -164,6 +354,7 @@ def _build_ccz_files(build, build_profile_id, include_multimedia_files, include_
     files, errors, file_count = iter_app_files(
         build, include_multimedia_files, include_index_files, build_profile_id,
         download_targeted_version=download_targeted_version,
+        prefetch_media=MEDIA_PREFETCH_WORKERS,
     )
 
     if toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
@@ -186,19 +377,105 @@ def _build_ccz_files(build, build_profile_id, include_multimedia_files, include_
 
 
 def _zip_files_for_ccz(fpath, files, current_progress, file_progress, file_count, compression, task):
-    file_cache = {}
+    """Write files to a zip at fpath
+
+    ``data`` in each (path, data) pair may be bytes, text or a binary file
+    object, which is streamed into the zip without being read into memory.
+
+    :returns: a ``CCZContents`` describing what was written
+    """
+    contents = CCZContents()
     with open(fpath, 'wb') as tmp:
         with zipfile.ZipFile(tmp, "w", allowZip64=True) as z:
             for path, data in files:
                 # don't compress multimedia files
                 extension = os.path.splitext(path)[1]
                 file_compression = zipfile.ZIP_STORED if extension in MULTIMEDIA_EXTENSIONS else compression
-                z.writestr(path, data, file_compression)
+                if hasattr(data, 'read'):
+                    info = zipfile.ZipInfo(path, date_time=time.localtime(time.time())[:6])
+                    info.compress_type = file_compression
+                    info.external_attr = 0o600 << 16
+                    with z.open(info, 'w') as dest:
+                        shutil.copyfileobj(data, dest)
+                else:
+                    z.writestr(path, data, file_compression)
+                contents.add(path, data)
                 current_progress += file_progress / file_count
                 DownloadBase.set_progress(task, current_progress, 100)
-                if extension not in MULTIMEDIA_EXTENSIONS:
-                    file_cache[path] = data
-    return file_cache
+    return contents
+
+
+class CCZContents(object):
+    """Tracks what has been written to a CCZ so that it can be validated
+    without re-reading the zip
+
+    Only the contents of files needed for validation are kept.
+    """
+    VALIDATION_FILES = ('default/app_strings.txt', 'suite.xml')
+
+    def __init__(self):
+        self.names = set()
+        self.file_cache = {}
+        self.media_suites = []
+
+    def add(self, path, data):
+        self.names.add(path)
+        if path in self.VALIDATION_FILES:
+            self.file_cache[path] = data
+        if re.search(MEDIA_SUITE_PATTERN, path):
+            self.media_suites.append(data)
+
+    def get_multimedia_errors(self):
+        return get_missing_multimedia_errors(self.media_suites, self.names)
+
+
+def _get_ccz_cache_key(build, build_profile_id, include_multimedia_files, include_index_files,
+                       compress_zip, download_targeted_version):
+    """Blob db key for a CCZ built from an immutable build, or None if
+    the CCZ cannot be shared between requests"""
+    if not build.copy_of or toggles.CAUTIOUS_MULTIMEDIA.enabled(build.domain):
+        # unbuilt apps change, and the cautious multimedia manifest is per download
+        return None
+    digest = hashlib.sha1(repr((
+        build.version,
+        build_profile_id,
+        bool(include_multimedia_files),
+        bool(include_index_files),
+        bool(compress_zip),
+        bool(download_targeted_version),
+    )).encode('utf-8')).hexdigest()
+    return '{}/{}/{}'.format(CCZ_CACHE_BUCKET, build.get_id, digest)
+
+
+def _get_cached_ccz(key, fpath):
+    """Copy the cached CCZ to fpath
+
+    :returns: True if the CCZ was found in the cache
+    """
+    try:
+        blob = get_blob_db().get(key=key, type_code=CODES.tempfile)
+    except NotFound:
+        return False
+    with blob, open(fpath, 'wb') as f:
+        shutil.copyfileobj(blob, f)
+    return True
+
+
+def _cache_ccz(build, key, fpath):
+    with open(fpath, 'rb') as f:
+        get_blob_db().put(
+            f,
+            domain=build.domain,
+            parent_id=build.get_id,
+            type_code=CODES.tempfile,
+            name='ccz',
+            key=key,
+            timeout=CCZ_CACHE_TIMEOUT,
+        )
+
+
+def _record_ccz_cache_metric(name, build):
+    metrics_counter('commcare.app_build.ccz_cache.{}'.format(name), tags={'domain': build.domain})
 
 
 def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True, include_index_files=True,
@@ -208,7 +485,6 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
     :param task: celery task whose progress needs to be set when being run asynchronously by celery
     :return: path to the ccz file
     """
-    compression = zipfile.ZIP_DEFLATED if compress_zip else zipfile.ZIP_STORED
     current_progress = 10  # early on indicate something is happening
     file_progress = 50.0  # arbitrarily say building files takes half the total time
 
@@ -219,44 +495,28 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
 
     # Don't rebuild the file if it is already there
     if not (os.path.isfile(fpath) and settings.SHARED_DRIVE_CONF.transfer_enabled):
-        with build.timing_context("_build_ccz_files"):
-            files, errors, file_count = _build_ccz_files(
-                build, build_profile_id, include_multimedia_files, include_index_files,
-                download_id, compress_zip, filename, download_targeted_version
-            )
-        with build.timing_context("_zip_files_for_ccz"):
-            file_cache = _zip_files_for_ccz(fpath, files, current_progress, file_progress,
-                                            file_count, compression, task)
-
-        if include_index_files and toggles.LOCALE_ID_INTEGRITY.enabled(build.domain):
-            with build.timing_context("find_missing_locale_ids_in_ccz"):
-                locale_errors = find_missing_locale_ids_in_ccz(file_cache)
-            if locale_errors:
-                errors.extend(locale_errors)
-                notify_exception(
-                    None,
-                    message="CCZ missing locale ids from default/app_strings.txt",
-                    details={'domain': build.domain, 'app_id': build.id, 'errors': locale_errors}
-                )
-        if include_index_files and include_multimedia_files:
-            with build.timing_context("check_ccz_multimedia_integrity"):
-                multimedia_errors = check_ccz_multimedia_integrity(build.domain, fpath)
-            if multimedia_errors:
-                multimedia_errors.insert(0, _(
-                    "Please try syncing multimedia files in multimedia tab under app settings to resolve "
-                    "issues with missing media files. Report an issue if this persists."
-                ))
-            errors.extend(multimedia_errors)
-            if multimedia_errors:
-                notify_exception(
-                    None,
-                    message="CCZ missing multimedia files",
-                    details={'domain': build.domain, 'app_id': build.id, 'errors': multimedia_errors}
-                )
-
-        if errors:
-            os.remove(fpath)
-            raise Exception('\t' + '\t'.join(errors))
+        cache_key = _get_ccz_cache_key(build, build_profile_id, include_multimedia_files,
+                                       include_index_files, compress_zip, download_targeted_version)
+        if cache_key is None:
+            _create_ccz_file(fpath, build, build_profile_id, include_multimedia_files, include_index_files,
+                             download_id, compress_zip, filename, download_targeted_version,
+                             current_progress, file_progress, task)
+        else:
+            with build.timing_context("_get_cached_ccz"):
+                is_cached = _get_cached_ccz(cache_key, fpath)
+            if not is_cached:
+                # only one process builds a given CCZ; the others wait and use the cached file
+                with CriticalSection([cache_key], timeout=CCZ_BUILD_LOCK_TIMEOUT):
+                    is_cached = _get_cached_ccz(cache_key, fpath)
+                    if not is_cached:
+                        _create_ccz_file(fpath, build, build_profile_id, include_multimedia_files,
+                                         include_index_files, download_id, compress_zip, filename,
+                                         download_targeted_version, current_progress, file_progress, task)
+                        with build.timing_context("_cache_ccz"):
+                            _cache_ccz(build, cache_key, fpath)
+            _record_ccz_cache_metric('hit' if is_cached else 'miss', build)
+            if is_cached:
+                DownloadBase.set_progress(task, current_progress + file_progress, 100)
     else:
         DownloadBase.set_progress(task, current_progress + file_progress, 100)
     with build.timing_context("_expose_download_link"):
@@ -265,6 +525,50 @@ def create_files_for_ccz(build, build_profile_id, include_multimedia_files=True,
     return fpath
 
 
+def _create_ccz_file(fpath, build, build_profile_id, include_multimedia_files, include_index_files,
+                     download_id, compress_zip, filename, download_targeted_version,
+                     current_progress, file_progress, task):
+    compression = zipfile.ZIP_DEFLATED if compress_zip else zipfile.ZIP_STORED
+    with build.timing_context("_build_ccz_files"):
+        files, errors, file_count = _build_ccz_files(
+            build, build_profile_id, include_multimedia_files, include_index_files,
+            download_id, compress_zip, filename, download_targeted_version
+        )
+    with build.timing_context("_zip_files_for_ccz"):
+        contents = _zip_files_for_ccz(fpath, files, current_progress, file_progress,
+                                      file_count, compression, task)
+
+    if include_index_files and toggles.LOCALE_ID_INTEGRITY.enabled(build.domain):
+        with build.timing_context("find_missing_locale_ids_in_ccz"):
+            locale_errors = find_missing_locale_ids_in_ccz(contents.file_cache)
+        if locale_errors:
+            errors.extend(locale_errors)
+            notify_exception(
+                None,
+                message="CCZ missing locale ids from default/app_strings.txt",
+                details={'domain': build.domain, 'app_id': build.id, 'errors': locale_errors}
+            )
+    if include_index_files and include_multimedia_files:
+        with build.timing_context("check_ccz_multimedia_integrity"):
+            multimedia_errors = contents.get_multimedia_errors()
+        if multimedia_errors:
+            multimedia_errors.insert(0, _(
+                "Please try syncing multimedia files in multimedia tab under app settings to resolve "
+                "issues with missing media files. Report an issue if this persists."
+            ))
+        errors.extend(multimedia_errors)
+        if multimedia_errors:
+            notify_exception(
+                None,
+                message="CCZ missing multimedia files",
+                details={'domain': build.domain, 'app_id': build.id, 'errors': multimedia_errors}
+            )
+
+    if errors:
+        os.remove(fpath)
+        raise Exception('\t' + '\t'.join(errors))
+
+
 def _expose_download_link(fpath, filename, compress_zip, download_id):
     common_kwargs = {
         'mimetype': 'application/zip' if compress_zip else 'application/x-zip-compressed',
@@ -306,22 +610,25 @@ def find_missing_locale_ids_in_ccz(file_cache):
 
 # Check that all media files present in media_suite.xml were added to the zip
 def check_ccz_multimedia_integrity(domain, fpath):
-    errors = []
-
     with open(fpath, 'rb') as tmp:
         with zipfile.ZipFile(tmp, "r") as z:
-            media_suites = [f for f in z.namelist() if re.search(r'\bmedia_suite.xml\b', f)]
-            if len(media_suites) != 1:
-                message = _('Could not find media_suite.xml in CCZ')
-                errors.append(message)
-            else:
-                with z.open(media_suites[0]) as media_suite:
-                    from corehq.apps.app_manager.xform import parse_xml
-                    parsed = parse_xml(media_suite.read())
-                    resources = {node.text for node in
-                                 parsed.findall("media/resource/location[@authority='local']")}
-                    names = z.namelist()
-                    missing = [r for r in resources if re.sub(r'^\.\/', '', r) not in names]
-                    errors += [_('Media file missing from CCZ: {}').format(r) for r in missing]
-
-    return errors
+            names = z.namelist()
+            media_suites = [z.read(f) for f in names if re.search(MEDIA_SUITE_PATTERN, f)]
+    return get_missing_multimedia_errors(media_suites, names)
+
+
+def get_missing_multimedia_errors(media_suites, names):
+    """
+    :param media_suites: contents of each media_suite.xml file in the CCZ
+    :param names: paths of all files in the CCZ
+    """
+    if len(media_suites) != 1:
+        return [_('Could not find media_suite.xml in CCZ')]
+
+    from corehq.apps.app_manager.xform import parse_xml
+    parsed = parse_xml(media_suites[0])
+    resources = {node.text for node in
+                 parsed.findall("media/resource/location[@authority='local']")}
+    names = set(names)
+    missing = [r for r in resources if re.sub(r'^\.\/', '', r) not in names]
+    return [_('Media file missing from CCZ: {}').format(r) for r in missing]
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.test import SimpleTestCase, TestCase
+
+from unittest.mock import Mock, patch
+from PIL import Image
+
+from corehq.apps.hqmedia.models import CommCareAudio, CommCareImage, CommCareMultimedia
+from corehq.apps.hqmedia.tasks import BulkMediaUpload, _inspect_media_file
+from corehq.blobs import get_blob_db
+
+
+class BulkUploadTest(SimpleTestCase):
+
+    def _get_image_data(self):
+        image = BytesIO()
+        Image.new('RGB', (2, 3)).save(image, format='PNG')
+        return image.getvalue()
+
+    def test_inspect_image(self):
+        data = self._get_image_data()
+        upload, mime_type = _inspect_media_file('images/Image.PNG', data)
+        file_hash = CommCareImage.generate_hash(data)
+        self.assertIsNone(mime_type)
+        self.assertEqual(upload.media_class, CommCareImage)
+        self.assertEqual(upload.file_hash, file_hash)
+        self.assertEqual(upload.attachment_id, '{}-2x3.PNG'.format(file_hash))
+        self.assertEqual(upload.media_meta, {'size': {'width': 2, 'height': 3}})
+        self.assertEqual(upload.content_type, 'image/png')
+
+    def test_inspect_other_file(self):
+        upload, mime_type = _inspect_media_file('notes.txt', b'some notes')
+        self.assertIsNone(upload)
+        self.assertEqual(mime_type, 'text/plain')
+
+    def test_get_app_path(self):
+        app = Mock()
+        app.get_all_paths_of_type.side_effect = lambda media_type: {
+            'CommCareImage': {'jr://file/commcare/images/Image.png'},
+            'CommCareAudio': {'jr://file/commcare/audio/sound.mp3'},
+        }[media_type]
+        upload = BulkMediaUpload(app, Mock(), Mock())
+        self.assertEqual(
+            upload._get_app_path(CommCareImage, 'commcare/images/image.PNG'),
+            'jr://file/commcare/images/Image.png',
+        )
+        self.assertIsNone(upload._get_app_path(CommCareImage, 'commcare/audio/sound.mp3'))
+        self.assertEqual(
+            upload._get_app_path(CommCareAudio, '/commcare/audio/sound.mp3'),
+            'jr://file/commcare/audio/sound.mp3',
+        )
+
+
+class BulkUploadSaveTest(TestCase):
+    domain = 'bulk-upload-save'
+
+    def setUp(self):
+        super().setUp()
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        self.app = Mock(domain=self.domain)
+        self.upload = BulkMediaUpload(self.app, Mock(), executor, username='user')
+
+    def _get_upload(self, path, size):
+        image = BytesIO()
+        Image.new('RGB', size).save(image, format='PNG')
+        upload, __ = _inspect_media_file(path, image.getvalue())
+        return upload
+
+    def _get_saved(self, upload):
+        multimedia = CommCareImage.get_by_hash(upload.file_hash)
+        self.addCleanup(multimedia.delete)
+        return multimedia
+
+    def test_bulk_save(self):
+        uploads = [
+            self._get_upload('images/one.png', (1, 2)),
+            self._get_upload('images/two.png', (2, 1)),
+        ]
+        db = CommCareMultimedia.get_db()
+        with patch.object(db, 'bulk_save', wraps=db.bulk_save) as bulk_save, \
+                patch.object(BulkMediaUpload, '_save_upload_individually') as save_individually:
+            self.upload._save_uploads([(upload, 'jr://file/' + upload.path) for upload in uploads])
+
+        bulk_save.assert_called_once()
+        save_individually.assert_not_called()
+        for upload in uploads:
+            multimedia = self._get_saved(upload)
+            self.assertEqual(multimedia.fetch_attachment(upload.attachment_id), upload.data)
+            self.assertEqual(multimedia.owners, [self.domain])
+            self.assertEqual(multimedia.aux_media[0].uploaded_by, 'user')
+            self.app.create_mapping.assert_any_call(multimedia, 'jr://file/' + upload.path, save=False)
+        self.assertTrue(self.upload.save_app)
+
+    def test_conflict(self):
+        upload = self._get_upload('images/conflict.png', (3, 1))
+        multimedia = CommCareImage(file_hash=upload.file_hash)
+        multimedia.save()
+        self.addCleanup(multimedia.delete)
+        # a copy of the multimedia that is out of date by the time it is saved
+        stale = CommCareImage.get(multimedia._id)
+        multimedia.save()
+        self.upload._multimedia_by_hash[upload.file_hash] = stale
+
+        self.upload._save_uploads([(upload, 'jr://file/images/conflict.png')])
+
+        # the blob written for the stale copy was deleted, and another
+        # was written when the multimedia was saved individually
+        self.assertFalse(get_blob_db().exists(key=stale.blobs[upload.attachment_id].key))
+        saved = CommCareImage.get(multimedia._id)
+        self.assertNotEqual(saved.blobs[upload.attachment_id].key, stale.blobs[upload.attachment_id].key)
+        self.assertEqual(saved.fetch_attachment(upload.attachment_id), upload.data)
+        self.assertEqual(saved.owners, [self.domain])
+        mapped_multimedia = self.app.create_mapping.call_args[0][0]
+        self.assertEqual(mapped_multimedia._id, multimedia._id)
+        self.assertEqual(mapped_multimedia._rev, saved._rev)
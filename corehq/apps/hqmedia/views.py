@@ -4,9 +4,11 @@ import json
 import logging
 import os
 import shutil
+import tempfile
 import uuid
 import zipfile
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from mimetypes import guess_all_extensions, guess_type
 
@@ -35,6 +37,7 @@ from memoized import memoized
 from couchexport.export import export_raw
 from couchexport.models import Format
 from couchexport.shortcuts import export_response
+from dimagi.utils.chunked import chunked
 from dimagi.utils.web import json_response
 from soil import DownloadBase
 from soil.util import expose_cached_download
@@ -82,12 +85,16 @@ from corehq.apps.hqwebapp.views import BaseSectionPageView
 from corehq.apps.translations.utils import get_file_content_from_workbook
 from corehq.apps.users.decorators import require_permission
 from corehq.apps.users.models import Permissions
+from corehq.blobs import CODES, get_blob_db
 from corehq.middleware import always_allow_browser_caching
 from corehq.util.files import file_extention_from_filename
 from corehq.util.workbook_reading import valid_extensions, SpreadsheetFileExtError
 
 transient_file_store = TransientFileStore("hqmedia_upload_paths", timeout=1 * 60 * 60)
 
+# prefetched media files larger than this are spooled to disk
+MEDIA_PREFETCH_SPOOL_SIZE = 5 * 1024 * 1024
+
 
 class BaseMultimediaView(ApplicationViewMixin, BaseSectionPageView):
 
@@ -820,7 +827,7 @@ class RemoveLogoView(BaseMultimediaView):
         return HttpResponse()
 
 
-def iter_media_files(media_objects):
+def iter_media_files(media_objects, prefetch=0):
     """
     take as input the output of get_media_objects
     and return an iterator of (path, data) tuples for the media files
@@ -830,10 +837,14 @@ def iter_media_files(media_objects):
     as a side effect of implementation,
     errors will not include all error messages until the iterator is exhausted
 
+    if prefetch is given, up to that many files are downloaded from the blob db
+    concurrently ahead of the iterator and data is a file object positioned at
+    the start of the content (spooled to disk for large files) instead of bytes
+
     """
     errors = []
 
-    def _media_files():
+    def _media_files(media_objects):
         for path, media in media_objects:
             try:
                 data, _ = media.get_display_file()
@@ -846,10 +857,82 @@ def iter_media_files(media_objects):
                     'error': e,
                 }
                 errors.append(message)
-    return _media_files(), errors
 
+    def _prefetched_media_files():
+        metas = _get_media_blob_metas([media for path, media in media_objects])
+        with ThreadPoolExecutor(max_workers=prefetch) as executor:
+            pending = deque()
+            for path, media in media_objects:
+                meta = metas.get(media._id)
+                future = executor.submit(_fetch_media_blob, meta) if meta else None
+                pending.append((path, media, future))
+                if len(pending) >= prefetch:
+                    yield from _get_prefetched(*pending.popleft())
+            while pending:
+                yield from _get_prefetched(*pending.popleft())
+
+    def _get_prefetched(path, media, future):
+        folder = path.replace(MULTIMEDIA_PREFIX, "")
+        if future is None:
+            # blob metadata not found; fall back to loading the file directly
+            yield from _media_files([(path, media)])
+            return
+        data, content_length, expected_length = future.result()
+        if content_length != expected_length:
+            data.close()
+            errors.append(_("{path} is truncated: expected {expected} bytes but read {actual}").format(
+                path=path, expected=expected_length, actual=content_length))
+            return
+        try:
+            yield os.path.join(folder), data
+        finally:
+            data.close()
+
+    if prefetch:
+        return _prefetched_media_files(), errors
+    return _media_files(media_objects), errors
 
-def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None, download_targeted_version=False):
+
+def _get_media_blob_metas(media):
+    """Look up blob metadata for the current file of each multimedia object
+
+    :returns: dict of multimedia id -> BlobMeta, omitting objects whose
+    metadata could not be found
+    """
+    metadb = get_blob_db().metadb
+    metas_by_key = {}
+    for parent_ids in chunked({m._id for m in media}, 1000, list):
+        for meta in metadb.get_for_parents(parent_ids, CODES.multimedia):
+            metas_by_key[meta.key] = meta
+    metas = {}
+    for m in media:
+        ref = m.external_blobs.get(m.attachment_id) if m.attachment_id else None
+        if ref is not None and ref.key in metas_by_key:
+            metas[m._id] = metas_by_key[ref.key]
+    return metas
+
+
+def _fetch_media_blob(meta):
+    """Copy a multimedia blob into a temporary file
+
+    Runs in a worker thread, so it must not touch the database.
+
+    :returns: (file, number of bytes read, expected number of bytes)
+    """
+    data = tempfile.SpooledTemporaryFile(max_size=MEDIA_PREFETCH_SPOOL_SIZE)
+    try:
+        with meta.open() as blob:
+            shutil.copyfileobj(blob, data)
+    except Exception:
+        data.close()
+        raise
+    content_length = data.tell()
+    data.seek(0)
+    return data, content_length, meta.content_length
+
+
+def iter_app_files(app, include_multimedia_files, include_index_files, build_profile_id=None,
+                   download_targeted_version=False, prefetch_media=0):
     file_iterator = []
     errors = []
     index_file_count = 0
@@ -857,7 +940,7 @@ def iter_app_files(app, include_multimedia_files, include_index_files, build_pro
     if include_multimedia_files:
         media_objects = list(app.get_media_objects(build_profile_id=build_profile_id, remove_unused=True))
         multimedia_file_count = len(media_objects)
-        file_iterator, errors = iter_media_files(media_objects)
+        file_iterator, errors = iter_media_files(media_objects, prefetch=prefetch_media)
     if include_index_files:
         index_files, index_file_errors, index_file_count = iter_index_files(
             app, build_profile_id=build_profile_id, download_targeted_version=download_targeted_version
@@ -1,3 +1,4 @@
+import hashlib
 from collections import defaultdict
 from itertools import groupby
 from xml.etree.cElementTree import Element, SubElement
@@ -9,6 +10,8 @@ from django_cte import With
 from django_cte.raw import raw_cte_sql
 
 from casexml.apps.phone.fixtures import FixtureProvider
+from casexml.apps.phone.utils import GLOBAL_USER_ID, write_fixture_items_to_io
+from dimagi.utils.couch import CriticalSection
 
 from corehq import toggles
 from corehq.apps.app_manager.const import (
@@ -22,7 +25,13 @@ from corehq.apps.locations.models import (
     LocationFixtureConfiguration,
     LocationType,
     SQLLocation,
+    get_location_version,
 )
+from corehq.blobs import CODES, NotFound, get_blob_db
+from corehq.util.metrics import metrics_counter
+
+LOCATION_FIXTURE_BUCKET = 'location-fixture'
+LOCATION_FIXTURE_CACHE_TIMEOUT = 24 * 60  # minutes
 
 
 class LocationSet(object):
@@ -113,9 +122,44 @@ class LocationFixtureProvider(FixtureProvider):
         if not should_sync_locations(restore_state.last_sync_log, locations_queryset, restore_state):
             return []
 
+        if toggles.CACHE_LOCATION_FIXTURES.enabled(restore_user.domain):
+            return self._get_or_cache_fixture(restore_state, locations_queryset)
+
         return self.serializer.get_xml_nodes(restore_user.domain, self.id, restore_user.user_id,
                                              locations_queryset)
 
+    def _get_or_cache_fixture(self, restore_state, locations_queryset):
+        """
+        Users who sync the same set of locations receive identical fixtures
+        (apart from the user_id attribute), so the rendered fixture is cached
+        in the blob db keyed on the location set and the domain's location
+        version.
+        """
+        restore_user = restore_state.restore_user
+        domain = restore_user.domain
+        key = _get_location_fixture_cache_key(domain, self.id, locations_queryset)
+
+        data = None
+        if not restore_state.overwrite_cache:
+            data = _get_cached_location_fixture(key)
+            _record_location_fixture_metric('cache_miss' if data is None else 'cache_hit', self.id)
+
+        if data is None:
+            with CriticalSection([key]):
+                if not restore_state.overwrite_cache:
+                    # re-check cache to avoid re-computing it
+                    data = _get_cached_location_fixture(key)
+
+                if data is None:
+                    _record_location_fixture_metric('generate', self.id)
+                    nodes = self.serializer.get_xml_nodes(domain, self.id, GLOBAL_USER_ID, locations_queryset)
+                    io_data = write_fixture_items_to_io(nodes)
+                    data = io_data.read()
+                    io_data.seek(0)
+                    _cache_location_fixture(io_data, domain, self.id, key)
+
+        return [data.replace(GLOBAL_USER_ID.encode('utf-8'), restore_user.user_id.encode('utf-8'))]
+
 
 class HierarchicalLocationSerializer(object):
 
@@ -205,6 +249,46 @@ class FlatLocationSerializer(object):
         return root_node
 
 
+def _get_location_fixture_cache_key(domain, fixture_id, locations_queryset):
+    # the version must be read before the locations so that a concurrent
+    # change can't be cached under the new version with stale content
+    version = get_location_version(domain)
+    location_ids = sorted(locations_queryset.order_by().values_list('id', flat=True))
+    data_fields = sorted(field.slug for field in get_location_data_fields(domain))
+    digest = hashlib.sha1(repr((
+        fixture_id,
+        version,
+        location_ids,
+        data_fields,
+    )).encode('utf-8')).hexdigest()
+    return '{}/{}/{}'.format(LOCATION_FIXTURE_BUCKET, domain, digest)
+
+
+def _get_cached_location_fixture(key):
+    try:
+        return get_blob_db().get(key=key, type_code=CODES.fixture).read()
+    except NotFound:
+        return None
+
+
+def _cache_location_fixture(io_data, domain, fixture_id, key):
+    get_blob_db().put(
+        io_data,
+        domain=domain,
+        parent_id=domain,
+        type_code=CODES.fixture,
+        name=fixture_id,
+        key=key,
+        timeout=LOCATION_FIXTURE_CACHE_TIMEOUT,
+    )
+
+
+def _record_location_fixture_metric(name, fixture_id):
+    metrics_counter('commcare.location_fixture.{}'.format(name), tags={
+        'fixture_id': fixture_id,
+    })
+
+
 def should_sync_hierarchical_fixture(project, app):
     if (not project.uses_locations
             or not toggles.HIERARCHICAL_LOCATION_FIXTURE.enabled(project.name)):
@@ -16,6 +16,7 @@ from corehq.apps.locations.adjacencylist import AdjListManager, AdjListModel
 from corehq.apps.products.models import SQLProduct
 from corehq.form_processor.exceptions import CaseNotFound
 from corehq.form_processor.interfaces.supply import SupplyInterface
+from corehq.util.cache_utils import bump_cache_generation, get_cache_generation
 
 
 class LocationTypeManager(models.Manager):
@@ -80,6 +81,18 @@ def stock_level_config_for_domain(domain, commtrack_enabled):
         return ct_config.stocklevelsconfig
 
 
+def get_location_version(domain):
+    """
+    Opaque token that changes whenever a location or location type in the
+    domain is saved or deleted. Use it to key caches of location-derived data.
+    """
+    return get_cache_generation('location-version-{}'.format(domain))
+
+
+def bump_location_version(domain):
+    bump_cache_generation('location-version-{}'.format(domain))
+
+
 class LocationType(models.Model):
     domain = models.CharField(max_length=255, db_index=True)
     name = models.CharField(max_length=255)
@@ -171,6 +184,7 @@ class LocationType(models.Model):
 
         is_not_first_save = self.pk is not None
         super(LocationType, self).save(*args, **kwargs)
+        bump_location_version(self.domain)
 
         if is_not_first_save:
             self.sync_administrative_status()
@@ -221,6 +235,7 @@ class LocationType(models.Model):
 
         cls._pre_bulk_save(objects)
         cls.objects.bulk_create(objects)
+        bump_location_version(objects[0].domain)
         return list(objects)
 
     @classmethod
@@ -234,6 +249,8 @@ class LocationType(models.Model):
             o.last_modified = now
         # the caller should call 'sync_administrative_status' for individual objects
         bulk_update_helper(objects)
+        if objects:
+            bump_location_version(objects[0].domain)
 
     @classmethod
     def bulk_delete(cls, objects):
@@ -242,6 +259,7 @@ class LocationType(models.Model):
             return
         ids = [o.id for o in objects]
         cls.objects.filter(id__in=ids).delete()
+        bump_location_version(objects[0].domain)
 
 
 class LocationQueriesMixin(object):
@@ -261,9 +279,14 @@ class LocationQueriesMixin(object):
 
     def delete(self, *args, **kwargs):
         from .document_store import publish_location_saved
+        domains = set()
         for domain, location_id in self.values_list('domain', 'location_id'):
             publish_location_saved(domain, location_id, is_deletion=True)
-        return super(LocationQueriesMixin, self).delete(*args, **kwargs)
+            domains.add(domain)
+        result = super(LocationQueriesMixin, self).delete(*args, **kwargs)
+        for domain in domains:
+            bump_location_version(domain)
+        return result
 
 
 class LocationQuerySet(LocationQueriesMixin, CTEQuerySet):
@@ -400,6 +423,7 @@ class SQLLocation(AdjListModel):
             sync_supply_point(self)
             super(SQLLocation, self).save(*args, **kwargs)
 
+        bump_location_version(self.domain)
         publish_location_saved(self.domain, self.location_id)
 
     def delete(self, *args, **kwargs):
@@ -415,6 +439,7 @@ class SQLLocation(AdjListModel):
             loc._remove_user()
 
         super(SQLLocation, self).delete(*args, **kwargs)
+        bump_location_version(self.domain)
         update_users_at_locations.delay(
             self.domain,
             [loc.location_id for loc in to_delete],
@@ -465,6 +490,7 @@ class SQLLocation(AdjListModel):
         if len(set(loc.domain for loc in locations)) != 1:
             raise ValueError("cannot bulk delete locations for multiple domains")
         cls.objects.filter(id__in=[loc.id for loc in locations]).delete()
+        bump_location_version(locations[0].domain)
         # NOTE _remove_user() not called here. No domains were using
         # SQLLocation.user_id at the time this was written, and that
         # field is slated for removal.
@@ -14,6 +14,7 @@ from casexml.apps.phone.tests.utils import (
     call_fixture_generator,
     create_restore_user,
 )
+from casexml.apps.phone.utils import GLOBAL_USER_ID
 
 from corehq.apps.app_manager.tests.util import (
     TestXmlMixin,
@@ -45,6 +46,7 @@ from ..models import (
     LocationFixtureConfiguration,
     LocationType,
     SQLLocation,
+    get_location_version,
     make_location,
 )
 from .util import (
@@ -543,6 +545,62 @@ class WebUserLocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocations
         )
 
 
+@mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
+class CachedLocationFixturesTest(LocationHierarchyTestCase, FixtureHasLocationsMixin):
+    location_type_names = ['state', 'county', 'city']
+    location_structure = TEST_LOCATION_STRUCTURE
+
+    def setUp(self):
+        super(CachedLocationFixturesTest, self).setUp()
+        delete_all_users()
+        self.user = create_restore_user(self.domain, 'user', '123')
+        self.other_user = create_restore_user(self.domain, 'other_user', '123')
+        for user in (self.user, self.other_user):
+            user._couch_user.set_location(self.locations['Suffolk'])
+
+    def tearDown(self):
+        delete_all_users()
+        super(CachedLocationFixturesTest, self).tearDown()
+
+    def _get_fixture(self, user):
+        with flag_enabled('CACHE_LOCATION_FIXTURES'):
+            fixture, = call_fixture_generator(flat_location_fixture_generator, user)
+        return fixture
+
+    def test_cached_fixture_is_shared_between_users(self):
+        fixture = self._get_fixture(self.user)
+        other_fixture = self._get_fixture(self.other_user)
+
+        self.assertIn(self.user.user_id.encode('utf-8'), fixture)
+        self.assertNotIn(GLOBAL_USER_ID.encode('utf-8'), fixture)
+        self.assertEqual(
+            fixture.replace(self.user.user_id.encode('utf-8'), b''),
+            other_fixture.replace(self.other_user.user_id.encode('utf-8'), b''),
+        )
+
+    def test_location_change_invalidates_cached_fixture(self):
+        version = get_location_version(self.domain)
+        self.assertNotIn(b'Beantown', self._get_fixture(self.user))
+
+        boston = self.locations['Boston']
+        boston.name = 'Beantown'
+        boston.save()
+        self.addCleanup(self._rename_location, boston, 'Boston')
+
+        self.assertNotEqual(version, get_location_version(self.domain))
+        self.assertIn(b'Beantown', self._get_fixture(self.other_user))
+
+    def test_location_type_change_invalidates_cached_fixture(self):
+        version = get_location_version(self.domain)
+        self.location_types['city'].save()
+        self.assertNotEqual(version, get_location_version(self.domain))
+
+    @staticmethod
+    def _rename_location(location, name):
+        location.name = name
+        location.save()
+
+
 @mock.patch.object(Domain, 'uses_locations', lambda: True)  # removes dependency on accounting
 class ForkedHierarchyLocationFixturesTest(TestCase, FixtureHasLocationsMixin):
     """
@@ -288,67 +288,129 @@ def send_message_via_backend(msg, backend=None, orig_phone_number=None):
     orig_phone_number - the originating phone number to use when sending; this
       is sent in if the backend supports load balancing
     """
+    try:
+        if not _prepare_outbound_message(msg):
+            return False
+
+        if not backend:
+            backend = msg.outbound_backend
+
+        _check_backend_authorization(msg, backend)
+        backend.send(msg, orig_phone_number=orig_phone_number)
+        _record_outbound_message_sent(msg, backend)
+        return True
+    except Exception as e:
+        _handle_outbound_message_error(msg, backend, e)
+        return False
+
+
+def send_messages_via_backend(messages, backend, orig_phone_number=None):
+    """send several sms using the same backend, with as few requests to
+    the gateway as the backend allows (see SQLSMSBackend.send_batch)
+
+    messages - list of outbound message objects
+    backend - backend to use for sending
+    orig_phone_number - the originating phone number to use when sending; this
+      is sent in if the backend supports load balancing
+
+    Returns a list with, for each message, True if it was sent, otherwise False
+    """
+    results = [False] * len(messages)
+    to_send = []
+    for i, msg in enumerate(messages):
+        try:
+            if _prepare_outbound_message(msg):
+                _check_backend_authorization(msg, backend)
+                to_send.append((i, msg))
+        except Exception as e:
+            _handle_outbound_message_error(msg, backend, e)
+
+    if not to_send:
+        return results
+
+    try:
+        errors = backend.send_batch([msg for i, msg in to_send], orig_phone_number=orig_phone_number)
+    except Exception as e:
+        errors = [e] * len(to_send)
+
+    for (i, msg), error in zip(to_send, errors):
+        try:
+            if error is not None:
+                raise error
+            _record_outbound_message_sent(msg, backend)
+            results[i] = True
+        except Exception as e:
+            _handle_outbound_message_error(msg, backend, e)
+
+    return results
+
+
+def _prepare_outbound_message(msg):
+    """
+    Returns False if the message must not be sent, after setting an error on
+    it, and raises an exception if something is wrong that needs investigating.
+    """
     sms_load_counter("outbound", msg.domain)()
     try:
         msg.text = clean_text(msg.text)
     except Exception:
         logging.exception("Could not clean text for sms dated '%s' in domain '%s'" % (msg.date, msg.domain))
-    try:
-        # We need to send SMS when msg.domain is None to support sending to
-        # people who opt in without being tied to a domain
-        if msg.domain and not domain_has_privilege(msg.domain, privileges.OUTBOUND_SMS):
-            raise Exception(
-                ("Domain '%s' does not have permission to send SMS."
-                 "  Please investigate why this function was called.") % msg.domain
-            )
 
-        phone_obj = PhoneBlacklist.get_by_phone_number_or_none(msg.phone_number)
-        if phone_obj and not phone_obj.send_sms:
-            if msg.ignore_opt_out and phone_obj.can_opt_in:
-                # If ignore_opt_out is True on the message, then we'll still
-                # send it. However, if we're not letting the phone number
-                # opt back in and it's in an opted-out state, we will not
-                # send anything to it no matter the state of the ignore_opt_out
-                # flag.
-                pass
-            else:
-                msg.set_system_error(SMS.ERROR_PHONE_NUMBER_OPTED_OUT)
-                return False
-
-        if not backend:
-            backend = msg.outbound_backend
+    # We need to send SMS when msg.domain is None to support sending to
+    # people who opt in without being tied to a domain
+    if msg.domain and not domain_has_privilege(msg.domain, privileges.OUTBOUND_SMS):
+        raise Exception(
+            ("Domain '%s' does not have permission to send SMS."
+             "  Please investigate why this function was called.") % msg.domain
+        )
 
-        if backend.domain_is_authorized(msg.domain):
-            backend.send(msg, orig_phone_number=orig_phone_number)
-            metrics_counter("commcare.sms.outbound_message", tags={
-                'domain': msg.domain,
-                'status': 'ok',
-                'backend': _get_backend_tag(backend),
-            })
+    phone_obj = PhoneBlacklist.get_by_phone_number_or_none(msg.phone_number)
+    if phone_obj and not phone_obj.send_sms:
+        if msg.ignore_opt_out and phone_obj.can_opt_in:
+            # If ignore_opt_out is True on the message, then we'll still
+            # send it. However, if we're not letting the phone number
+            # opt back in and it's in an opted-out state, we will not
+            # send anything to it no matter the state of the ignore_opt_out
+            # flag.
+            pass
         else:
-            raise BackendAuthorizationException(
-                "Domain '%s' is not authorized to use backend '%s'" % (msg.domain, backend.pk)
-            )
+            msg.set_system_error(SMS.ERROR_PHONE_NUMBER_OPTED_OUT)
+            return False
 
-        msg.backend_api = backend.hq_api_id
-        msg.backend_id = backend.couch_id
-        msg.save()
-        return True
-    except Exception as e:
-        metrics_counter("commcare.sms.outbound_message", tags={
-            'domain': msg.domain,
-            'status': 'error',
-            'backend': _get_backend_tag(backend),
-        })
-        should_log_exception = True
+    return True
 
-        if backend:
-            should_log_exception = should_log_exception_for_backend(backend, e)
 
-        if should_log_exception:
-            log_sms_exception(msg)
+def _check_backend_authorization(msg, backend):
+    if not backend.domain_is_authorized(msg.domain):
+        raise BackendAuthorizationException(
+            "Domain '%s' is not authorized to use backend '%s'" % (msg.domain, backend.pk)
+        )
 
-        return False
+
+def _record_outbound_message_sent(msg, backend):
+    metrics_counter("commcare.sms.outbound_message", tags={
+        'domain': msg.domain,
+        'status': 'ok',
+        'backend': _get_backend_tag(backend),
+    })
+    msg.backend_api = backend.hq_api_id
+    msg.backend_id = backend.couch_id
+    msg.save()
+
+
+def _handle_outbound_message_error(msg, backend, exception):
+    metrics_counter("commcare.sms.outbound_message", tags={
+        'domain': msg.domain,
+        'status': 'error',
+        'backend': _get_backend_tag(backend),
+    })
+    should_log_exception = True
+
+    if backend:
+        should_log_exception = should_log_exception_for_backend(backend, exception)
+
+    if should_log_exception:
+        log_sms_exception(msg)
 
 
 @quickcache(['backend_id'], skip_arg='backend')
@@ -1,15 +1,31 @@
+from collections import defaultdict
 from time import sleep
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
-from dimagi.utils.couch import get_redis_lock
+from dimagi.utils.chunked import chunked
 from dimagi.utils.logging import notify_exception
 
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
 from corehq.apps.sms.models import QueuedSMS
-from corehq.apps.sms.tasks import send_to_sms_queue
+from corehq.apps.sms.tasks import (
+    notify_sms_queue,
+    process_sms_batch,
+    wait_for_sms_queue_notification,
+)
 from corehq.sql_db.util import handle_connection_failure
 
+# The number of messages claimed at a time
+BATCH_SIZE = 100
+
+# The most messages handed to one task, so that a large backlog for one
+# backend is still spread across workers
+TASK_BATCH_SIZE = 20
+
+# The longest time to wait between runs if no notification is received
+POLL_INTERVAL = 10
+
 
 def skip_domain(domain):
     return any_migrations_in_progress(domain)
@@ -19,44 +35,58 @@ class SMSEnqueuingOperation(BaseCommand):
     """
     Based on our commcare-cloud code, there will be one instance of this
     command running on every machine that has a celery worker which
-    consumes from the sms_queue. This is ok because this process uses
-    locks to ensure items are only enqueued once, and it's what is desired
-    in order to more efficiently spawn the needed celery tasks.
+    consumes from the sms_queue. This is ok because messages are claimed
+    with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent dispatchers never
+    enqueue the same message twice, and it's what is desired in order to
+    more efficiently spawn the needed celery tasks.
+
+    Rather than only polling, the dispatcher is woken up as soon as a
+    message is queued (see enqueue()).
     """
     help = "Spawns tasks to process queued SMS"
 
-    def get_enqueue_lock(self, queued_sms):
-        key = "create-task-for-sms-%s-%s" % (
-            queued_sms.pk,
-            queued_sms.datetime_to_process.strftime('%Y-%m-%d %H:%M:%S')
-        )
-        return get_redis_lock(
-            key,
-            timeout=3 * 60 * 60,
-            name="sms_task",
-            track_unreleased=False,
-        )
-
     @handle_connection_failure()
     def create_tasks(self):
-        for queued_sms in QueuedSMS.get_queued_sms():
-            if queued_sms.domain and skip_domain(queued_sms.domain):
-                continue
+        skipped_pks = []
+        while True:
+            rows = QueuedSMS.claim_queued_sms(BATCH_SIZE)
+
+            # Messages for the same backend are processed together so that
+            # they can be sent with one request to the gateway
+            pks_by_backend = defaultdict(list)
+            for pk, domain, direction, backend_id in rows:
+                if domain and skip_domain(domain):
+                    skipped_pks.append(pk)
+                else:
+                    pks_by_backend[(direction, backend_id)].append(pk)
+
+            for pks in pks_by_backend.values():
+                for batch in chunked(pks, TASK_BATCH_SIZE, list):
+                    process_sms_batch.delay(batch)
 
-            self.enqueue(queued_sms)
+            if len(rows) < BATCH_SIZE:
+                break
+
+        # Released only once all due messages have been claimed so that they
+        # are not claimed again in the loop above
+        QueuedSMS.release_claims(skipped_pks)
 
     def enqueue(self, queued_sms):
-        enqueue_lock = self.get_enqueue_lock(queued_sms)
-        if enqueue_lock.acquire(blocking=False):
-            send_to_sms_queue(queued_sms)
+        transaction.on_commit(notify_sms_queue)
+
+    def wait(self):
+        try:
+            wait_for_sms_queue_notification(timeout=POLL_INTERVAL)
+        except Exception:
+            sleep(POLL_INTERVAL)
 
     def handle(self, **options):
         while True:
             try:
                 self.create_tasks()
             except:
-                notify_exception(None, message="Could not fetch due survey actions")
-            sleep(10)
+                notify_exception(None, message="Could not fetch queued SMS")
+            self.wait()
 
 
 class Command(SMSEnqueuingOperation):
@@ -0,0 +1,84 @@
+import time
+import uuid
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+
+from corehq.apps.sms.models import OUTGOING, SMS, QueuedSMS
+from corehq.apps.sms.tasks import notify_sms_queue
+from corehq.apps.smsbillables.models import SmsBillable
+from corehq.messaging.smsbackends.test.models import SQLTestSMSBackend
+
+
+class Command(BaseCommand):
+    help = """
+    Queues outbound messages to a temporary test SMS backend and reports how
+    long run_sms_queue and the sms_queue celery workers take to send them.
+    Requires SMS_QUEUE_ENABLED, a running run_sms_queue and sms_queue workers.
+    Use a test domain: its daily outbound SMS limit and restricted sending
+    times apply to these messages.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('--messages', type=int, default=1000, help="Number of messages to queue")
+        parser.add_argument('--timeout', type=int, default=600, help="Seconds to wait for the queue to drain")
+
+    def handle(self, domain, messages, timeout, **options):
+        if not settings.SMS_QUEUE_ENABLED:
+            raise CommandError("SMS_QUEUE_ENABLED is False")
+
+        backend = SQLTestSMSBackend.objects.create(
+            domain=domain,
+            is_global=False,
+            name='SMS_QUEUE_LOAD_TEST_%s' % uuid.uuid4().hex[:8].upper(),
+            hq_api_id=SQLTestSMSBackend.get_api_id(),
+        )
+        try:
+            self.run(domain, backend, messages, timeout)
+        finally:
+            SmsBillable.objects.filter(
+                log_id__in=SMS.objects.filter(backend_id=backend.couch_id).values('couch_id')
+            ).delete()
+            QueuedSMS.objects.filter(backend_id=backend.couch_id).delete()
+            SMS.objects.filter(backend_id=backend.couch_id).delete()
+            backend.delete()
+
+    def run(self, domain, backend, num_messages, timeout):
+        now = datetime.utcnow()
+        QueuedSMS.objects.bulk_create([
+            QueuedSMS(
+                couch_id=uuid.uuid4().hex,
+                domain=domain,
+                date=now,
+                direction=OUTGOING,
+                phone_number='+1555%07d' % i,
+                text='SMS queue load test message %s' % i,
+                backend_api=backend.hq_api_id,
+                backend_id=backend.couch_id,
+                processed=False,
+                datetime_to_process=now,
+                queued_timestamp=now,
+            )
+            for i in range(num_messages)
+        ], batch_size=1000)
+
+        start = time.time()
+        notify_sms_queue()
+        remaining = num_messages
+        while remaining and time.time() - start < timeout:
+            time.sleep(1)
+            remaining = QueuedSMS.objects.filter(backend_id=backend.couch_id).count()
+            print("{:.0f}s: {} of {} messages still queued".format(
+                time.time() - start, remaining, num_messages
+            ))
+
+        duration = time.time() - start
+        sent = SMS.objects.filter(backend_id=backend.couch_id, processed=True, error=False).count()
+        failed = SMS.objects.filter(backend_id=backend.couch_id, error=True).count()
+        print("Sent {} and failed {} of {} messages in {:.2f}s ({:.1f} messages/s)".format(
+            sent, failed, num_messages, duration, (sent + failed) / duration
+        ))
+        if remaining:
+            print("Timed out with {} messages still queued".format(remaining))
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms', '0051_reset_modified_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedsms',
+            name='claimed_until',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
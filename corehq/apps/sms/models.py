@@ -379,6 +379,14 @@ class SMS(SMSBase):
 
 
 class QueuedSMS(SMSBase):
+    # Set by claim_queued_sms when the message is handed to a task for
+    # processing. Any save of the message after that (e.g. to delay it)
+    # clears the claim; claims which are never cleared expire so that
+    # the message gets retried later.
+    claimed_until = models.DateTimeField(null=True)
+
+    # How long a claimed message is left alone before it can be claimed again
+    CLAIM_TIMEOUT = timedelta(hours=3)
 
     class Meta(object):
         db_table = 'sms_queued'
@@ -389,6 +397,41 @@ class QueuedSMS(SMSBase):
             datetime_to_process__lte=datetime.utcnow(),
         ).order_by('datetime_to_process')
 
+    @classmethod
+    def claim_queued_sms(cls, batch_size):
+        """
+        Claims up to batch_size messages which are due to be processed.
+        Rows are selected with SELECT ... FOR UPDATE SKIP LOCKED so that
+        concurrent dispatchers never wait on or claim the same messages.
+
+        :return: a list of (pk, domain, direction, backend_id) tuples
+        """
+        now = datetime.utcnow()
+        with transaction.atomic():
+            rows = list(
+                cls.objects
+                .select_for_update(skip_locked=True)
+                .filter(
+                    models.Q(claimed_until__isnull=True) | models.Q(claimed_until__lt=now),
+                    datetime_to_process__lte=now,
+                )
+                .order_by('datetime_to_process')
+                .values_list('pk', 'domain', 'direction', 'backend_id')[:batch_size]
+            )
+            if rows:
+                cls.objects.filter(pk__in=[row[0] for row in rows]).update(claimed_until=now + cls.CLAIM_TIMEOUT)
+
+        return rows
+
+    @classmethod
+    def release_claims(cls, pks, claimed_until=None):
+        """
+        Releases the claims on the given messages so that they can be claimed
+        again once they're due, or once claimed_until has passed if given.
+        """
+        if pks:
+            cls.objects.filter(pk__in=pks).update(claimed_until=claimed_until)
+
 
 class SQLLastReadMessage(UUIDGeneratorMixin, models.Model):
 
@@ -2150,6 +2193,37 @@ class SQLSMSBackend(SQLMobileBackend):
     def send(self, msg, *args, **kwargs):
         raise NotImplementedError("Please implement this method.")
 
+    def send_batch(self, messages, orig_phone_number=None):
+        """
+        Sends several messages. Override this for gateways which accept
+        many messages in one request; by default the messages are sent one
+        at a time with send().
+
+        As with send(), an unrecoverable error for a message should be set
+        on it with set_system_error() or set_gateway_error() rather than
+        raised.
+
+        Returns a list with, for each message in order, None if it was
+        handled, otherwise the exception raised while sending it.
+        """
+        errors = []
+        for msg in messages:
+            try:
+                self.send(msg, orig_phone_number=orig_phone_number)
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+        return errors
+
+    @property
+    def http_session(self):
+        """
+        Use this rather than calling requests directly when making requests
+        to the gateway, so that connections are reused between messages.
+        """
+        return smsutil.get_sms_gateway_session()
+
     # Override in case backend is fetching gateway fees through provider API
     using_api_to_get_fees = False
 
@@ -1,5 +1,7 @@
 import hashlib
+import logging
 import math
+from collections import defaultdict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -15,6 +17,7 @@ from dimagi.utils.couch import (
     get_redis_lock,
     release_lock,
 )
+from dimagi.utils.logging import notify_exception
 from dimagi.utils.rate_limit import rate_limit
 
 from corehq import privileges
@@ -30,6 +33,7 @@ from corehq.apps.sms.api import (
     log_sms_exception,
     process_incoming,
     send_message_via_backend,
+    send_messages_via_backend,
 )
 from corehq.apps.sms.change_publishers import publish_sms_saved
 from corehq.apps.sms.mixin import (
@@ -57,6 +61,8 @@ from corehq.util.timezones.conversions import ServerTime
 
 from corehq.apps.sms.const import DEFAULT_SMS_DAILY_LIMIT
 
+logger = logging.getLogger(__name__)
+
 MAX_TRIAL_SMS = 50
 
 
@@ -91,7 +97,8 @@ def get_sms_from_queued_sms(queued_sms):
 
 def _get_sms_fields_to_copy():
     """Returns a set of field attribute names to copy from QueuedSMS to SMS.
-    This should be all fields in QueuedSMS except 'id'
+    This should be all fields in QueuedSMS except 'id' and 'claimed_until',
+    which only matters while the message is queued
     """
     res = set()
     for field in QueuedSMS._meta.get_fields():
@@ -99,7 +106,7 @@ def _get_sms_fields_to_copy():
             res.add(field.attname)  # use attname to avoid DB lookups for related models
         except AttributeError:
             res.add(field.name)
-    return res - {"id"}
+    return res - {"id", "claimed_until"}
 
 
 def handle_unsuccessful_processing_attempt(msg):
@@ -225,11 +232,13 @@ def passes_trial_check(msg):
     return True
 
 
-def handle_outgoing(msg):
+def _reserve_outgoing_capacity(msg):
     """
-    Should return a requeue flag, so if it returns True, the message will be
-    requeued and processed again immediately, and if it returns False, it will
-    not be queued again.
+    Applies the rate limit and connection limit of the message's backend.
+
+    :return: None if the message should be requeued and tried again shortly,
+    otherwise a (backend, orig_phone_number, connection_slot_lock) tuple; the
+    connection slot lock, if not None, must be released once the message is sent
     """
     backend = msg.outbound_backend
     sms_rate_limit = backend.get_sms_rate_limit()
@@ -237,6 +246,7 @@ def handle_outgoing(msg):
     use_load_balancing = isinstance(backend, PhoneLoadBalancingMixin)
     max_simultaneous_connections = backend.get_max_simultaneous_connections()
     orig_phone_number = None
+    connection_slot_lock = None
 
     if use_load_balancing:
         orig_phone_number = backend.get_next_phone_number(msg.phone_number)
@@ -248,23 +258,18 @@ def handle_outgoing(msg):
             redis_key = 'sms-rate-limit-backend-%s' % backend.pk
 
         if not rate_limit(redis_key, actions_allowed=sms_rate_limit, how_often=60):
-            # Requeue the message and try it again shortly
-            return True
+            return None
 
     if max_simultaneous_connections:
         connection_slot_lock = get_connection_slot_lock(msg.phone_number, backend, max_simultaneous_connections)
         if not connection_slot_lock.acquire(blocking=False):
-            # Requeue the message and try it again shortly
-            return True
+            return None
 
-    if passes_trial_check(msg):
-        result = send_message_via_backend(
-            msg,
-            backend=backend,
-            orig_phone_number=orig_phone_number
-        )
+    return backend, orig_phone_number, connection_slot_lock
 
-    if max_simultaneous_connections:
+
+def _handle_outgoing_result(msg, result, connection_slot_lock=None):
+    if connection_slot_lock:
         release_lock(connection_slot_lock, True)
 
     if msg.error:
@@ -276,9 +281,80 @@ def handle_outgoing(msg):
         else:
             handle_unsuccessful_processing_attempt(msg)
 
+
+def handle_outgoing(msg):
+    """
+    Should return a requeue flag, so if it returns True, the message will be
+    requeued and processed again immediately, and if it returns False, it will
+    not be queued again.
+    """
+    reservation = _reserve_outgoing_capacity(msg)
+    if reservation is None:
+        # Requeue the message and try it again shortly
+        return True
+
+    backend, orig_phone_number, connection_slot_lock = reservation
+    result = False
+    if passes_trial_check(msg):
+        result = send_message_via_backend(
+            msg,
+            backend=backend,
+            orig_phone_number=orig_phone_number
+        )
+
+    _handle_outgoing_result(msg, result, connection_slot_lock)
     return False
 
 
+class OutgoingSMSBatch(object):
+    """
+    Collects outgoing messages which are ready to be sent, so that messages
+    for the same backend are sent together (see SQLSMSBackend.send_batch).
+    """
+
+    def __init__(self):
+        self.backends = {}
+        self.messages = defaultdict(list)
+
+    def add(self, msg):
+        """
+        Same as handle_outgoing, except that the message is only sent when
+        send() is called.
+        """
+        reservation = _reserve_outgoing_capacity(msg)
+        if reservation is None:
+            # Requeue the message and try it again shortly
+            return True
+
+        backend, orig_phone_number, connection_slot_lock = reservation
+        if not passes_trial_check(msg):
+            _handle_outgoing_result(msg, False, connection_slot_lock)
+        elif connection_slot_lock:
+            # Send right away rather than hold the connection slot while
+            # the rest of the batch is processed
+            result = send_message_via_backend(msg, backend=backend, orig_phone_number=orig_phone_number)
+            _handle_outgoing_result(msg, result, connection_slot_lock)
+        else:
+            key = (backend.pk, orig_phone_number)
+            self.backends[key] = backend
+            self.messages[key].append(msg)
+
+        return False
+
+    def send(self):
+        for key, messages in self.messages.items():
+            backend = self.backends[key]
+            results = send_messages_via_backend(messages, backend, orig_phone_number=key[1])
+            for msg, result in zip(messages, results):
+                try:
+                    _handle_outgoing_result(msg, result)
+                except Exception:
+                    notify_exception(None, message="Error processing queued SMS %s" % msg.pk)
+
+        self.backends.clear()
+        self.messages.clear()
+
+
 def handle_incoming(msg):
     try:
         process_incoming(msg)
@@ -364,62 +440,60 @@ class OutboundDailyCounter(object):
         return True
 
 
-@no_result_task(queue="sms_queue", acks_late=True)
-def process_sms(queued_sms_pk):
-    """
-    queued_sms_pk - pk of a QueuedSMS entry
-    """
-    utcnow = get_utcnow()
-    # Prevent more than one task from processing this SMS, just in case
-    # the message got enqueued twice.
-    message_lock = get_lock("sms-queue-processing-%s" % queued_sms_pk)
+# Outcomes of _process_queued_sms which the caller has to act on
+PROCESSING_REQUEUE = 'requeue'
+PROCESSING_RETRY_LATER = 'retry_later'
 
-    if message_lock.acquire(blocking=False):
-        try:
-            msg = QueuedSMS.objects.get(pk=queued_sms_pk)
-        except QueuedSMS.DoesNotExist:
-            # The message was already processed and removed from the queue
-            release_lock(message_lock, True)
-            return
-
-        if message_is_stale(msg, utcnow):
-            msg.set_system_error(SMS.ERROR_MESSAGE_IS_STALE)
-            remove_from_queue(msg)
-            release_lock(message_lock, True)
-            return
-
-        outbound_counter = None
-        if msg.direction == OUTGOING:
-            domain_object = Domain.get_by_name(msg.domain) if msg.domain else None
 
-            if domain_object and handle_domain_specific_delays(msg, domain_object, utcnow):
-                release_lock(message_lock, True)
-                return
+def _process_queued_sms(msg, outgoing_batch=None):
+    """
+    Processes a QueuedSMS. The caller is responsible for making sure no other
+    task is processing the same message at the same time.
 
-            outbound_counter = OutboundDailyCounter(domain_object)
-            if not outbound_counter.can_send_outbound_sms(msg):
-                release_lock(message_lock, True)
-                return
+    If outgoing_batch is given, an outgoing message is added to it rather than
+    sent right away, and the caller is responsible for sending the batch.
 
-        requeue = False
-        # Process inbound SMS from a single contact one at a time
-        recipient_block = msg.direction == INCOMING
+    :return: PROCESSING_REQUEUE if the message should be processed again right
+    away, PROCESSING_RETRY_LATER if it should be processed again in a minute,
+    otherwise None
+    """
+    utcnow = get_utcnow()
+    if message_is_stale(msg, utcnow):
+        msg.set_system_error(SMS.ERROR_MESSAGE_IS_STALE)
+        remove_from_queue(msg)
+        return None
 
-        # We check datetime_to_process against utcnow plus a small amount
-        # of time because timestamps can differ between machines which
-        # can cause us to miss sending the message the first time and
-        # result in an unnecessary delay.
-        if (
-            isinstance(msg.processed, bool) and
-            not msg.processed and
-            not msg.error and
-            msg.datetime_to_process < (utcnow + timedelta(seconds=10))
-        ):
-            if recipient_block:
-                recipient_lock = get_lock(
-                    "sms-queue-recipient-phone-%s" % msg.phone_number)
-                recipient_lock.acquire(blocking=True)
+    outbound_counter = None
+    if msg.direction == OUTGOING:
+        domain_object = Domain.get_by_name(msg.domain) if msg.domain else None
+
+        if domain_object and handle_domain_specific_delays(msg, domain_object, utcnow):
+            return None
+
+        outbound_counter = OutboundDailyCounter(domain_object)
+        if not outbound_counter.can_send_outbound_sms(msg):
+            return None
+
+    outcome = None
+    # Process inbound SMS from a single contact one at a time
+    recipient_block = msg.direction == INCOMING
+
+    # We check datetime_to_process against utcnow plus a small amount
+    # of time because timestamps can differ between machines which
+    # can cause us to miss sending the message the first time and
+    # result in an unnecessary delay.
+    if (
+        isinstance(msg.processed, bool) and
+        not msg.processed and
+        not msg.error and
+        msg.datetime_to_process < (utcnow + timedelta(seconds=10))
+    ):
+        if recipient_block:
+            recipient_lock = get_lock(
+                "sms-queue-recipient-phone-%s" % msg.phone_number)
+            recipient_lock.acquire(blocking=True)
 
+        try:
             if msg.direction == OUTGOING:
                 if (
                     msg.domain and
@@ -429,34 +503,130 @@ def process_sms(queued_sms_pk):
                 ):
                     msg.set_system_error(SMS.ERROR_CONTACT_IS_INACTIVE)
                     remove_from_queue(msg)
-                else:
-                    requeue = handle_outgoing(msg)
+                elif (outgoing_batch.add(msg) if outgoing_batch else handle_outgoing(msg)):
+                    outcome = PROCESSING_REQUEUE
             elif msg.direction == INCOMING:
                 try:
                     handle_incoming(msg)
                 except DelayProcessing:
-                    process_sms.apply_async([queued_sms_pk], countdown=60)
-                    if recipient_block:
-                        release_lock(recipient_lock, True)
-                    release_lock(message_lock, True)
+                    outcome = PROCESSING_RETRY_LATER
             else:
                 msg.set_system_error(SMS.ERROR_INVALID_DIRECTION)
                 remove_from_queue(msg)
-
+        finally:
             if recipient_block:
                 release_lock(recipient_lock, True)
 
+    if outcome == PROCESSING_REQUEUE and outbound_counter:
+        outbound_counter.decrement()
+
+    return outcome
+
+
+@no_result_task(queue="sms_queue", acks_late=True)
+def process_sms(queued_sms_pk):
+    """
+    queued_sms_pk - pk of a QueuedSMS entry
+    """
+    # Prevent more than one task from processing this SMS, just in case
+    # the message got enqueued twice.
+    message_lock = get_lock("sms-queue-processing-%s" % queued_sms_pk)
+
+    if message_lock.acquire(blocking=False):
+        try:
+            msg = QueuedSMS.objects.get(pk=queued_sms_pk)
+        except QueuedSMS.DoesNotExist:
+            # The message was already processed and removed from the queue
+            release_lock(message_lock, True)
+            return
+
+        outcome = _process_queued_sms(msg)
         release_lock(message_lock, True)
-        if requeue:
-            if outbound_counter:
-                outbound_counter.decrement()
+
+        if outcome == PROCESSING_REQUEUE:
             send_to_sms_queue(msg)
+        elif outcome == PROCESSING_RETRY_LATER:
+            process_sms.apply_async([queued_sms_pk], countdown=60)
+
+
+@no_result_task(queue="sms_queue", acks_late=True)
+def process_sms_batch(queued_sms_pks):
+    """
+    Processes, in order, a batch of messages which were claimed by
+    QueuedSMS.claim_queued_sms. The claim guarantees that no other task
+    is processing these messages, so no per-message lock is needed.
+
+    queued_sms_pks - list of pks of QueuedSMS entries
+    """
+    messages = QueuedSMS.objects.in_bulk(queued_sms_pks)
+    outgoing_batch = OutgoingSMSBatch()
+    requeued_pks = []
+    retry_later_pks = []
+    for queued_sms_pk in queued_sms_pks:
+        msg = messages.get(queued_sms_pk)
+        if msg is None:
+            # The message was already processed and removed from the queue
+            continue
+
+        # Saving the message while processing it (e.g. to delay it) releases the claim
+        msg.claimed_until = None
+        try:
+            outcome = _process_queued_sms(msg, outgoing_batch)
+        except Exception:
+            # The claim is left to expire so that the message is retried later
+            notify_exception(None, message="Error processing queued SMS %s" % queued_sms_pk)
+            continue
+
+        if outcome == PROCESSING_REQUEUE:
+            requeued_pks.append(queued_sms_pk)
+        elif outcome == PROCESSING_RETRY_LATER:
+            retry_later_pks.append(queued_sms_pk)
+
+    outgoing_batch.send()
+
+    QueuedSMS.release_claims(retry_later_pks, claimed_until=get_utcnow() + timedelta(minutes=1))
+    QueuedSMS.release_claims(requeued_pks)
+    if requeued_pks:
+        notify_sms_queue()
 
 
 def send_to_sms_queue(queued_sms):
     process_sms.apply_async([queued_sms.pk])
 
 
+SMS_QUEUE_WAKEUP_KEY = 'sms-queue-wakeup'
+
+
+def _get_raw_redis_client():
+    # blpop and ltrim are not available on a django_redis RedisCache object
+    return get_redis_client().client.get_client()
+
+
+def notify_sms_queue():
+    """
+    Wakes up a run_sms_queue dispatcher so that queued messages are claimed
+    right away instead of on its next poll.
+
+    Errors are logged rather than raised: the dispatcher polls the queue
+    anyway, so a failed notification only delays the messages.
+    """
+    try:
+        client = _get_raw_redis_client()
+        client.lpush(SMS_QUEUE_WAKEUP_KEY, 1)
+        # One run of the dispatcher claims everything that is due, so there is
+        # never a need to keep more than one pending notification
+        client.ltrim(SMS_QUEUE_WAKEUP_KEY, 0, 0)
+    except Exception:
+        logger.exception("Could not notify the SMS queue")
+
+
+def wait_for_sms_queue_notification(timeout):
+    """
+    Blocks until notify_sms_queue is called or timeout seconds pass.
+    """
+    _get_raw_redis_client().blpop([SMS_QUEUE_WAKEUP_KEY], timeout=timeout)
+
+
 @no_result_task(queue='background_queue', default_retry_delay=60 * 60,
                 max_retries=23, bind=True)
 def store_billable(self, msg_couch_id):
@@ -2,7 +2,7 @@ import json
 import uuid
 from datetime import datetime
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.test.client import Client
 from django.test.utils import override_settings
 
@@ -1645,3 +1645,15 @@ class SQLMobileBackendMappingTestCase(TestCase):
         backend4.delete()
         backend5.delete()
         backend6.delete()
+
+
+class SendBatchTestCase(SimpleTestCase):
+
+    def test_default_send_batch_sends_one_at_a_time(self):
+        backend = SQLTestSMSBackend()
+        messages = [SMS(phone_number='+9990001'), SMS(phone_number='+9990002'), SMS(phone_number='+9990003')]
+        error = Exception("Gateway error")
+        with patch.object(SQLTestSMSBackend, 'send', side_effect=[None, error, None]) as mock_send:
+            self.assertEqual(backend.send_batch(messages), [None, error, None])
+
+        self.assertEqual([call[0][0] for call in mock_send.call_args_list], messages)
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.test import SimpleTestCase
 from django.test.utils import override_settings
 
 from unittest.mock import Mock, patch
@@ -11,11 +12,14 @@ from dimagi.utils.couch.cache.cache_core import get_redis_client
 
 from corehq.apps.domain.models import Domain
 from corehq.apps.sms.api import incoming, send_sms
+from corehq.apps.sms.management.commands.run_sms_queue import TASK_BATCH_SIZE, SMSEnqueuingOperation
 from corehq.apps.sms.models import SMS, QueuedSMS
 from corehq.apps.sms.tasks import (
     MAX_TRIAL_SMS,
+    OutgoingSMSBatch,
+    notify_sms_queue,
     passes_trial_check,
-    process_sms, get_sms_from_queued_sms, _get_sms_fields_to_copy,
+    process_sms, process_sms_batch, get_sms_from_queued_sms, _get_sms_fields_to_copy,
 )
 from corehq.apps.sms.tests.util import (
     BaseSMSTest,
@@ -148,6 +152,36 @@ class QueueingTestCase(BaseSMSTest):
         self.assertEqual(process_sms_delay_mock.call_count, 0)
         self.assertBillableExists(couch_id)
 
+    def test_claim_queued_sms(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing')
+        queued_sms = self.get_queued_sms()
+
+        claimed = QueuedSMS.claim_queued_sms(10)
+        self.assertEqual(claimed, [(queued_sms.pk, self.domain, 'O', queued_sms.backend_id)])
+        self.assertEqual(QueuedSMS.claim_queued_sms(10), [])
+
+        QueuedSMS.release_claims([queued_sms.pk])
+        self.assertEqual(len(QueuedSMS.claim_queued_sms(10)), 1)
+
+    def test_outgoing_batch(self, process_sms_delay_mock, enqueue_directly_mock):
+        send_sms(self.domain, None, '+999123', 'test outgoing')
+        queued_sms = self.get_queued_sms()
+        couch_id = queued_sms.couch_id
+        QueuedSMS.claim_queued_sms(10)
+
+        with patch_successful_send() as send_mock:
+            process_sms_batch([queued_sms.pk])
+
+        self.assertEqual(send_mock.call_count, 1)
+        self.assertEqual(self.queued_sms_count, 0)
+        self.assertEqual(self.reporting_sms_count, 1)
+
+        reporting_sms = self.get_reporting_sms()
+        self.assertEqual(reporting_sms.processed, True)
+        self.assertEqual(reporting_sms.error, False)
+        self.assertEqual(reporting_sms.couch_id, couch_id)
+        self.assertBillableExists(couch_id)
+
     def test_outgoing_failure(self, process_sms_delay_mock, enqueue_directly_mock):
         timestamp = datetime(2016, 1, 1, 12, 0)
 
@@ -345,3 +379,82 @@ def test_get_sms_from_queued_sms():
     sms = get_sms_from_queued_sms(queued_sms)
     for field, value in test_data.items():
         eq(getattr(sms, field), value, field)
+
+
+def test_notify_sms_queue_error_is_logged():
+    with patch('corehq.apps.sms.tasks._get_raw_redis_client', side_effect=ConnectionError), \
+            patch('corehq.apps.sms.tasks.logger') as logger:
+        notify_sms_queue()
+    eq(logger.exception.call_count, 1)
+
+
+def test_sms_batches_are_capped():
+    rows = [(pk, 'domain', 'O', 'backend1') for pk in range(TASK_BATCH_SIZE + 5)]
+    rows.append((100, 'domain', 'O', 'backend2'))
+    with patch.object(QueuedSMS, 'claim_queued_sms', return_value=rows), \
+            patch.object(QueuedSMS, 'release_claims'), \
+            patch('corehq.apps.sms.management.commands.run_sms_queue.skip_domain', return_value=False), \
+            patch('corehq.apps.sms.management.commands.run_sms_queue.process_sms_batch') as task:
+        SMSEnqueuingOperation().create_tasks()
+
+    batches = [call[0][0] for call in task.delay.call_args_list]
+    eq(sorted(len(batch) for batch in batches), [1, 5, TASK_BATCH_SIZE])
+    eq(sorted(pk for batch in batches for pk in batch), sorted(row[0] for row in rows))
+
+
+@patch('corehq.apps.sms.tasks.passes_trial_check', Mock(return_value=True))
+@patch('corehq.apps.sms.tasks._handle_outgoing_result')
+@patch('corehq.apps.sms.tasks.send_message_via_backend')
+@patch('corehq.apps.sms.tasks.send_messages_via_backend')
+@patch('corehq.apps.sms.tasks._reserve_outgoing_capacity')
+class OutgoingSMSBatchTest(SimpleTestCase):
+
+    def test_messages_are_grouped_by_backend_and_number(self, reserve, send_messages, send_message, handle_result):
+        backend1 = Mock(pk=1)
+        backend2 = Mock(pk=2)
+        messages = [Mock() for i in range(4)]
+        reserve.side_effect = [
+            (backend1, None, None),
+            (backend2, None, None),
+            (backend1, None, None),
+            (backend1, '+15550000', None),
+        ]
+        send_messages.side_effect = lambda msgs, backend, orig_phone_number: [True] * len(msgs)
+
+        batch = OutgoingSMSBatch()
+        for msg in messages:
+            self.assertFalse(batch.add(msg))
+        send_messages.assert_not_called()
+        batch.send()
+
+        sent = {
+            (call[0][1].pk, call[1]['orig_phone_number']): call[0][0]
+            for call in send_messages.call_args_list
+        }
+        self.assertEqual(sent, {
+            (1, None): [messages[0], messages[2]],
+            (2, None): [messages[1]],
+            (1, '+15550000'): [messages[3]],
+        })
+        send_message.assert_not_called()
+        self.assertCountEqual([call[0][0] for call in handle_result.call_args_list], messages)
+
+    def test_no_capacity_is_requeued(self, reserve, send_messages, send_message, handle_result):
+        reserve.return_value = None
+        batch = OutgoingSMSBatch()
+        self.assertTrue(batch.add(Mock()))
+        batch.send()
+        send_messages.assert_not_called()
+        handle_result.assert_not_called()
+
+    def test_connection_slot_is_sent_right_away(self, reserve, send_messages, send_message, handle_result):
+        msg = Mock()
+        lock = Mock()
+        reserve.return_value = (Mock(pk=1), None, lock)
+        send_message.return_value = True
+
+        batch = OutgoingSMSBatch()
+        self.assertFalse(batch.add(msg))
+        handle_result.assert_called_once_with(msg, True, lock)
+        batch.send()
+        send_messages.assert_not_called()
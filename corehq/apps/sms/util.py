@@ -7,6 +7,7 @@ from django.core.exceptions import ValidationError
 from django.db.transaction import atomic
 from django.utils.translation import ugettext as _
 
+import requests
 from couchdbkit import ResourceNotFound
 from memoized import memoized
 
@@ -20,6 +21,24 @@ from corehq.toggles import IS_CONTRACTOR
 from corehq.util.quickcache import quickcache
 
 
+# The number of connections kept alive per gateway host in each process
+SMS_GATEWAY_POOL_SIZE = 10
+
+
+@memoized
+def get_sms_gateway_session():
+    """
+    Returns a requests Session shared by all SMS backends in this process,
+    so that connections to gateways are kept alive and reused between
+    messages instead of being opened for every message.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=SMS_GATEWAY_POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
 class DateFormat(object):
     def __init__(self, human_readable_format, c_standard_format, validate_regex):
         self.human_readable_format = human_readable_format
@@ -44,9 +44,9 @@ class IndicatorAdapter(object):
         except Exception as e:
             self.handle_exception(doc, e)
         else:
-            self._best_effort_save_rows(indicator_rows, doc)
+            self.best_effort_save_rows(indicator_rows, doc)
 
-    def _best_effort_save_rows(self, rows, doc):
+    def best_effort_save_rows(self, rows, doc):
         """
         Like save rows, but should catch errors and log them
         """
@@ -182,6 +182,10 @@ class IndicatorAdapterLoadTracker(object):
         self._track_load(len(rows))
         self.adapter.save_rows(rows, use_shard_col)
 
+    def best_effort_save_rows(self, rows, doc):
+        self._track_load(len(rows))
+        self.adapter.best_effort_save_rows(rows, doc)
+
     def delete(self, doc, use_shard_col=True):
         self._track_load()
         self.adapter.delete(doc, use_shard_col)
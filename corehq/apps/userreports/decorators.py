@@ -35,25 +35,36 @@ def ucr_context_cache(vary_on=()):
     Decorator which caches calculations performed during a UCR EvaluationContext
     The decorated function or method must have a parameter called 'context'
     which will be used by this decorator to store the cache.
+
+    Results must only depend on the ``vary_on`` arguments and the domain of
+    the root document since they are shared with other documents in the same
+    batch when the context has a batch cache.
     """
     def decorator(fn):
         assert 'context' in fn.__code__.co_varnames
         assert isinstance(vary_on, tuple)
 
+        # shamelessly stolen from quickcache
+        prefix = '{}.{}'.format(
+            fn.__name__[:40] + (fn.__name__[40:] and '..'),
+            hashlib.md5(inspect.getsource(fn).encode('utf-8')).hexdigest()[-8:]
+        )
+
+        def get_cache_key(*args, **kwargs):
+            callargs = inspect.getcallargs(fn, *args, **kwargs)
+            return (prefix,) + tuple(callargs[arg_name] for arg_name in vary_on)
+
         @wraps(fn)
         def _inner(*args, **kwargs):
-            # shamelessly stolen from quickcache
             callargs = inspect.getcallargs(fn, *args, **kwargs)
             context = callargs['context']
-            prefix = '{}.{}'.format(
-                fn.__name__[:40] + (fn.__name__[40:] and '..'),
-                hashlib.md5(inspect.getsource(fn).encode('utf-8')).hexdigest()[-8:]
-            )
             cache_key = (prefix,) + tuple(callargs[arg_name] for arg_name in vary_on)
             if context.exists_in_cache(cache_key):
                 return context.get_cache_value(cache_key)
             res = fn(*args, **kwargs)
-            context.set_cache_value(cache_key, res)
+            context.set_batch_cache_value(cache_key, res)
             return res
+
+        _inner.get_cache_key = get_cache_key
         return _inner
     return decorator
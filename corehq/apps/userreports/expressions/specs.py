@@ -527,6 +527,29 @@ class RelatedDocExpressionSpec(JsonObject):
             return None
         return doc
 
+    @classmethod
+    def prefetch_documents(cls, domain, related_doc_type, doc_ids, batch_cache):
+        """Bulk fetch related documents into a batch cache
+
+        Documents that are not found are cached as ``None`` so they are not
+        looked up again by each document in the batch.
+        """
+        doc_ids = [
+            doc_id for doc_id in set(doc_ids)
+            if not batch_cache.contains(domain, cls._get_document.get_cache_key(related_doc_type, doc_id, None))
+        ]
+        if not doc_ids:
+            return
+        document_store = get_document_store_for_doc_type(
+            domain, related_doc_type, load_source="related_doc_expression")
+        docs_by_id = {
+            doc['_id']: doc for doc in document_store.iter_documents(doc_ids)
+            if doc.get('domain') == domain
+        }
+        for doc_id in doc_ids:
+            cache_key = cls._get_document.get_cache_key(related_doc_type, doc_id, None)
+            batch_cache.set(domain, cache_key, docs_by_id.get(doc_id))
+
     def get_value(self, doc_id, context):
         assert context.root_doc['domain']
         doc = self._get_document(self.related_doc_type, doc_id, context)
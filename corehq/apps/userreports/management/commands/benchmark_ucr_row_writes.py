@@ -0,0 +1,73 @@
+import time
+from itertools import islice
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+
+from dimagi.utils.chunked import chunked
+
+from corehq.apps.change_feed.data_sources import (
+    get_document_store_for_doc_type,
+)
+from corehq.apps.userreports.models import get_datasource_config
+from corehq.apps.userreports.sql import adapter as sql_adapter
+from corehq.apps.userreports.sql.adapter import IndicatorSqlAdapter
+
+
+class Command(BaseCommand):
+    help = """
+    Compare the speed of saving a data source's rows with multi-row INSERTs
+    and with COPY. Rows are computed from real documents but written to a
+    scratch copy of the data source table, which is dropped afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('domain')
+        parser.add_argument('data_source_id')
+        parser.add_argument('--docs', type=int, default=10000, help="Number of documents to process")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per save_rows call")
+
+    def handle(self, domain, data_source_id, docs, batch_size, **options):
+        config, _ = get_datasource_config(data_source_id, domain)
+        rows = list(_iter_rows(config, docs))
+        print("Computed {} rows from {} documents".format(len(rows), docs))
+        if not rows:
+            return
+
+        adapter = IndicatorSqlAdapter(config, override_table_name='benchmark_{}'.format(config.table_id)[:50])
+        sql_adapter.build_table(adapter.engine, adapter.get_table())
+        try:
+            for label, threshold in [('INSERT', float('inf')), ('COPY', 0)]:
+                with mock.patch.object(sql_adapter, 'COPY_ROWS_THRESHOLD', threshold):
+                    # run twice so the second run measures updates of existing rows
+                    for run in ['insert', 'update']:
+                        duration = _time_save_rows(adapter, rows, batch_size)
+                        print("{} ({}): {} rows in {:.2f}s ({:.0f} rows/s)".format(
+                            label, run, len(rows), duration, len(rows) / duration
+                        ))
+                with adapter.engine.begin() as connection:
+                    connection.execute(adapter.get_table().delete())
+        finally:
+            adapter.drop_table(source='benchmark_ucr_row_writes', skip_log=True)
+
+
+def _iter_rows(config, num_docs):
+    for case_type_or_xmlns in config.get_case_type_or_xmlns_filter():
+        document_store = get_document_store_for_doc_type(
+            config.domain, config.referenced_doc_type,
+            case_type_or_xmlns=case_type_or_xmlns,
+            load_source="benchmark_ucr_row_writes",
+        )
+        doc_ids = list(islice(document_store.iter_document_ids(), num_docs))
+        for doc in document_store.iter_documents(doc_ids):
+            yield from config.get_all_values(doc)
+        num_docs -= len(doc_ids)
+        if num_docs <= 0:
+            break
+
+
+def _time_save_rows(adapter, rows, batch_size):
+    start = time.time()
+    for batch in chunked(rows, batch_size, list):
+        adapter.save_rows(batch)
+    return time.time() - start
@@ -23,7 +23,8 @@ from corehq.apps.userreports.exceptions import (
 )
 from corehq.apps.userreports.models import AsyncIndicator
 from corehq.apps.userreports.pillow_utils import rebuild_sql_tables
-from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.expressions.specs import RelatedDocExpressionSpec
+from corehq.apps.userreports.specs import BatchCache, EvaluationContext
 from corehq.apps.userreports.util import get_indicator_adapter
 from corehq.pillows.base import is_couch_change_for_sql_domain
 from corehq.util.metrics import metrics_counter, metrics_histogram_timer
@@ -40,6 +41,35 @@ REBUILD_CHECK_INTERVAL = 3 * 60 * 60  # in seconds
 LONG_UCR_LOGGING_THRESHOLD = 0.5
 
 
+def _uses_related_cases(adapters):
+    def _has_related_case_expression(spec):
+        if isinstance(spec, dict):
+            if spec.get('type') == 'related_doc' and spec.get('related_doc_type') == 'CommCareCase':
+                return True
+            return any(_has_related_case_expression(value) for value in spec.values())
+        if isinstance(spec, list):
+            return any(_has_related_case_expression(value) for value in spec)
+        return False
+
+    return any(_has_related_case_expression(adapter.config.to_json()) for adapter in adapters)
+
+
+def prefetch_related_cases(domain, docs, batch_cache):
+    """Bulk fetch the cases indexed by the case documents in a batch
+
+    Sibling cases usually reference the same parent, so fetching each
+    referenced case once up front saves a lookup per child case.
+    """
+    case_ids = {
+        index['referenced_id']
+        for doc in docs if doc.get('doc_type') == 'CommCareCase'
+        for index in doc.get('indices', [])
+        if index.get('referenced_id')
+    }
+    if case_ids:
+        RelatedDocExpressionSpec.prefetch_documents(domain, 'CommCareCase', case_ids, batch_cache)
+
+
 class WarmShutdown(object):
     # modified from https://stackoverflow.com/a/50174144
 
@@ -432,11 +462,16 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
             retry_changes, docs = bulk_fetch_changes_docs(to_update, domain)
         change_exceptions = []
 
+        batch_cache = BatchCache()
+        if _uses_related_cases(adapters):
+            with self._metrics_timer('prefetch_related'):
+                prefetch_related_cases(domain, docs, batch_cache)
+
         with self._metrics_timer('single_batch_transform'):
             for doc in docs:
                 change = changes_by_id[doc['_id']]
                 doc_subtype = change.metadata.document_subtype
-                eval_context = EvaluationContext(doc)
+                eval_context = EvaluationContext(doc, batch_cache=batch_cache)
                 with self._metrics_timer('single_doc_transform'):
                     for adapter in adapters:
                         with self._per_config_metrics_timer('transform', adapter.config._id):
@@ -478,6 +513,9 @@ class ConfigurableReportPillowProcessor(BulkPillowProcessor):
                     except Exception:
                         retry_changes.update(to_update)
 
+        metrics_counter('commcare.ucr.batch_cache.hits', batch_cache.hits)
+        metrics_counter('commcare.ucr.batch_cache.misses', batch_cache.misses)
+
         if async_configs_by_doc_id:
             with self._metrics_timer('async_config_load'):
                 doc_type_by_id = {
@@ -1,4 +1,4 @@
-from collections import namedtuple
+from collections import OrderedDict, namedtuple
 from datetime import datetime
 
 from dimagi.ext.jsonobject import StringProperty
@@ -20,21 +20,76 @@ class FactoryContext(namedtuple('FactoryContext', ('named_expressions', 'named_f
         return FactoryContext({}, {})
 
 
+class BatchCache(object):
+    """
+    A size-bounded cache shared by the evaluation contexts of all documents
+    processed together in a batch, so that lookups made for one document
+    (e.g. the parent case of a child case) are reused by its siblings.
+
+    Values are scoped by domain. The least recently used values are evicted
+    once ``max_size`` is reached.
+    """
+
+    def __init__(self, max_size=2000):
+        self.max_size = max_size
+        self._values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def contains(self, domain, key):
+        # Values are looked up with ``contains`` before ``get``, so hits and
+        # misses are counted here
+        if (domain, key) in self._values:
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def get(self, domain, key, default=None):
+        try:
+            value = self._values[(domain, key)]
+        except KeyError:
+            return default
+        self._values.move_to_end((domain, key))
+        return value
+
+    def set(self, domain, key, value):
+        self._values[(domain, key)] = value
+        self._values.move_to_end((domain, key))
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def __len__(self):
+        return len(self._values)
+
+
 class EvaluationContext(object):
     """
     An evaluation context. Necessary for repeats to pass both the row of the repeat as well
     as the root document and the iteration number.
+
+    An optional ``BatchCache`` can be passed to share cached lookups with
+    the contexts of other documents in the same batch.
     """
 
-    def __init__(self, root_doc, iteration=0):
+    def __init__(self, root_doc, iteration=0, batch_cache=None):
         self.root_doc = root_doc
         self.iteration = iteration
         self.inserted_timestamp = datetime.utcnow()
         self.cache = {}
         self.iteration_cache = {}
+        self.batch_cache = batch_cache
+
+    @property
+    def _domain(self):
+        return self.root_doc.get('domain') if isinstance(self.root_doc, dict) else None
 
     def exists_in_cache(self, key):
-        return key in self.cache or key in self.iteration_cache
+        return (
+            key in self.cache
+            or key in self.iteration_cache
+            or (self.batch_cache is not None and self.batch_cache.contains(self._domain, key))
+        )
 
     def get_cache_value(self, key, default=None):
         if key in self.cache:
@@ -43,11 +98,25 @@ class EvaluationContext(object):
         if key in self.iteration_cache:
             return self.iteration_cache[key]
 
+        if self.batch_cache is not None:
+            return self.batch_cache.get(self._domain, key, default)
+
         return default
 
     def set_cache_value(self, key, value):
         self.cache[key] = value
 
+    def set_batch_cache_value(self, key, value):
+        """Cache a value that does not depend on the root document
+
+        The value is shared with other documents in the batch if there is a
+        batch cache, otherwise it is cached for this document only.
+        """
+        if self.batch_cache is not None:
+            self.batch_cache.set(self._domain, key, value)
+        else:
+            self.cache[key] = value
+
     def set_iteration_cache_value(self, key, value):
         self.iteration_cache[key] = value
 
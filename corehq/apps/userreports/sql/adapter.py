@@ -1,5 +1,7 @@
 import hashlib
 import logging
+from io import StringIO
+from uuid import uuid4
 
 from django.utils.translation import ugettext as _
 
@@ -23,6 +25,9 @@ from corehq.util.test_utils import unit_testing_only
 
 logger = logging.getLogger(__name__)
 
+# save_rows batches with at least this many rows are loaded with COPY
+COPY_ROWS_THRESHOLD = 1000
+
 
 engine_metadata = {}
 
@@ -138,7 +143,7 @@ class IndicatorSqlAdapter(IndicatorAdapter):
 
         return distinct_values, too_many_values
 
-    def _best_effort_save_rows(self, rows, doc):
+    def best_effort_save_rows(self, rows, doc):
         try:
             self.save_rows(rows)
         except Exception as e:
@@ -159,6 +164,10 @@ class IndicatorSqlAdapter(IndicatorAdapter):
         ]
         doc_ids = set(row['doc_id'] for row in formatted_rows)
         table = self.get_table()
+        if len(formatted_rows) >= COPY_ROWS_THRESHOLD:
+            self._copy_rows(table, formatted_rows, upsert=self.supports_upsert() and use_shard_col)
+            return
+
         if self.supports_upsert() and use_shard_col:
             queries = [self._upsert_query(table, formatted_rows)]
         else:
@@ -177,6 +186,60 @@ class IndicatorSqlAdapter(IndicatorAdapter):
             for query in queries:
                 session.execute(query)
 
+    def _copy_rows(self, table, rows, upsert):
+        """
+        Load rows into a temporary table with COPY and merge them into the
+        data source table with one statement, which is much faster than a
+        multi-row INSERT for large batches.
+
+        Has the same semantics as the INSERT paths: rows are upserted on the
+        primary key if ``upsert`` is true, otherwise all existing rows for the
+        given docs are replaced.
+        """
+        row_keys = set().union(*rows)
+        column_names = [column.name for column in table.columns if column.name in row_keys]
+        columns = ', '.join(_quote_identifier(name) for name in column_names)
+        table_name = _quote_identifier(table.name)
+        temp_table_name = _quote_identifier('tmp_ucr_{}'.format(uuid4().hex[:12]))
+
+        if upsert:
+            pk_columns = ', '.join(_quote_identifier(col.name) for col in table.primary_key)
+            updates = ', '.join(
+                '{col} = EXCLUDED.{col}'.format(col=_quote_identifier(name))
+                for name in column_names if not table.c[name].primary_key
+            )
+            merge_statements = [
+                'INSERT INTO {table} ({columns}) SELECT {columns} FROM {temp_table} '
+                'ON CONFLICT ({pk_columns}) DO {action}'.format(
+                    table=table_name, columns=columns, temp_table=temp_table_name, pk_columns=pk_columns,
+                    action='UPDATE SET {}'.format(updates) if updates else 'NOTHING',
+                ),
+            ]
+        else:
+            merge_statements = [
+                'DELETE FROM {table} WHERE doc_id IN (SELECT DISTINCT doc_id FROM {temp_table})'.format(
+                    table=table_name, temp_table=temp_table_name),
+                'INSERT INTO {table} ({columns}) SELECT {columns} FROM {temp_table}'.format(
+                    table=table_name, columns=columns, temp_table=temp_table_name),
+            ]
+
+        with self.session_context() as session:
+            cursor = session.connection().connection.cursor()
+            try:
+                cursor.execute(
+                    'CREATE TEMPORARY TABLE {temp_table} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP'.format(
+                        temp_table=temp_table_name, table=table_name)
+                )
+                cursor.copy_expert(
+                    "COPY {temp_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')".format(
+                        temp_table=temp_table_name, columns=columns),
+                    _rows_to_csv(rows, column_names),
+                )
+                for statement in merge_statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+
     def supports_upsert(self):
         """Return True if supports UPSERTS else False
 
@@ -280,6 +343,10 @@ class MultiDBSqlAdapter(object):
         for adapter in self.all_adapters:
             adapter.save_rows(rows, use_shard_col)
 
+    def best_effort_save_rows(self, rows, doc):
+        for adapter in self.all_adapters:
+            adapter.best_effort_save_rows(rows, doc)
+
     def bulk_save(self, docs):
         for adapter in self.all_adapters:
             adapter.bulk_save(docs)
@@ -323,6 +390,36 @@ class ErrorRaisingMultiDBAdapter(MultiDBSqlAdapter):
     mirror_adapter_cls = ErrorRaisingIndicatorSqlAdapter
 
 
+def _quote_identifier(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _rows_to_csv(rows, column_names):
+    """Serialize rows to CSV for COPY, writing NULL as an unquoted \\N"""
+    buffer = StringIO()
+    for row in rows:
+        buffer.write(','.join(_to_csv_value(row.get(name)) for name in column_names))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def _to_csv_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, (list, tuple)):
+        value = _to_array_literal(value)
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+
+def _to_array_literal(values):
+    def _element(value):
+        if value is None:
+            return 'NULL'
+        return '"{}"'.format(str(value).replace('\\', '\\\\').replace('"', '\\"'))
+    return '{{{}}}'.format(','.join(_element(value) for value in values))
+
+
 def get_indicator_table(indicator_config, metadata, override_table_name=None):
     sql_columns = [column_to_sql(col) for col in indicator_config.get_columns()]
     table_name = override_table_name or get_table_name(indicator_config.domain, indicator_config.table_id)
@@ -15,7 +15,12 @@ from celery.schedules import crontab
 from celery.task import periodic_task, task
 from couchdbkit import ResourceConflict, ResourceNotFound
 from corehq.util.es.elasticsearch import ConnectionTimeout
-from corehq.util.metrics import metrics_counter, metrics_gauge, metrics_histogram_timer
+from corehq.util.metrics import (
+    metrics_counter,
+    metrics_gauge,
+    metrics_histogram,
+    metrics_histogram_timer,
+)
 from corehq.util.metrics.const import MPM_MAX, MPM_MIN, MPM_LIVESUM
 from corehq.util.queries import paginated_queryset
 
@@ -55,7 +60,7 @@ from corehq.apps.userreports.rebuild import DataSourceResumeHelper
 from corehq.apps.userreports.reports.data_source import (
     ConfigurableReportDataSource,
 )
-from corehq.apps.userreports.specs import EvaluationContext
+from corehq.apps.userreports.specs import BatchCache, EvaluationContext
 from corehq.apps.userreports.util import (
     get_async_indicator_modify_lock_key,
     get_indicator_adapter,
@@ -79,14 +84,34 @@ def _get_config_by_id(indicator_config_id):
 def _build_indicators(config, document_store, relevant_ids):
     adapter = get_indicator_adapter(config, raise_errors=True, load_source='build_indicators')
 
+    rows_by_doc_id = {}
+    docs_by_id = {}
     for doc in document_store.iter_documents(relevant_ids):
         if config.asynchronous:
             AsyncIndicator.update_record(
                 doc.get('_id'), config.referenced_doc_type, config.domain, [config._id]
             )
         else:
-            # save is a noop if the filter doesn't match
-            adapter.best_effort_save(doc)
+            try:
+                rows = adapter.get_all_values(doc)
+            except Exception as e:
+                adapter.handle_exception(doc, e)
+            else:
+                # no rows if the filter doesn't match
+                if rows:
+                    rows_by_doc_id[doc['_id']] = rows
+                    docs_by_id[doc['_id']] = doc
+
+    if not rows_by_doc_id:
+        return
+
+    # save all rows for the chunk at once so large chunks are loaded with COPY
+    try:
+        adapter.save_rows([row for rows in rows_by_doc_id.values() for row in rows])
+    except Exception:
+        # fall back to saving docs one by one so that one bad doc doesn't fail the chunk
+        for doc_id, rows in rows_by_doc_id.items():
+            adapter.best_effort_save_rows(rows, docs_by_id[doc_id])
 
 
 @serial_task('{indicator_config_id}', default_retry_delay=60 * 10, timeout=3 * 60 * 60, max_retries=20, queue=UCR_CELERY_QUEUE, ignore_result=True)
@@ -459,10 +484,6 @@ def build_async_indicators(indicator_doc_ids):
         if not all_indicators:
             return
 
-        doc_store = get_document_store_for_doc_type(
-            all_indicators[0].domain, all_indicators[0].doc_type,
-            load_source="build_async_indicators",
-        )
         failed_indicators = set()
 
         rows_to_save_by_adapter = defaultdict(list)
@@ -470,10 +491,13 @@ def build_async_indicators(indicator_doc_ids):
         # there will always be one AsyncIndicator per doc id
         indicator_by_doc_id = {i.doc_id: i for i in all_indicators}
         config_ids = set()
+        num_docs = 0
+        batch_cache = BatchCache()
         with timer:
-            for doc in doc_store.iter_documents(list(indicator_by_doc_id.keys())):
+            for doc in _iter_indicator_documents(all_indicators, _metrics_timer):
+                num_docs += 1
                 indicator = indicator_by_doc_id[doc['_id']]
-                eval_context = EvaluationContext(doc)
+                eval_context = EvaluationContext(doc, batch_cache=batch_cache)
                 for config_id in indicator.indicator_config_ids:
                     with _metrics_timer('transform', config_id):
                         config_ids.add(config_id)
@@ -509,13 +533,13 @@ def build_async_indicators(indicator_doc_ids):
                         with _metrics_timer('update', adapter.config._id):
                             adapter.save_rows(rows, use_shard_col=True)
                     except Exception as e:
-                        failed_indicators.union(indicators)
+                        failed_indicators.update(indicators)
                         message = str(e)
                         notify_exception(None, "Exception bulk saving async indicators:{}".format(message))
                     else:
                         # remove because it's successfully processed
                         _mark_config_to_remove(
-                            config_id,
+                            adapter.config._id,
                             [i.pk for i in indicators]
                         )
 
@@ -546,6 +570,30 @@ def build_async_indicators(indicator_doc_ids):
             'commcare.async_indicator.processed_total', len(indicator_doc_ids),
             tags={'config_ids': config_ids}
         )
+        if timer.duration:
+            metrics_histogram(
+                'commcare.async_indicator.docs_per_second', num_docs / timer.duration,
+                bucket_tag='docs_per_second', buckets=(1, 5, 10, 50, 100, 500), bucket_unit='',
+            )
+
+
+def _iter_indicator_documents(indicators, metrics_timer):
+    """Fetch the documents for a batch of indicators
+
+    Documents are fetched with one bulk call per (domain, doc_type) since a
+    batch of indicators is not guaranteed to share a doc type.
+    """
+    doc_ids_by_source = defaultdict(list)
+    for indicator in indicators:
+        doc_ids_by_source[(indicator.domain, indicator.doc_type)].append(indicator.doc_id)
+
+    for (domain, doc_type), doc_ids in doc_ids_by_source.items():
+        doc_store = get_document_store_for_doc_type(
+            domain, doc_type, load_source="build_async_indicators",
+        )
+        with metrics_timer('fetch'):
+            docs = list(doc_store.iter_documents(doc_ids))
+        yield from docs
 
 
 @periodic_task(run_every=crontab(minute="*/5"), queue=settings.CELERY_PERIODIC_QUEUE)
@@ -10,6 +10,7 @@ from corehq.apps.userreports.models import (
     AsyncIndicator,
     DataSourceConfiguration,
 )
+from corehq.apps.userreports.sql.adapter import IndicatorSqlAdapter
 from corehq.apps.userreports.tasks import build_async_indicators, queue_async_indicators
 from corehq.apps.userreports.tests.utils import load_data_from_db
 from corehq.apps.userreports.util import get_indicator_adapter, get_table_name
@@ -275,3 +276,58 @@ class BulkAsyncIndicatorProcessingTest(TestCase):
             mock.call('commcare.async_indicator.processed_success', 0),
             mock.call('commcare.async_indicator.processed_fail', 10)
         ])
+
+    def test_failed_save(self):
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids
+        ).update(indicator_config_ids=[self.config1._id])
+        with mock.patch.object(IndicatorSqlAdapter, 'save_rows') as save_rows:
+            save_rows.side_effect = Exception("Some random exception")
+            build_async_indicators(self.doc_ids)
+
+        # the failed indicators are kept so that they are retried
+        self.assertEqual(
+            AsyncIndicator.objects.filter(indicator_config_ids=[self.config1._id]).count(),
+            10
+        )
+        self.datadog_patch.assert_has_calls([
+            mock.call('commcare.async_indicator.processed_success', 0),
+            mock.call('commcare.async_indicator.processed_fail', 10)
+        ])
+
+    def test_partially_failed_save(self):
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids
+        ).update(indicator_config_ids=[self.config1._id, self.config2._id])
+
+        def save_rows(adapter, rows, use_shard_col=True):
+            if adapter.config._id == self.config2._id:
+                raise Exception("Some random exception")
+
+        with mock.patch.object(IndicatorSqlAdapter, 'save_rows', autospec=True, side_effect=save_rows):
+            build_async_indicators(self.doc_ids)
+
+        # only the config that failed to save should be left to retry
+        self.assertEqual(
+            AsyncIndicator.objects.filter(indicator_config_ids=[self.config2._id]).count(),
+            10
+        )
+
+    def test_mixed_doc_types(self):
+        AsyncIndicator.objects.filter(
+            doc_id__in=self.doc_ids[5:]
+        ).update(doc_type='XFormInstance')
+        with mock.patch('corehq.apps.userreports.tasks.get_document_store_for_doc_type') as get_doc_store:
+            get_doc_store.return_value.iter_documents.return_value = []
+            build_async_indicators(self.doc_ids)
+
+        self.assertEqual(
+            {call[0] for call in get_doc_store.call_args_list},
+            {(self.domain.name, 'CommCareCase'), (self.domain.name, 'XFormInstance')}
+        )
+        fetched_ids = [
+            doc_id
+            for call in get_doc_store.return_value.iter_documents.call_args_list
+            for doc_id in call[0][0]
+        ]
+        self.assertEqual(sorted(fetched_ids), sorted(self.doc_ids))
@@ -0,0 +1,34 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from corehq.apps.userreports.sql.adapter import _rows_to_csv
+
+
+class RowsToCsvTest(SimpleTestCase):
+
+    def test_values(self):
+        rows = [
+            {'doc_id': 'abc', 'count': 3, 'amount': Decimal('1.50'), 'name': None},
+            {'doc_id': 'def', 'count': None, 'amount': None, 'name': 'say "hi", \\N'},
+        ]
+        csv = _rows_to_csv(rows, ['doc_id', 'count', 'amount', 'name']).read()
+        self.assertEqual(csv, (
+            '"abc","3","1.50",\\N\n'
+            '"def",\\N,\\N,"say ""hi"", \\N"\n'
+        ))
+
+    def test_dates(self):
+        rows = [{'day': date(2021, 3, 4), 'time': datetime(2021, 3, 4, 5, 6, 7)}]
+        csv = _rows_to_csv(rows, ['day', 'time']).read()
+        self.assertEqual(csv, '"2021-03-04","2021-03-04 05:06:07"\n')
+
+    def test_missing_column_is_null(self):
+        csv = _rows_to_csv([{'doc_id': 'abc'}], ['doc_id', 'name']).read()
+        self.assertEqual(csv, '"abc",\\N\n')
+
+    def test_arrays(self):
+        rows = [{'tags': ['a', None, 'b "c"', 'd\\e']}]
+        csv = _rows_to_csv(rows, ['tags']).read()
+        self.assertEqual(csv, '"{""a"",NULL,""b \\""c\\"""",""d\\\\e""}"\n')
@@ -22,7 +22,7 @@ from corehq.apps.userreports.expressions.specs import (
     PropertyPathGetterSpec,
     eval_statements,
 )
-from corehq.apps.userreports.specs import EvaluationContext, FactoryContext
+from corehq.apps.userreports.specs import BatchCache, EvaluationContext, FactoryContext
 from corehq.apps.users.models import CommCareUser
 from corehq.form_processor.exceptions import CaseNotFound
 from corehq.form_processor.interfaces.dbaccessors import FormAccessors, CaseAccessors
@@ -1424,6 +1424,51 @@ class TestEvaluationContext(SimpleTestCase):
         fn_that_should_be_cached(3, context)
         self.assertEqual(counter.call_count, 3)
 
+    def test_cached_function_shared_across_batch(self):
+        counter = MagicMock()
+
+        @ucr_context_cache(vary_on=('arg1',))
+        def fn_that_should_be_cached(arg1, context):
+            counter()
+
+        batch_cache = BatchCache()
+        fn_that_should_be_cached(2, EvaluationContext({'domain': 'a'}, batch_cache=batch_cache))
+        fn_that_should_be_cached(2, EvaluationContext({'domain': 'a'}, batch_cache=batch_cache))
+        self.assertEqual(counter.call_count, 1)
+        fn_that_should_be_cached(2, EvaluationContext({'domain': 'b'}, batch_cache=batch_cache))
+        self.assertEqual(counter.call_count, 2)
+
+
+class TestBatchCache(SimpleTestCase):
+
+    def test_get_set(self):
+        cache = BatchCache()
+        cache.set('domain', ('k1',), 'v1')
+        self.assertTrue(cache.contains('domain', ('k1',)))
+        self.assertEqual(cache.get('domain', ('k1',)), 'v1')
+        self.assertFalse(cache.contains('other-domain', ('k1',)))
+        self.assertIsNone(cache.get('other-domain', ('k1',)))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_context_lookups_are_counted(self):
+        cache = BatchCache()
+        context = EvaluationContext({'domain': 'domain'}, batch_cache=cache)
+        self.assertFalse(context.exists_in_cache('k1'))
+        context.set_batch_cache_value('k1', 'v1')
+        self.assertTrue(context.exists_in_cache('k1'))
+        self.assertEqual(context.get_cache_value('k1'), 'v1')
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = BatchCache(max_size=2)
+        cache.set('domain', 'k1', 'v1')
+        cache.set('domain', 'k2', 'v2')
+        cache.get('domain', 'k1')
+        cache.set('domain', 'k3', 'v3')
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.contains('domain', 'k1'))
+        self.assertFalse(cache.contains('domain', 'k2'))
+
 
 class SplitStringExpressionTest(SimpleTestCase):
 
@@ -1,4 +1,5 @@
 import uuid
+from unittest.mock import patch
 
 from django.test import TestCase, override_settings
 
@@ -131,3 +132,37 @@ class AdapterBulkSaveTest(TestCase):
     def test_save_rows_empty(self):
         self.adapter.build_table()
         self.adapter.save_rows([])
+
+    def _get_docs(self, ids, name):
+        return [{
+            "_id": str(i),
+            "domain": self.domain,
+            "doc_type": "CommCareCase",
+            "name": '{}_{}'.format(name, i)
+        } for i in ids]
+
+    def _get_names_by_doc_id(self):
+        return {row.doc_id: row.name for row in self.adapter.get_query_object()}
+
+    @patch('corehq.apps.userreports.sql.adapter.COPY_ROWS_THRESHOLD', 2)
+    def test_copy_rows_upsert(self):
+        self.adapter.build_table()
+        self.adapter.bulk_save(self._get_docs(range(5), 'old'))
+        self.adapter.bulk_save(self._get_docs(range(3, 8), 'new'))
+        self.assertEqual(self._get_names_by_doc_id(), {
+            '0': 'old_0', '1': 'old_1', '2': 'old_2',
+            '3': 'new_3', '4': 'new_4', '5': 'new_5', '6': 'new_6', '7': 'new_7',
+        })
+
+    @patch('corehq.apps.userreports.sql.adapter.COPY_ROWS_THRESHOLD', 2)
+    def test_copy_rows_replace(self):
+        self.adapter.build_table()
+        self.adapter.bulk_save(self._get_docs(range(5), 'old'))
+        rows = []
+        for doc in self._get_docs(range(3, 8), 'new'):
+            rows.extend(self.adapter.get_all_values(doc))
+        self.adapter.save_rows(rows, use_shard_col=False)
+        self.assertEqual(self._get_names_by_doc_id(), {
+            '0': 'old_0', '1': 'old_1', '2': 'old_2',
+            '3': 'new_3', '4': 'new_4', '5': 'new_5', '6': 'new_6', '7': 'new_7',
+        })
@@ -1690,6 +1690,7 @@ class CommCareUser(CouchUser, SingleMembershipMixin, CommCareMobileContactMixin)
         from corehq.apps.users.dbaccessors import get_practice_mode_mobile_workers
         self.get_usercase_id.clear(self)
         get_loadtest_factor_for_user.clear(self.domain, self.user_id)
+        clear_case_sharing_group_ids(self)
 
         if self._is_demo_user_cached_value_is_stale():
             get_practice_mode_mobile_workers.clear(self.domain)
@@ -1811,7 +1812,7 @@ class CommCareUser(CouchUser, SingleMembershipMixin, CommCareMobileContactMixin)
 
     def get_owner_ids(self, domain=None):
         owner_ids = [self.user_id]
-        owner_ids.extend([g._id for g in self.get_case_sharing_groups()])
+        owner_ids.extend(sorted(get_case_sharing_group_ids(self)))
         return owner_ids
 
     def unretire(self, unretired_by_domain, unretired_by, unretired_via=None):
@@ -2345,6 +2346,32 @@ def update_fixture_status_for_users(user_ids, fixture_type):
         get_fixture_statuses.clear(user_id)
 
 
+def get_case_sharing_group_ids(user):
+    """
+    Get the ids of the user's case sharing groups (including location groups)
+    as a frozenset.
+
+    The result is cached until the user is saved, or a group, location or
+    location type in the user's domain changes.
+    """
+    from corehq.apps.groups.models import get_group_version
+    from corehq.apps.locations.models import get_location_version
+    return _get_case_sharing_group_ids(
+        user, get_location_version(user.domain), get_group_version(user.domain))
+
+
+def clear_case_sharing_group_ids(user):
+    from corehq.apps.groups.models import get_group_version
+    from corehq.apps.locations.models import get_location_version
+    _get_case_sharing_group_ids.clear(
+        user, get_location_version(user.domain), get_group_version(user.domain))
+
+
+@quickcache(['user.domain', 'user.user_id', 'location_version', 'group_version'], timeout=60 * 60)
+def _get_case_sharing_group_ids(user, location_version, group_version):
+    return frozenset(group._id for group in user.get_case_sharing_groups())
+
+
 @quickcache(['user_id'], skip_arg=lambda user_id: settings.UNIT_TESTING)
 def get_fixture_statuses(user_id):
     from corehq.apps.fixtures.models import UserFixtureType, UserFixtureStatus
@@ -15,6 +15,7 @@ from corehq.util.es.elasticsearch import (
     SerializationError,
 )
 from corehq.util.es.interface import ElasticsearchInterface
+from corehq.util.es.profiling import profile_es_request
 from corehq.util.files import TransientTempfile
 from corehq.util.json import CommCareJSONEncoder
 from corehq.util.metrics import metrics_counter
@@ -159,12 +160,38 @@ def run_query(index_cname, q, debug_host=None, es_instance_alias=ES_DEFAULT_INST
     es_interface = ElasticsearchInterface(es_instance)
 
     index_info = registry_entry(index_cname)
-    try:
-        results = es_interface.search(index_info.alias, index_info.type, body=q)
-        report_and_fail_on_shard_failures(results)
+    with profile_es_request('search', index_cname, q) as profile:
+        try:
+            results = es_interface.search(index_info.alias, index_info.type, body=q)
+            profile.add_results(results)
+            report_and_fail_on_shard_failures(results)
+            return results
+        except ElasticsearchException as e:
+            raise ESError(e)
+
+
+def run_multi_query(index_cname, queries):
+    """Runs several queries against an index in a single request
+
+    Returns the results of each query, in the same order as `queries`
+    """
+    if not queries:
+        return []
+
+    es_interface = ElasticsearchInterface(get_es_new())
+    index_info = registry_entry(index_cname)
+    with profile_es_request('msearch', index_cname, queries) as profile:
+        try:
+            results = es_interface.msearch(index_info.alias, index_info.type, queries)
+        except ElasticsearchException as e:
+            raise ESError(e)
+        for result in results:
+            profile.add_results(result)
+        for result in results:
+            if 'error' in result:
+                raise ESError(result['error'])
+            report_and_fail_on_shard_failures(result)
         return results
-    except ElasticsearchException as e:
-        raise ESError(e)
 
 
 def mget_query(index_cname, ids):
@@ -173,10 +200,13 @@ def mget_query(index_cname, ids):
 
     es_interface = ElasticsearchInterface(get_es_new())
     index_info = registry_entry(index_cname)
-    try:
-        return es_interface.get_bulk_docs(index_info.alias, index_info.type, ids)
-    except ElasticsearchException as e:
-        raise ESError(e)
+    with profile_es_request('mget', index_cname, {'ids': ids}) as profile:
+        try:
+            docs = es_interface.get_bulk_docs(index_info.alias, index_info.type, ids)
+        except ElasticsearchException as e:
+            raise ESError(e)
+        profile.hits = len(docs)
+        return docs
 
 
 def iter_es_docs(index_cname, ids):
@@ -222,20 +252,25 @@ def scroll_query(index_cname, query, es_instance_alias=ES_DEFAULT_INSTANCE, **kw
         raise ValueError(f"invalid keyword args: {set(kw) - valid_kw}")
     index_info = registry_entry(index_cname)
     es_interface = ElasticsearchInterface(get_es_instance(es_instance_alias))
-    try:
-        for results in es_interface.iter_scroll(index_info.alias, index_info.type,
-                                                body=query, **kw):
-            report_and_fail_on_shard_failures(results)
-            for hit in results["hits"]["hits"]:
-                yield hit
-    except ElasticsearchException as e:
-        raise ESError(e)
+    with profile_es_request('scroll', index_cname, query) as profile:
+        try:
+            for results in es_interface.iter_scroll(index_info.alias, index_info.type,
+                                                    body=query, **kw):
+                profile.add_results(results)
+                report_and_fail_on_shard_failures(results)
+                with profile.paused():
+                    for hit in results["hits"]["hits"]:
+                        yield hit
+        except ElasticsearchException as e:
+            raise ESError(e)
 
 
 def count_query(index_cname, q):
     index_info = registry_entry(index_cname)
     es_interface = ElasticsearchInterface(get_es_new())
-    return es_interface.count(index_info.alias, index_info.type, q)
+    with profile_es_request('count', index_cname, q) as profile:
+        profile.hits = es_interface.count(index_info.alias, index_info.type, q)
+        return profile.hits
 
 
 class ScanResult(object):
@@ -10,7 +10,8 @@ import sys
 
 from sentry_sdk import configure_scope
 
-from corehq.util.metrics import metrics_counter, metrics_gauge
+from corehq.util.es.profiling import set_es_caller
+from corehq.util.metrics import metrics_counter, metrics_gauge, metrics_histogram
 from corehq.util.metrics.const import MPM_MAX
 from corehq.util.timer import TimingContext
 from dimagi.utils.logging import notify_exception
@@ -107,6 +108,7 @@ class PillowBase(metaclass=ABCMeta):
         pillow_logging.info("Starting pillow %s" % self.__class__)
         with configure_scope() as scope:
             scope.set_tag("pillow_name", self.get_name())
+        set_es_caller("pillow:{}".format(self.get_name()))
         if self.is_dedicated_migration_process:
             for processor in self.processors:
                 processor.bootstrap_if_needed()
@@ -210,11 +212,11 @@ class PillowBase(metaclass=ABCMeta):
             for change in chunk:
                 self.process_with_error_handling(change, processor)
 
+        changes_chunk = self._coalesce_changes(changes_chunk)
         for processor in self.batch_processors:
             if not changes_chunk:
                 return set(), 0
 
-            changes_chunk = self._deduplicate_changes(changes_chunk)
             timer = TimingContext()
             with timer:
                 try:
@@ -389,14 +391,38 @@ class PillowBase(metaclass=ABCMeta):
                 metrics_counter('commcare.change_feed.processing_time.total', processing_time, tags=tags)
                 metrics_counter('commcare.change_feed.processing_time.count', tags=tags)
 
+    def _coalesce_changes(self, changes_chunk):
+        """
+        Drops all but the latest change to each document in the chunk,
+        so that documents changed many times are only processed once.
+        Checkpoints are unaffected since they are set from the last change
+        received rather than the last change processed.
+        """
+        unique = self._deduplicate_changes(changes_chunk)
+        if changes_chunk:
+            duplicate_percent = 100 * (len(changes_chunk) - len(unique)) / len(changes_chunk)
+            metrics_histogram(
+                'commcare.change_feed.chunked.duplicate_changes', duplicate_percent,
+                bucket_tag='duplicate_percent', buckets=[1, 5, 10, 25, 50, 75], bucket_unit='%',
+                tags={'pillow_name': self.get_name()},
+            )
+        return unique
+
     @staticmethod
     def _deduplicate_changes(changes_chunk):
+        """
+        Keeps the latest change for each (data source, document ID). The
+        latest change reflects the current state of the document,
+        including whether it was deleted.
+        """
         seen = set()
         unique = []
         for change in reversed(changes_chunk):
-            if change.id not in seen:
+            data_source = change.metadata.data_source_name if change.metadata else None
+            key = (data_source, change.id)
+            if key not in seen:
                 unique.append(change)
-                seen.add(change.id)
+                seen.add(key)
         unique.reverse()
         return unique
 
@@ -139,6 +139,10 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
       - ES
     """
 
+    # limits on the size of each request sent to the ES bulk API
+    bulk_chunk_size = 500
+    bulk_max_chunk_bytes = 100 * 1024 * 1024
+
     def process_changes_chunk(self, changes_chunk):
         if self.change_filter_fn:
             changes_chunk = [
@@ -165,7 +169,8 @@ class BulkElasticProcessor(ElasticProcessor, BulkPillowProcessor):
         try:
             with self._datadog_timing('bulk_load'):
                 _, errors = self.es_interface.bulk_ops(
-                    es_actions, raise_on_error=False, raise_on_exception=False)
+                    es_actions, raise_on_error=False, raise_on_exception=False,
+                    chunk_size=self.bulk_chunk_size, max_chunk_bytes=self.bulk_max_chunk_bytes)
         except Exception as e:
             pillow_logging.exception("[%s] ES bulk load error")
             error_changes.extend([
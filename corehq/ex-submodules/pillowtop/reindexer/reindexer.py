@@ -19,6 +19,7 @@ from corehq.util.doc_processor.interface import (
     BaseDocProcessor,
     BulkDocProcessor,
 )
+from dimagi.utils.chunked import chunked
 
 MAX_TRIES = 3
 RETRY_TIME_DELAY_FACTOR = 15
@@ -124,11 +125,20 @@ class ReindexerFactory(metaclass=ABCMeta):
 class PillowChangeProviderReindexer(Reindexer):
     start_from = None
 
-    def __init__(self, pillow_or_processor, change_provider):
+    def __init__(self, pillow_or_processor, change_provider, chunk_size=None):
+        """
+        :param chunk_size: if set and the processor supports batch processing,
+            changes are passed to the processor in chunks of this size
+        """
         self.pillow_or_processor = pillow_or_processor
         self.change_provider = change_provider
+        self.chunk_size = chunk_size
 
     def reindex(self):
+        if self.chunk_size and getattr(self.pillow_or_processor, 'supports_batch_processing', False):
+            self._reindex_in_chunks()
+            return
+
         for i, change in enumerate(self.change_provider.iter_all_changes()):
             try:
                 # below works because signature is same for pillow and processor
@@ -139,6 +149,27 @@ class PillowChangeProviderReindexer(Reindexer):
             if i % 1000 == 0:
                 pillow_logging.info("Processed %s docs", i)
 
+    def _reindex_in_chunks(self):
+        processor = self.pillow_or_processor
+        processed = 0
+        for changes_chunk in chunked(self.change_provider.iter_all_changes(), self.chunk_size, list):
+            try:
+                retry_changes, error_changes = processor.process_changes_chunk(changes_chunk)
+            except Exception:
+                pillow_logging.exception("Unable to process chunk of changes, processing serially")
+                retry_changes, error_changes = changes_chunk, []
+
+            for change in retry_changes:
+                try:
+                    processor.process_change(change)
+                except Exception:
+                    pillow_logging.exception("Unable to process change: %s", change.id)
+            for change, exception in error_changes:
+                pillow_logging.error("Unable to process change %s: %s", change.id, exception)
+
+            processed += len(changes_chunk)
+            pillow_logging.info("Processed %s docs", processed)
+
 
 def clean_index(es, index_info):
     if es.indices.exists(index_info.index):
@@ -15,6 +15,7 @@ from corehq.form_processor.tests.utils import (
     sharded,
 )
 from corehq.pillows.base import is_couch_change_for_sql_domain
+from corehq.pillows.case_search import BulkCaseSearchPillowProcessor
 from corehq.util.context_managers import drop_connected_signals
 from corehq.util.elastic import ensure_index_deleted
 from corehq.util.es.interface import ElasticsearchInterface
@@ -44,6 +45,53 @@ class BulkTest(SimpleTestCase):
             [(3, 'a'), (2, 'b'), (4, 'a'), (1, 'b')]
         )
 
+    def test_deduplicate_changes_by_data_source(self):
+        def _change(doc_id, seq, data_source, is_deletion=False):
+            metadata = ChangeMeta(
+                document_id=doc_id, data_source_type='sql', data_source_name=data_source,
+                is_deletion=is_deletion,
+            )
+            return Change(doc_id, seq, deleted=is_deletion, metadata=metadata)
+
+        changes = [
+            _change(1, 'a', 'case-sql'),
+            _change(1, 'b', 'form-sql'),
+            _change(1, 'c', 'case-sql', is_deletion=True),
+            _change(2, 'd', 'case-sql'),
+        ]
+        deduped = PillowBase._deduplicate_changes(changes)
+        self.assertEqual(
+            [(change.id, change.sequence_id, change.deleted) for change in deduped],
+            [(1, 'b', False), (1, 'c', True), (2, 'd', False)]
+        )
+
+    def test_case_search_processor_filters_domains(self):
+        def _change(doc_id, domain):
+            metadata = ChangeMeta(
+                document_id=doc_id, data_source_type='sql', data_source_name='case-sql', domain=domain,
+            )
+            return Change(doc_id, doc_id, metadata=metadata)
+
+        processor = BulkCaseSearchPillowProcessor(Mock(), TEST_INDEX_INFO)
+        changes = [_change('1', 'search'), _change('2', 'no-search'), _change('3', 'search')]
+        with patch('corehq.pillows.case_search.domains_needing_search_index', return_value={'search'}), \
+                patch.object(BulkElasticProcessor, 'process_changes_chunk', return_value=([], [])) as process:
+            processor.process_changes_chunk(changes)
+            processor.process_changes_chunk(changes[1:2])
+        process.assert_called_once_with([changes[0], changes[2]])
+
+    def test_bulk_fetch_without_document_store(self):
+        # as made by reindexers' change providers
+        changes = [
+            Change(doc_id, None, document={'_id': doc_id}, document_store=None, metadata=ChangeMeta(
+                document_id=doc_id, data_source_type='sql', data_source_name='case-sql', domain='domain',
+            ))
+            for doc_id in ('1', '2')
+        ]
+        bad_changes, docs = bulk_fetch_changes_docs(changes, 'domain')
+        self.assertEqual(bad_changes, set())
+        self.assertEqual(docs, [{'_id': '1'}, {'_id': '2'}])
+
     def test_get_errors_with_ids(self):
         errors = get_errors_with_ids([
             {'index': {'_id': 1, 'status': 500, 'error': 'e1'}},
@@ -330,9 +330,10 @@ def bulk_fetch_changes_docs(changes, domain=None):
     for _, _changes in changes_by_doctype.items():
         doc_store = _changes[0].document_store
         doc_ids_to_query = [change.id for change in _changes if change.should_fetch_document()]
-        new_docs = list(doc_store.iter_documents(doc_ids_to_query))
-        docs_queried_prior = [change.document for change in _changes if change.document]
-        docs.extend(new_docs + docs_queried_prior)
+        if doc_ids_to_query and doc_store is not None:
+            docs.extend(doc_store.iter_documents(doc_ids_to_query))
+        # changes from reindexers come with their documents, and no document store
+        docs.extend(change.document for change in _changes if change.document)
 
     # catch missing docs
     bad_changes = set()
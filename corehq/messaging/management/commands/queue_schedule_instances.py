@@ -1,7 +1,8 @@
 from corehq.apps.domain_migration_flags.api import any_migrations_in_progress
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
-    get_active_schedule_instance_ids,
-    get_active_case_schedule_instance_ids,
+    SCHEDULE_INSTANCE_CLAIM_TIMEOUT,
+    claim_due_schedule_instances,
+    release_schedule_instance_claims,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.models import (
     AlertScheduleInstance,
@@ -10,18 +11,22 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
     CaseTimedScheduleInstance,
 )
 from corehq.messaging.scheduling.tasks import (
-    handle_alert_schedule_instance,
-    handle_timed_schedule_instance,
-    handle_case_alert_schedule_instance,
-    handle_case_timed_schedule_instance,
+    handle_schedule_instances,
+    handle_case_schedule_instances,
+)
+from corehq.sql_db.util import (
+    get_db_aliases_for_partitioned_query,
+    get_default_and_partitioned_db_aliases,
+    handle_connection_failure,
 )
-from corehq.sql_db.util import handle_connection_failure, get_default_and_partitioned_db_aliases
 from datetime import datetime
-from dimagi.utils.couch import get_redis_lock
 from dimagi.utils.logging import notify_exception
 from django.core.management.base import BaseCommand
 from time import sleep
 
+# The number of schedule instances claimed at a time and handed to one task
+BATCH_SIZE = 500
+
 
 def skip_domain(domain):
     return any_migrations_in_progress(domain)
@@ -31,62 +36,51 @@ class Command(BaseCommand):
     """
     Based on our commcare-cloud code, there will be one instance of this
     command running on every machine that has a celery worker which
-    consumes from the reminder_queue. This is ok because this process uses
-    locks to ensure items are only enqueued once, and it's what is desired
-    in order to more efficiently spawn the needed celery tasks.
+    consumes from the reminder_queue. This is ok because schedule instances
+    are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    dispatchers never enqueue the same instance twice, and it's what is
+    desired in order to more efficiently spawn the needed celery tasks.
     """
     help = "Spawns tasks to process schedule instances"
 
-    def get_task(self, cls):
-        task = {
-            AlertScheduleInstance: handle_alert_schedule_instance,
-            TimedScheduleInstance: handle_timed_schedule_instance,
-            CaseAlertScheduleInstance: handle_case_alert_schedule_instance,
-            CaseTimedScheduleInstance: handle_case_timed_schedule_instance,
-        }.get(cls)
+    def create_tasks_for_db(self, cls, db_alias, due_before):
+        is_case_schedule_instance = cls in (CaseAlertScheduleInstance, CaseTimedScheduleInstance)
+        skipped_ids = []
+
+        while True:
+            # identifies this claim to the task, in case the claim expires
+            # before the task runs and the instances are claimed again
+            claimed_until = datetime.utcnow() + SCHEDULE_INSTANCE_CLAIM_TIMEOUT
+            rows = claim_due_schedule_instances(cls, db_alias, due_before, batch_size=BATCH_SIZE,
+                                                claimed_until=claimed_until)
+            batch = []
+            for row in rows:
+                if skip_domain(row[0]):
+                    skipped_ids.append(row[-1])
+                else:
+                    batch.append(row[1:] if is_case_schedule_instance else row[1])
 
-        if task:
-            return task
+            if batch:
+                if is_case_schedule_instance:
+                    handle_case_schedule_instances.delay(cls, db_alias, batch)
+                else:
+                    handle_schedule_instances.delay(cls, db_alias, batch, claimed_until)
 
-        raise ValueError("Unexpected class: %s" % cls)
+            if len(rows) < BATCH_SIZE:
+                break
 
-    def get_enqueue_lock(self, cls, schedule_instance_id, next_event_due):
-        key = "create-task-for-%s-%s-%s" % (
-            cls.__name__,
-            schedule_instance_id.hex,
-            next_event_due.strftime('%Y-%m-%d %H:%M:%S')
-        )
-        return get_redis_lock(
-            key,
-            timeout=60 * 60,
-            name="create_task_for_%s" % cls.__name__,
-            track_unreleased=False,
-        )
+        # Released only once all due instances on this db have been claimed
+        # so that they are not claimed again in the loop above. They will be
+        # picked up again on the next run.
+        release_schedule_instance_claims(cls, db_alias, skipped_ids)
 
     @handle_connection_failure(get_db_aliases=get_default_and_partitioned_db_aliases)
     def create_tasks(self):
-        for cls in (AlertScheduleInstance, TimedScheduleInstance):
-            for domain, schedule_instance_id, next_event_due in get_active_schedule_instance_ids(
-                    cls, datetime.utcnow()):
-                if skip_domain(domain):
-                    continue
-
-                # We use a non-blocking lock here with a timeout of one hour to make sure
-                # that we only retry non-processed schedule instances once an hour.
-                enqueue_lock = self.get_enqueue_lock(cls, schedule_instance_id, next_event_due)
-                if enqueue_lock.acquire(blocking=False):
-                    self.get_task(cls).delay(schedule_instance_id, domain)
-
-        for cls in (CaseAlertScheduleInstance, CaseTimedScheduleInstance):
-            for domain, case_id, schedule_instance_id, next_event_due in get_active_case_schedule_instance_ids(
-                    cls, datetime.utcnow()):
-                if skip_domain(domain):
-                    continue
-
-                # See comment above about why we use a non-blocking lock here.
-                enqueue_lock = self.get_enqueue_lock(cls, schedule_instance_id, next_event_due)
-                if enqueue_lock.acquire(blocking=False):
-                    self.get_task(cls).delay(case_id, schedule_instance_id, domain)
+        due_before = datetime.utcnow()
+        for cls in (AlertScheduleInstance, TimedScheduleInstance, CaseAlertScheduleInstance,
+                    CaseTimedScheduleInstance):
+            for db_alias in get_db_aliases_for_partitioned_query():
+                self.create_tasks_for_db(cls, db_alias, due_before)
 
     def handle(self, **options):
         while True:
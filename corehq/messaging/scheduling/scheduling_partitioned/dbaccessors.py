@@ -1,13 +1,25 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
 from uuid import UUID
 
+from django.db import transaction
 from django.db.models import Q
 
+from dimagi.utils.chunked import chunked
+
 from corehq.sql_db.util import (
+    get_db_alias_for_partitioned_doc,
     get_db_aliases_for_partitioned_query,
     paginate_query_across_partitioned_databases,
 )
+from corehq.util.metrics import metrics_counter
 from corehq.util.metrics.load_counters import load_counter_for_model
 
+# How long a claimed schedule instance is left alone before it can be claimed
+# again. This is what causes schedule instances which failed to process to be
+# retried once an hour.
+SCHEDULE_INSTANCE_CLAIM_TIMEOUT = timedelta(hours=1)
+
 
 def _validate_class(obj, cls):
     """
@@ -145,14 +157,106 @@ def get_active_case_schedule_instance_ids(cls, due_before, due_after=None):
         yield (domain, case_id, schedule_instance_id, next_event_due)
 
 
+def claim_due_schedule_instances(cls, db_alias, due_before, batch_size=500, claimed_until=None):
+    """
+    Claims up to batch_size active schedule instances of the given class on
+    the given partitioned database which are due at or before due_before.
+
+    Rows are selected with SELECT ... FOR UPDATE SKIP LOCKED so that
+    dispatchers running concurrently never wait on or claim the same rows,
+    and each claimed row gets claimed_until set so that it is not claimed
+    again until it is processed or the claim expires. Pass claimed_until to
+    identify the claim later (see take_claimed_schedule_instances).
+
+    :return: a list of (domain, schedule_instance_id) tuples, or for case
+    schedule instances (domain, case_id, schedule_instance_id) tuples
+    """
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AlertScheduleInstance,
+        TimedScheduleInstance,
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    if cls in (AlertScheduleInstance, TimedScheduleInstance):
+        return_values = ['domain', 'schedule_instance_id']
+    elif cls in (CaseAlertScheduleInstance, CaseTimedScheduleInstance):
+        return_values = ['domain', 'case_id', 'schedule_instance_id']
+    else:
+        raise TypeError("Unexpected class: %s" % cls)
+
+    now = datetime.utcnow()
+    if claimed_until is None:
+        claimed_until = now + SCHEDULE_INSTANCE_CLAIM_TIMEOUT
+    with transaction.atomic(using=db_alias):
+        rows = list(
+            cls.objects.using(db_alias)
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lt=now),
+                active=True,
+                next_event_due__lte=due_before,
+            )
+            .order_by('next_event_due')
+            .values_list(*return_values)[:batch_size]
+        )
+        if rows:
+            cls.objects.using(db_alias).filter(
+                schedule_instance_id__in=[row[-1] for row in rows]
+            ).update(claimed_until=claimed_until)
+
+    load_counter_for_model(cls)('claim_due_schedule_instances', None)(len(rows))
+    return rows
+
+
+def take_claimed_schedule_instances(cls, db_alias, schedule_instance_ids, claimed_until):
+    """
+    Returns the given schedule instances which still have the claim that
+    claim_due_schedule_instances gave them with claimed_until, and renews
+    that claim while they are processed.
+
+    A claim which expired before it was taken could have been claimed again
+    and handed to another task, so instances whose claim changed are left
+    to that task. The rows are locked while the claim is checked and renewed,
+    so only one caller can take each claim.
+    """
+    with transaction.atomic(using=db_alias):
+        instances = list(
+            cls.objects.using(db_alias)
+            .select_for_update()
+            .filter(schedule_instance_id__in=schedule_instance_ids, claimed_until=claimed_until)
+        )
+        if instances:
+            processing_until = datetime.utcnow() + SCHEDULE_INSTANCE_CLAIM_TIMEOUT
+            cls.objects.using(db_alias).filter(
+                schedule_instance_id__in=[instance.schedule_instance_id for instance in instances]
+            ).update(claimed_until=processing_until)
+            for instance in instances:
+                instance.claimed_until = processing_until
+
+    lost = len(schedule_instance_ids) - len(instances)
+    if lost:
+        metrics_counter('commcare.messaging.schedule_instance_claims.lost', lost, tags={'class': cls.__name__})
+    return instances
+
+
+def release_schedule_instance_claims(cls, db_alias, schedule_instance_ids):
+    """
+    Releases the claims on the given schedule instances so that they can be
+    claimed again as soon as they are next due.
+    """
+    if schedule_instance_ids:
+        cls.objects.using(db_alias).filter(
+            schedule_instance_id__in=schedule_instance_ids
+        ).update(claimed_until=None)
+
+
 def _paginate_query_across_partitioned_databases(model_class, q_expression, load_source):
     """Optimized version of the generic paginate_query_across_partitioned_databases for case schedules
 
-    queue_schedule_instances uses a lock to ensure that the same case_id cannot be queued within one
-    hour of another instance
-    The celery tasks handle_case_alert_schedule_instance and handle_case_timed_schedule_instance both
-    use locks to ensure only one taks is operating on a case at one time. Each task also checks if the
-    schedule is still valid on this case before processing it further
+    The celery tasks which process case schedule instances use locks to ensure only one task is
+    operating on a case at one time. Each task also checks if the schedule is still valid on this
+    case before processing it further
 
     Assumes that q_expression includes active = True
     """
@@ -308,6 +412,74 @@ def delete_case_schedule_instance(instance):
     instance.delete()
 
 
+def _group_schedule_instances_by_class_and_db(instances):
+    from corehq.messaging.scheduling.scheduling_partitioned.models import (
+        AlertScheduleInstance,
+        TimedScheduleInstance,
+        CaseAlertScheduleInstance,
+        CaseTimedScheduleInstance,
+    )
+
+    result = defaultdict(list)
+    for instance in instances:
+        _validate_class(instance, (AlertScheduleInstance, TimedScheduleInstance, CaseAlertScheduleInstance,
+            CaseTimedScheduleInstance))
+        _validate_uuid(instance.schedule_instance_id)
+        db_alias = get_db_alias_for_partitioned_doc(instance.partition_value)
+        result[(type(instance), db_alias)].append(instance)
+
+    return result.items()
+
+
+def _record_bulk_write(cls, action, count):
+    metrics_counter('commcare.messaging.schedule_instances.bulk_write', count, tags={
+        'action': action,
+        'model': cls.__name__,
+    })
+
+
+def bulk_save_schedule_instances(instances, batch_size=1000):
+    """
+    Saves the given schedule instances, which may be of any schedule instance
+    class. On each partitioned database, new instances are written with
+    multi-row INSERTs and existing instances with multi-row UPDATEs of
+    batch_size rows each.
+
+    claimed_until is not updated on existing instances, so that refreshing
+    instances loaded earlier does not overwrite claims which the dispatcher
+    has since made or released.
+    """
+    for (cls, db_alias), group in _group_schedule_instances_by_class_and_db(instances):
+        new_instances = [instance for instance in group if instance._state.adding]
+        existing_instances = [instance for instance in group if not instance._state.adding]
+
+        if new_instances:
+            cls.objects.using(db_alias).bulk_create(new_instances, batch_size=batch_size)
+            _record_bulk_write(cls, 'create', len(new_instances))
+
+        if existing_instances:
+            fields = [
+                field.name for field in cls._meta.concrete_fields
+                if not field.primary_key and field.name != 'claimed_until'
+            ]
+            cls.objects.using(db_alias).bulk_update(existing_instances, fields, batch_size=batch_size)
+            _record_bulk_write(cls, 'update', len(existing_instances))
+
+
+def bulk_delete_schedule_instances(instances, batch_size=1000):
+    """
+    Deletes the given schedule instances, which may be of any schedule instance
+    class, with one DELETE per batch_size instances on each partitioned database.
+    """
+    for (cls, db_alias), group in _group_schedule_instances_by_class_and_db(instances):
+        for chunk in chunked(group, batch_size, list):
+            cls.objects.using(db_alias).filter(
+                schedule_instance_id__in=[instance.schedule_instance_id for instance in chunk]
+            ).delete()
+
+        _record_bulk_write(cls, 'delete', len(group))
+
+
 def delete_alert_schedule_instances_for_schedule(cls, schedule_id):
     from corehq.messaging.scheduling.scheduling_partitioned.models import (
         AlertScheduleInstance,
@@ -46,6 +46,14 @@ class ScheduleInstance(PartitionedModel):
     next_event_due = models.DateTimeField()
     active = models.BooleanField()
 
+    # Set by claim_due_schedule_instances when the instance is handed to a
+    # task for processing, and cleared when that task saves the instance.
+    # Claims which are never cleared (e.g. because processing failed) expire,
+    # so that the instance gets retried later.
+    claimed_until = models.DateTimeField(null=True)
+
+    _shared_schedule = None
+
     RECIPIENT_TYPE_CASE = 'CommCareCase'
     RECIPIENT_TYPE_MOBILE_WORKER = 'CommCareUser'
     RECIPIENT_TYPE_WEB_USER = 'WebUser'
@@ -378,8 +386,20 @@ class ScheduleInstance(PartitionedModel):
         This is named with a memoized_ prefix to be clear that it should only be used
         when the schedule is not changing.
         """
+        if self._shared_schedule is not None:
+            return self._shared_schedule
+
         return self.schedule
 
+    def set_shared_schedule(self, schedule):
+        """
+        Use the given schedule as this instance's memoized_schedule, so that
+        when processing many instances of the same schedule they can share one
+        schedule (and its memoized events and content) instead of each looking
+        it up again.
+        """
+        self._shared_schedule = schedule
+
     def additional_deactivation_condition_reached(self):
         """
         Subclasses can override this to provide additional checks under
@@ -444,7 +464,7 @@ class AbstractAlertScheduleInstance(ScheduleInstance):
         new_instance = type(instance)()
 
         for field in instance._meta.fields:
-            if field.name not in ['schedule_instance_id', 'recipient_type', 'recipient_id']:
+            if field.name not in ['schedule_instance_id', 'recipient_type', 'recipient_id', 'claimed_until']:
                 setattr(new_instance, field.name, getattr(instance, field.name))
 
         new_instance.recipient_type = recipient_type
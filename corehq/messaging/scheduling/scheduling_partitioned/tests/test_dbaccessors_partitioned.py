@@ -11,6 +11,11 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_active_schedule_instance_ids,
     get_alert_schedule_instances_for_schedule,
     get_timed_schedule_instances_for_schedule,
+    claim_due_schedule_instances,
+    release_schedule_instance_claims,
+    take_claimed_schedule_instances,
+    bulk_save_schedule_instances,
+    bulk_delete_schedule_instances,
 )
 from corehq.messaging.scheduling.models import (
     AlertSchedule,
@@ -22,7 +27,7 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
 )
 from corehq.sql_db.config import plproxy_config
 from corehq.sql_db.tests.utils import DefaultShardingTestConfigMixIn
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from django.test import TestCase
 
 
@@ -102,6 +107,43 @@ class TestSchedulingPartitionedDBAccessorsGetAndSave(BaseSchedulingPartitionedDB
         self.assertEqual(TimedScheduleInstance.objects.using(self.db1).count(), 0)
         self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 1)
 
+    def test_bulk_save_and_delete_schedule_instances(self):
+        alert_instance = self.make_alert_schedule_instance(self.p1_uuid)
+        timed_instance = self.make_timed_schedule_instance(self.p2_uuid)
+        bulk_save_schedule_instances([alert_instance, timed_instance])
+
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db1).count(), 1)
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db2).count(), 0)
+        self.assertEqual(TimedScheduleInstance.objects.using(self.db1).count(), 0)
+        self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 1)
+
+        alert_instance.active = False
+        bulk_save_schedule_instances([alert_instance])
+        self.assertFalse(get_alert_schedule_instance(self.p1_uuid).active)
+
+        bulk_delete_schedule_instances([alert_instance, timed_instance])
+        self.assertEqual(AlertScheduleInstance.objects.using(self.db1).count(), 0)
+        self.assertEqual(TimedScheduleInstance.objects.using(self.db2).count(), 0)
+
+    def test_bulk_save_keeps_claim(self):
+        alert_instance = self.make_alert_schedule_instance(self.p1_uuid)
+        save_alert_schedule_instance(alert_instance)
+
+        # Another process claims the instance after it was loaded here
+        due_before = datetime(2017, 3, 2)
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before),
+            [(self.domain, self.p1_uuid)]
+        )
+
+        alert_instance.recipient_id = uuid.uuid4().hex
+        bulk_save_schedule_instances([alert_instance])
+
+        instance = get_alert_schedule_instance(self.p1_uuid)
+        self.assertEqual(instance.recipient_id, alert_instance.recipient_id)
+        self.assertIsNotNone(instance.claimed_until)
+        self.assertEqual(claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before), [])
+
     def test_get_alert_schedule_instance(self):
         self.test_save_alert_schedule_instance()
         instance = get_alert_schedule_instance(self.p1_uuid)
@@ -247,6 +289,52 @@ class TestSchedulingPartitionedDBAccessorsDeleteAndFilter(BaseSchedulingPartitio
             []
         )
 
+    def test_claim_due_schedule_instances(self):
+        due_before = datetime(2017, 4, 1)
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before),
+            [(self.domain, self.alert_instance1_p1.schedule_instance_id)]
+        )
+        self.assertEqual(
+            claim_due_schedule_instances(TimedScheduleInstance, self.db2, due_before),
+            [(self.domain, self.timed_instance1_p2.schedule_instance_id)]
+        )
+        self.assertEqual(claim_due_schedule_instances(AlertScheduleInstance, self.db1, datetime(2016, 4, 1)), [])
+
+        # Claimed instances are not claimed again until the claim is released
+        self.assertEqual(claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before), [])
+        release_schedule_instance_claims(
+            AlertScheduleInstance, self.db1, [self.alert_instance1_p1.schedule_instance_id]
+        )
+        self.assertEqual(
+            claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before),
+            [(self.domain, self.alert_instance1_p1.schedule_instance_id)]
+        )
+
+    def test_take_claimed_schedule_instances(self):
+        due_before = datetime(2017, 4, 1)
+        schedule_instance_id = self.alert_instance1_p1.schedule_instance_id
+        first_claim = datetime.utcnow() - timedelta(minutes=1)
+        claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before, claimed_until=first_claim)
+        # The first claim expired and the instance was claimed again
+        second_claim = datetime.utcnow() + timedelta(minutes=1)
+        claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before, claimed_until=second_claim)
+
+        self.assertEqual(
+            take_claimed_schedule_instances(AlertScheduleInstance, self.db1, [schedule_instance_id], first_claim),
+            []
+        )
+        instances = take_claimed_schedule_instances(
+            AlertScheduleInstance, self.db1, [schedule_instance_id], second_claim)
+        self.assertEqual([i.schedule_instance_id for i in instances], [schedule_instance_id])
+        # The claim is renewed, so it can only be taken once
+        self.assertGreater(instances[0].claimed_until, second_claim)
+        self.assertEqual(
+            take_claimed_schedule_instances(AlertScheduleInstance, self.db1, [schedule_instance_id], second_claim),
+            []
+        )
+        self.assertEqual(claim_due_schedule_instances(AlertScheduleInstance, self.db1, due_before), [])
+
     def test_get_alert_schedule_instances_for_schedule(self):
         self.assertItemsEqual(
             get_alert_schedule_instances_for_schedule(AlertSchedule(schedule_id=self.schedule_id1)),
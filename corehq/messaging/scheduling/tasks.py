@@ -6,6 +6,7 @@ from corehq.messaging.scheduling.models import (
     TimedSchedule,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.models import (
+    AbstractAlertScheduleInstance,
     AlertScheduleInstance,
     TimedScheduleInstance,
     CaseAlertScheduleInstance,
@@ -13,8 +14,6 @@ from corehq.messaging.scheduling.scheduling_partitioned.models import (
     CaseScheduleInstanceMixin,
 )
 from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
-    delete_alert_schedule_instance,
-    delete_timed_schedule_instance,
     get_alert_schedule_instances_for_schedule,
     get_timed_schedule_instances_for_schedule,
     get_alert_schedule_instance,
@@ -25,14 +24,18 @@ from corehq.messaging.scheduling.scheduling_partitioned.dbaccessors import (
     get_case_timed_schedule_instances_for_schedule,
     get_case_schedule_instance,
     save_case_schedule_instance,
-    delete_case_schedule_instance,
     delete_alert_schedule_instances_for_schedule,
     delete_timed_schedule_instances_for_schedule,
     delete_schedule_instances_by_case_id,
+    release_schedule_instance_claims,
+    take_claimed_schedule_instances,
+    bulk_save_schedule_instances,
+    bulk_delete_schedule_instances,
 )
 from corehq.util.celery_utils import no_result_task
 from datetime import datetime
 from dimagi.utils.couch import CriticalSection
+from dimagi.utils.logging import notify_exception
 from django.conf import settings
 
 
@@ -101,28 +104,6 @@ class ScheduleInstanceRefresher(object):
         """
         raise NotImplementedError()
 
-    @staticmethod
-    def delete_instance(instance):
-        if isinstance(instance, AlertScheduleInstance):
-            delete_alert_schedule_instance(instance)
-        elif isinstance(instance, TimedScheduleInstance):
-            delete_timed_schedule_instance(instance)
-        elif isinstance(instance, (CaseAlertScheduleInstance, CaseTimedScheduleInstance)):
-            delete_case_schedule_instance(instance)
-        else:
-            raise TypeError("Unexpected type: %s" % type(instance))
-
-    @staticmethod
-    def save_instance(instance):
-        if isinstance(instance, AlertScheduleInstance):
-            save_alert_schedule_instance(instance)
-        elif isinstance(instance, TimedScheduleInstance):
-            save_timed_schedule_instance(instance)
-        elif isinstance(instance, (CaseAlertScheduleInstance, CaseTimedScheduleInstance)):
-            save_case_schedule_instance(instance)
-        else:
-            raise TypeError("Unexpected type: %s" % type(instance))
-
     def refresh(self):
         # A list of (instance, needs_saving) tuples representing the final version
         # of the refreshed instances and whether or not each one needs to be saved
@@ -138,19 +119,26 @@ class ScheduleInstanceRefresher(object):
                     (self.create_new_instance_for_recipient(recipient_type, recipient_id), True)
                 )
 
+        instances_to_delete = []
         for recipient_type_and_id, instance in self.existing_instances.items():
             if recipient_type_and_id in self.new_recipients:
                 needs_saving = self.handle_existing_instance(instance)
                 refreshed_list.append((instance, needs_saving))
             else:
-                self.delete_instance(instance)
+                instances_to_delete.append(instance)
 
+        instances_to_save = []
         for instance, needs_saving in refreshed_list:
             if instance.check_active_flag_against_schedule():
                 needs_saving = True
 
             if needs_saving:
-                self.save_instance(instance)
+                instances_to_save.append(instance)
+
+        # Large broadcasts and rules can refresh hundreds of thousands of
+        # instances, so write them in bulk rather than one at a time
+        bulk_delete_schedule_instances(instances_to_delete)
+        bulk_save_schedule_instances(instances_to_save)
 
 
 class AlertScheduleInstanceRefresher(ScheduleInstanceRefresher):
@@ -504,6 +492,121 @@ def handle_case_timed_schedule_instance(case_id, schedule_instance_id, domain):
         _handle_schedule_instance(instance, save_case_schedule_instance)
 
 
+class ClaimedScheduleInstanceBatch(object):
+    """
+    Processes a batch of schedule instances which were claimed by
+    claim_due_schedule_instances. All instances in the batch belong to the
+    same class and partitioned database.
+
+    Instances of the same schedule share one schedule object, and through it
+    the schedule's memoized events and content. An error processing one
+    instance doesn't stop the rest of the batch from being processed; the
+    claim on the failed instance is left to expire so that it gets retried
+    later.
+    """
+
+    def __init__(self, cls, db_alias):
+        self.cls = cls
+        self.db_alias = db_alias
+        self.schedules = {}
+        self.saved_ids = set()
+        self.failed_ids = set()
+        self.handled_schedule_ids = set()
+
+    def save_instance(self, instance):
+        instance.claimed_until = None
+        instance.save(using=self.db_alias)
+        self.saved_ids.add(instance.schedule_instance_id)
+
+    def share_schedule(self, instance):
+        if isinstance(instance, AbstractAlertScheduleInstance):
+            schedule_id = instance.alert_schedule_id
+        else:
+            schedule_id = instance.timed_schedule_id
+
+        if schedule_id not in self.schedules:
+            self.schedules[schedule_id] = instance.memoized_schedule
+
+        instance.set_shared_schedule(self.schedules[schedule_id])
+        return schedule_id
+
+    def handle_instance(self, instance):
+        schedule_instance_id = instance.schedule_instance_id
+        try:
+            schedule_id = self.share_schedule(instance)
+            if _handle_schedule_instance(instance, self.save_instance):
+                self.handled_schedule_ids.add(schedule_id)
+        except Exception:
+            self.failed_ids.add(schedule_instance_id)
+            notify_exception(None, message="Error processing %s %s" % (self.cls.__name__, schedule_instance_id))
+
+    def release_unsaved_claims(self, schedule_instance_ids):
+        # Instances which weren't due anymore or were deleted are not saved,
+        # so their claims are released here. Claims on failed instances are
+        # kept so that they are retried only when the claim expires.
+        release_schedule_instance_claims(
+            self.cls,
+            self.db_alias,
+            [
+                schedule_instance_id for schedule_instance_id in schedule_instance_ids
+                if schedule_instance_id not in self.saved_ids and schedule_instance_id not in self.failed_ids
+            ],
+        )
+
+
+@no_result_task(serializer='pickle', queue='reminder_queue')
+def handle_schedule_instances(cls, db_alias, schedule_instance_ids, claimed_until):
+    """
+    Processes a batch of AlertScheduleInstances or TimedScheduleInstances
+    which the dispatcher claimed with claimed_until. The dispatcher's claim
+    expires, and a task which is delayed past it could overlap with a task
+    for a new claim, so only the instances which still have this task's
+    claim are processed.
+    """
+    if cls not in (AlertScheduleInstance, TimedScheduleInstance):
+        raise TypeError("Expected AlertScheduleInstance or TimedScheduleInstance")
+
+    instances = take_claimed_schedule_instances(cls, db_alias, schedule_instance_ids, claimed_until)
+    batch = ClaimedScheduleInstanceBatch(cls, db_alias)
+    for instance in instances:
+        batch.handle_instance(instance)
+
+    batch.release_unsaved_claims([instance.schedule_instance_id for instance in instances])
+
+    broadcast_class = ImmediateBroadcast if cls is AlertScheduleInstance else ScheduledBroadcast
+    for schedule_id in batch.handled_schedule_ids:
+        update_broadcast_last_sent_timestamp(broadcast_class, schedule_id)
+
+
+@no_result_task(serializer='pickle', queue='reminder_queue')
+def handle_case_schedule_instances(cls, db_alias, case_and_schedule_instance_ids):
+    """
+    Processes a batch of CaseAlertScheduleInstances or CaseTimedScheduleInstances.
+    Each instance is read and processed under the case's sync lock because
+    the tasks which refresh case schedule instances can update them at the
+    same time, and because a task delayed past the dispatcher's claim could
+    overlap with a task for the new claim.
+    """
+    from corehq.messaging.tasks import get_sync_key
+
+    if cls not in (CaseAlertScheduleInstance, CaseTimedScheduleInstance):
+        raise TypeError("Expected CaseAlertScheduleInstance or CaseTimedScheduleInstance")
+
+    batch = ClaimedScheduleInstanceBatch(cls, db_alias)
+    for case_id, schedule_instance_id in case_and_schedule_instance_ids:
+        with CriticalSection([get_sync_key(case_id)], timeout=5 * 60):
+            try:
+                instance = cls.objects.using(db_alias).get(schedule_instance_id=schedule_instance_id)
+            except cls.DoesNotExist:
+                continue
+
+            batch.handle_instance(instance)
+
+    batch.release_unsaved_claims([
+        schedule_instance_id for case_id, schedule_instance_id in case_and_schedule_instance_ids
+    ])
+
+
 @no_result_task(serializer='pickle', queue='background_queue', acks_late=True)
 def delete_schedule_instances_for_cases(domain, case_ids):
     for case_id in case_ids:
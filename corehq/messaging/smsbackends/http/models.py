@@ -1,11 +1,9 @@
-import ssl
 import sys
 
 from django.conf import settings
 
 import six
 from six.moves.urllib.parse import urlencode
-from six.moves.urllib.request import urlopen
 
 from corehq.apps.sms.mixin import BackendProcessingException
 from corehq.apps.sms.models import SQLSMSBackend
@@ -70,20 +68,21 @@ class SQLHttpBackend(SQLSMSBackend):
 
         url_params = urlencode(params)
         try:
-            unverified = ssl._create_unverified_context()
             if config.method == "GET":
-                urlopen(
+                response = self.http_session.get(
                     "%s?%s" % (config.url, url_params),
-                    context=unverified,
+                    verify=False,
                     timeout=settings.SMS_GATEWAY_TIMEOUT,
-                ).read()
+                )
             else:
-                urlopen(
+                response = self.http_session.post(
                     config.url,
-                    url_params,
-                    context=unverified,
+                    data=url_params,
+                    headers={'Content-Type': 'application/x-www-form-urlencoded'},
+                    verify=False,
                     timeout=settings.SMS_GATEWAY_TIMEOUT,
-                ).read()
+                )
+            response.raise_for_status()
         except Exception as e:
             msg = "Error sending message from backend: '{}'\n\n{}".format(self.pk, str(e))
             six.reraise(BackendProcessingException, BackendProcessingException(msg), sys.exc_info()[2])
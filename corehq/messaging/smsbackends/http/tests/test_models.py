@@ -2,21 +2,40 @@ from corehq.util.urlvalidate.urlvalidate import PossibleSSRFAttempt
 from datetime import datetime
 from unittest.mock import patch, ANY
 from django.test import SimpleTestCase
+from requests.exceptions import HTTPError
+from corehq.apps.sms.mixin import BackendProcessingException
 from corehq.apps.sms.models import SMS, OUTGOING
 from corehq.util.urlvalidate.test.mockipinfo import hostname_resolving_to_ips
 from ..models import SQLHttpBackend
-from .. import models
 
 
 class TestHttpBackend(SimpleTestCase):
-    @patch.object(models, 'urlopen')
-    def test_sends_without_error(self, mock_urlopen):
+    @patch.object(SQLHttpBackend, 'http_session')
+    def test_sends_without_error(self, mock_session):
         message = self._create_message(phone_number='1234567890', text='Hello World')
         backend = self._create_backend(url='http://www.dimagi.com')
 
         backend.send(message)
-        mock_urlopen.assert_called_with('http://www.dimagi.com?message=Hello+World&number=1234567890',
-            context=ANY, timeout=ANY)
+        mock_session.get.assert_called_with('http://www.dimagi.com?message=Hello+World&number=1234567890',
+            verify=False, timeout=ANY)
+
+    @patch.object(SQLHttpBackend, 'http_session')
+    def test_post(self, mock_session):
+        message = self._create_message(phone_number='1234567890', text='Hello World')
+        backend = self._create_backend(url='http://www.dimagi.com', method='POST')
+
+        backend.send(message)
+        mock_session.post.assert_called_with('http://www.dimagi.com', data='message=Hello+World&number=1234567890',
+            headers={'Content-Type': 'application/x-www-form-urlencoded'}, verify=False, timeout=ANY)
+
+    @patch.object(SQLHttpBackend, 'http_session')
+    def test_gateway_error(self, mock_session):
+        mock_session.get.return_value.raise_for_status.side_effect = HTTPError("500 Server Error")
+        message = self._create_message()
+        backend = self._create_backend()
+
+        with self.assertRaises(BackendProcessingException):
+            backend.send(message)
 
     @hostname_resolving_to_ips('malicious.address', ['127.0.0.1'])
     @patch.object(SMS, 'save')  # mocked to avoid the database
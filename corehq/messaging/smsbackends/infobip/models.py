@@ -1,7 +1,9 @@
 import requests
 import json
 from io import BytesIO
+from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
+from dimagi.utils.chunked import chunked
 from corehq.apps.sms.models import SQLSMSBackend, SMS
 from corehq.apps.sms.util import clean_phone_number
 from corehq.messaging.smsbackends.infobip.forms import InfobipBackendForm
@@ -17,6 +19,9 @@ from corehq.messaging.whatsapputil import (
 
 INFOBIP_DOMAIN = "api.infobip.com"
 
+# The number of messages sent per request by InfobipBackend.send_batch
+INFOBIP_BATCH_SIZE = 100
+
 
 class InfobipRetry(Exception):
     pass
@@ -77,10 +82,65 @@ class InfobipBackend(SQLSMSBackend):
                 self._send_omni_failover_message(config, to, msg, headers)
             else:
                 self._send_sms(config, to, msg, headers)
+        except InfobipRetry:
+            # the gateway failed, not the destination number; retry the message
+            raise
         except Exception:
             msg.set_system_error(SMS.ERROR_INVALID_DESTINATION_NUMBER)
             return False
 
+    def send_batch(self, messages, orig_phone_number=None):
+        config = self.config
+        if config.scenario_key:
+            # Omni failover messages may need several requests per message
+            return super().send_batch(messages, orig_phone_number=orig_phone_number)
+
+        headers = {
+            'Authorization': f'App {config.auth_token}',
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        errors = []
+        for chunk in chunked(messages, INFOBIP_BATCH_SIZE, list):
+            try:
+                self._send_sms_batch(config, chunk, headers)
+            except Exception as e:
+                # A failed request says nothing about the destination numbers
+                # (e.g. InfobipRetry on a 500), so the messages are retried
+                errors.extend([e] * len(chunk))
+            else:
+                errors.extend([None] * len(chunk))
+
+        return errors
+
+    def _send_sms_batch(self, config, messages, headers):
+        payload = {
+            'messages': [{
+                'from': config.reply_to_phone_number,
+                'destinations': [{'to': clean_phone_number(msg.phone_number)}],
+                'text': msg.text
+            } for msg in messages]
+        }
+        url = f'https://{config.personalized_subdomain}.{INFOBIP_DOMAIN}/sms/2/text/advanced'
+        response = self.http_session.post(url, json=payload, headers=headers, timeout=settings.SMS_GATEWAY_TIMEOUT)
+        if response.status_code == 500:
+            raise InfobipRetry("Gateway 500 error")
+        if response.status_code != 200:
+            for msg in messages:
+                msg.set_gateway_error(response.status_code)
+            return
+
+        # Infobip returns one result per destination, in the order they were sent
+        data = json.loads(response.content)
+        results = data.get("messages", [])
+        if len(results) != len(messages):
+            for msg in messages:
+                msg.set_gateway_error(repr(data))
+            return
+
+        for msg, result in zip(messages, results):
+            msg.backend_message_id = result["messageId"]
+
     def _send_omni_failover_message(self, config, to, msg, headers):
         payload = {
             'destinations': [{'to': {'phoneNumber': to}}],
@@ -97,7 +157,7 @@ class InfobipBackend(SQLSMSBackend):
                 error_message = extract_error_message_from_template_string(msg.text)
                 if error_message:
                     payload['whatsApp'] = {'text': error_message}
-                    requests.post(url, json=payload, headers=headers)
+                    self.http_session.post(url, json=payload, headers=headers)
 
             try:
                 parts = get_template_hsm_parts(msg.text)
@@ -120,13 +180,13 @@ class InfobipBackend(SQLSMSBackend):
                 if video_url:
                     payload['whatsApp']['videoUrl'] = video_url
 
-                requests.post(url, json=payload, headers=headers)
+                self.http_session.post(url, json=payload, headers=headers)
 
             payload['whatsApp'] = {
                 'text': msg.text
             }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = self.http_session.post(url, json=payload, headers=headers)
         self.handle_response(response, msg)
 
     def _send_sms(self, config, to, msg, headers):
@@ -138,7 +198,7 @@ class InfobipBackend(SQLSMSBackend):
             }]
         }
         url = f'https://{config.personalized_subdomain}.{INFOBIP_DOMAIN}/sms/2/text/advanced'
-        response = requests.post(url, json=payload, headers=headers)
+        response = self.http_session.post(url, json=payload, headers=headers)
         self.handle_response(response, msg)
 
     def handle_response(self, response, msg):
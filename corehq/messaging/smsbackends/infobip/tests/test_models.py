@@ -0,0 +1,102 @@
+import json
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from corehq.apps.sms.models import SMS
+from corehq.messaging.smsbackends.infobip.models import InfobipBackend, InfobipRetry
+
+
+def _response(status_code, data=None):
+    return Mock(status_code=status_code, content=json.dumps(data or {}))
+
+
+@patch.object(SMS, 'save')  # mocked to avoid the database
+@patch.object(InfobipBackend, 'http_session')
+class TestInfobipSendBatch(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = InfobipBackend(extra_fields={
+            'reply_to_phone_number': '+15550000',
+            'auth_token': 'token',
+            'personalized_subdomain': 'test',
+        })
+        self.messages = [
+            SMS(phone_number='+1555000{}'.format(i), text='message {}'.format(i))
+            for i in range(3)
+        ]
+
+    def test_message_ids(self, http_session, save):
+        http_session.post.return_value = _response(200, {'messages': [
+            {'messageId': 'id0'}, {'messageId': 'id1'}, {'messageId': 'id2'},
+        ]})
+        self.assertEqual(self.backend.send_batch(self.messages), [None, None, None])
+
+        self.assertEqual([msg.backend_message_id for msg in self.messages], ['id0', 'id1', 'id2'])
+        self.assertFalse(any(msg.error for msg in self.messages))
+        payload = http_session.post.call_args[1]['json']
+        self.assertEqual(
+            [(m['destinations'][0]['to'], m['text']) for m in payload['messages']],
+            [('+15550000', 'message 0'), ('+15550001', 'message 1'), ('+15550002', 'message 2')]
+        )
+
+    @patch('corehq.messaging.smsbackends.infobip.models.INFOBIP_BATCH_SIZE', 2)
+    def test_chunks(self, http_session, save):
+        http_session.post.side_effect = [
+            _response(200, {'messages': [{'messageId': 'id0'}, {'messageId': 'id1'}]}),
+            _response(500),
+        ]
+        errors = self.backend.send_batch(self.messages)
+
+        self.assertEqual(http_session.post.call_count, 2)
+        self.assertEqual(errors[:2], [None, None])
+        self.assertIsInstance(errors[2], InfobipRetry)
+        self.assertEqual([msg.backend_message_id for msg in self.messages], ['id0', 'id1', None])
+
+    def test_gateway_500_is_retried(self, http_session, save):
+        http_session.post.return_value = _response(500)
+        errors = self.backend.send_batch(self.messages)
+
+        self.assertTrue(all(isinstance(error, InfobipRetry) for error in errors))
+        self.assertFalse(any(msg.error for msg in self.messages))
+
+    def test_gateway_error(self, http_session, save):
+        http_session.post.return_value = _response(401)
+        self.assertEqual(self.backend.send_batch(self.messages), [None, None, None])
+
+        for msg in self.messages:
+            self.assertTrue(msg.error)
+            self.assertEqual(msg.system_error_message, 'Gateway error: 401')
+
+    def test_unexpected_number_of_results(self, http_session, save):
+        http_session.post.return_value = _response(200, {'messages': [{'messageId': 'id0'}]})
+        self.assertEqual(self.backend.send_batch(self.messages), [None, None, None])
+
+        self.assertTrue(all(msg.error for msg in self.messages))
+        self.assertIsNone(self.messages[0].backend_message_id)
+
+
+@patch.object(SMS, 'save')  # mocked to avoid the database
+@patch.object(InfobipBackend, 'http_session')
+class TestInfobipSend(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = InfobipBackend(extra_fields={
+            'reply_to_phone_number': '+15550000',
+            'auth_token': 'token',
+            'personalized_subdomain': 'test',
+        })
+        self.msg = SMS(phone_number='+15550001', text='message')
+
+    def test_gateway_500_is_retried(self, http_session, save):
+        http_session.post.return_value = _response(500)
+        with self.assertRaises(InfobipRetry):
+            self.backend.send(self.msg)
+        self.assertFalse(self.msg.error)
+
+    def test_gateway_error(self, http_session, save):
+        http_session.post.return_value = _response(401)
+        self.backend.send(self.msg)
+
+        self.assertTrue(self.msg.error)
+        self.assertEqual(self.msg.system_error_message, 'Gateway error: 401')
@@ -7,9 +7,13 @@ from django.db import models
 from requests.exceptions import RequestException
 from corehq.util.view_utils import absolute_reverse
 from corehq.util.quickcache import quickcache
+from dimagi.utils.chunked import chunked
 
 MESSAGE_TYPE_SMS = "sms"
 
+# The most messages Telerivet accepts in one send_multi request
+SEND_MULTI_MAX_MESSAGES = 100
+
 
 class SQLTelerivetBackend(SQLSMSBackend):
 
@@ -69,10 +73,9 @@ class SQLTelerivetBackend(SQLSMSBackend):
 
         return info.get('phone_number')
 
-    def send(self, msg, *args, **kwargs):
-        config = self.config
-        payload = {
-            'route_id': config.phone_id,
+    def _get_message_payload(self, msg):
+        return {
+            'route_id': self.config.phone_id,
             'to_number': msg.phone_number,
             'content': msg.text,
             'message_type': MESSAGE_TYPE_SMS,
@@ -80,38 +83,86 @@ class SQLTelerivetBackend(SQLSMSBackend):
             'status_secret': self.config.webhook_secret
         }
 
-        url = 'https://api.telerivet.com/v1/projects/%s/messages/send' % config.project_id
-
+    def _post(self, url, payload):
         # Sending with the json param automatically sets the Content-Type header to application/json
-        response = requests.post(
+        return self.http_session.post(
             url,
-            auth=(config.api_key, ''),
+            auth=(self.config.api_key, ''),
             json=payload,
             verify=True,
             timeout=settings.SMS_GATEWAY_TIMEOUT,
         )
 
+    def _raise_for_response(self, response):
+        try:
+            data = response.text
+        except Exception:
+            data = repr(response.content)
+        raise TelerivetException(
+            "Received HTTP response status code %s (%s) from backend %s" % (
+                response.status_code,
+                data,
+                self.pk,
+            )
+        )
+
+    def send(self, msg, *args, **kwargs):
+        url = 'https://api.telerivet.com/v1/projects/%s/messages/send' % self.config.project_id
+        response = self._post(url, self._get_message_payload(msg))
+
         if response.status_code == 200:
             result = response.json()
             if 'error' in result:
                 raise TelerivetException("Error with backend %s: %s" % (self.pk, result['error']['code']))
-
             msg.backend_message_id = result.get('id')
         elif response.status_code in (401, 402):
             # These are account-related errors, retrying won't help
             msg.set_system_error(SMS.ERROR_TOO_MANY_UNSUCCESSFUL_ATTEMPTS)
         else:
+            self._raise_for_response(response)
+
+    def send_batch(self, messages, orig_phone_number=None):
+        errors = []
+        for chunk in chunked(messages, SEND_MULTI_MAX_MESSAGES, list):
             try:
-                data = response.text
-            except Exception:
-                data = repr(response.content)
-            raise TelerivetException(
-                "Received HTTP response status code %s (%s) from backend %s" % (
-                    response.status_code,
-                    data,
-                    self.pk,
-                )
-            )
+                errors.extend(self._send_multi(chunk))
+            except Exception as e:
+                errors.extend([e] * len(chunk))
+        return errors
+
+    def _send_multi(self, messages):
+        url = 'https://api.telerivet.com/v1/projects/%s/send_multi' % self.config.project_id
+        response = self._post(url, {'messages': [self._get_message_payload(msg) for msg in messages]})
+
+        if response.status_code in (401, 402):
+            # These are account-related errors, retrying won't help
+            for msg in messages:
+                msg.set_system_error(SMS.ERROR_TOO_MANY_UNSUCCESSFUL_ATTEMPTS)
+            return [None] * len(messages)
+        elif response.status_code != 200:
+            self._raise_for_response(response)
+
+        result = response.json()
+        if 'error' in result:
+            raise TelerivetException("Error with backend %s: %s" % (self.pk, result['error']['code']))
+
+        # Telerivet returns one result per message, in the order they were sent
+        sent = result.get('messages', [])
+        if len(sent) != len(messages):
+            raise TelerivetException("Expected %s results from backend %s, got %s" % (
+                len(messages), self.pk, len(sent)
+            ))
+
+        errors = []
+        for msg, message_result in zip(messages, sent):
+            if message_result.get('error_message'):
+                errors.append(TelerivetException("Error with backend %s: %s" % (
+                    self.pk, message_result['error_message']
+                )))
+            else:
+                msg.backend_message_id = message_result.get('id')
+                errors.append(None)
+        return errors
 
     @classmethod
     @quickcache(['webhook_secret'])
@@ -0,0 +1,71 @@
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+from corehq.apps.sms.models import SMS
+from corehq.messaging.smsbackends.telerivet.exceptions import TelerivetException
+from corehq.messaging.smsbackends.telerivet.models import SQLTelerivetBackend
+
+
+@patch.object(SMS, 'save')  # mocked to avoid the database
+@patch('corehq.messaging.smsbackends.telerivet.models.absolute_reverse', Mock(return_value='status-url'))
+@patch.object(SQLTelerivetBackend, 'http_session')
+class TestTelerivetSendBatch(SimpleTestCase):
+
+    def setUp(self):
+        self.backend = SQLTelerivetBackend(extra_fields={
+            'api_key': 'key',
+            'project_id': 'project',
+            'phone_id': 'phone',
+            'webhook_secret': 'secret',
+        })
+        self.messages = [
+            SMS(phone_number='+1555000{}'.format(i), text='message {}'.format(i))
+            for i in range(3)
+        ]
+
+    def _response(self, status_code, data=None):
+        return Mock(status_code=status_code, json=Mock(return_value=data), text='')
+
+    def test_send_multi(self, http_session, save):
+        http_session.post.return_value = self._response(200, {'messages': [
+            {'id': 'id0'}, {'id': 'id1', 'error_message': 'Invalid number'}, {'id': 'id2'},
+        ]})
+        errors = self.backend.send_batch(self.messages)
+
+        self.assertEqual(http_session.post.call_count, 1)
+        url = http_session.post.call_args[0][0]
+        self.assertEqual(url, 'https://api.telerivet.com/v1/projects/project/send_multi')
+        payload = http_session.post.call_args[1]['json']
+        self.assertEqual(
+            [(m['to_number'], m['content'], m['route_id']) for m in payload['messages']],
+            [('+15550000', 'message 0', 'phone'), ('+15550001', 'message 1', 'phone'),
+             ('+15550002', 'message 2', 'phone')]
+        )
+
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], TelerivetException)
+        self.assertIsNone(errors[2])
+        self.assertEqual([msg.backend_message_id for msg in self.messages], ['id0', None, 'id2'])
+
+    @patch('corehq.messaging.smsbackends.telerivet.models.SEND_MULTI_MAX_MESSAGES', 2)
+    def test_chunks(self, http_session, save):
+        http_session.post.side_effect = [
+            self._response(200, {'messages': [{'id': 'id0'}, {'id': 'id1'}]}),
+            self._response(200, {'messages': [{'id': 'id2'}]}),
+        ]
+        self.assertEqual(self.backend.send_batch(self.messages), [None, None, None])
+        self.assertEqual(http_session.post.call_count, 2)
+        self.assertEqual([msg.backend_message_id for msg in self.messages], ['id0', 'id1', 'id2'])
+
+    def test_account_error(self, http_session, save):
+        http_session.post.return_value = self._response(401)
+        self.assertEqual(self.backend.send_batch(self.messages), [None, None, None])
+        self.assertTrue(all(msg.error for msg in self.messages))
+
+    def test_server_error_is_retried(self, http_session, save):
+        http_session.post.return_value = self._response(503)
+        errors = self.backend.send_batch(self.messages)
+
+        self.assertTrue(all(isinstance(error, TelerivetException) for error in errors))
+        self.assertFalse(any(msg.error for msg in self.messages))
@@ -1,5 +1,6 @@
 from typing import Optional
 
+from memoized import memoized
 from twilio.base import values
 from twilio.base.exceptions import TwilioRestException
 from twilio.rest import Client
@@ -78,8 +79,7 @@ class SQLTwilioBackend(SQLSMSBackend, PhoneLoadBalancingMixin):
             raise Exception("Expected orig_phone_number to be passed for all "
                             "instances of PhoneLoadBalancingMixin")
 
-        config = self.config
-        client = Client(config.account_sid, config.auth_token)
+        client = self._get_twilio_client()
         to = msg.phone_number
         msg.system_phone_number = orig_phone_number
         if toggles.WHATSAPP_MESSAGING.enabled(msg.domain) and not kwargs.get('skip_whatsapp', False):
@@ -132,7 +132,10 @@ class SQLTwilioBackend(SQLSMSBackend, PhoneLoadBalancingMixin):
     def phone_number_is_messaging_service_sid(phone_number):
         return phone_number[:2] == 'MG'
 
+    @memoized
     def _get_twilio_client(self):
+        # Memoized so that connections to Twilio are reused when sending
+        # several messages with this backend
         config = self.config
         return Client(config.account_sid, config.auth_token)
 
@@ -19,7 +19,6 @@ from dimagi.ext.couchdbkit import (
     StringProperty,
 )
 
-from corehq.form_processor.interfaces.dbaccessors import FormAccessors
 from corehq.motech.dhis2.const import DHIS2_MAX_VERSION, XMLNS_DHIS2
 from corehq.motech.dhis2.dhis2_config import Dhis2Config, Dhis2EntityConfig
 from corehq.motech.dhis2.entities_helpers import send_dhis2_entities
@@ -100,7 +99,7 @@ class Dhis2EntityRepeater(CaseRepeater, Dhis2Instance):
 
     @memoized
     def payload_doc(self, repeat_record):
-        return FormAccessors(repeat_record.domain).get_form(repeat_record.payload_id)
+        return self._get_payload_form(repeat_record)
 
     @property
     def form_class_name(self):
@@ -167,7 +166,7 @@ class Dhis2Repeater(FormRepeater, Dhis2Instance):
 
     @memoized
     def payload_doc(self, repeat_record):
-        return FormAccessors(repeat_record.domain).get_form(repeat_record.payload_id)
+        return self._get_payload_form(repeat_record)
 
     @property
     def form_class_name(self):
@@ -150,6 +150,7 @@ class ConnectionSettings(models.Model):
             notify_addresses=self.notify_addresses,
             payload_id=payload_id,
             logger=logger,
+            connection_settings=self,
         )
 
     def get_auth_manager(self):
@@ -12,6 +12,11 @@ MAX_BACKOFF_ATTEMPTS = 6
 # Limit the number of records to forward at a time so that one repeater
 # can't hold up the rest.
 RECORDS_AT_A_TIME = 1000
+# The most requests a repeater can be configured to send concurrently
+MAX_CONCURRENT_REQUESTS = 10
+# Halve the number of concurrent requests when a response takes longer
+# than this
+SLOW_RESPONSE_SECONDS = 5
 
 RECORD_PENDING_STATE = 'PENDING'
 RECORD_SUCCESS_STATE = 'SUCCESS'
@@ -8,12 +8,14 @@ from crispy_forms import layout as crispy
 from crispy_forms.helper import FormHelper
 from memoized import memoized
 
+from corehq import toggles
 from corehq.apps.es.users import UserES
 from corehq.apps.hqwebapp import crispy as hqcrispy
 from corehq.apps.reports.analytics.esaccessors import get_case_types_for_domain
 from corehq.apps.users.util import raw_username
 from corehq.motech.const import REQUEST_METHODS, REQUEST_POST
 from corehq.motech.models import ConnectionSettings
+from corehq.motech.repeaters.const import MAX_CONCURRENT_REQUESTS
 from corehq.motech.repeaters.models import Repeater
 from corehq.motech.repeaters.repeater_generators import RegisterGenerator
 from corehq.motech.views import ConnectionSettingsListView
@@ -64,6 +66,16 @@ class GenericRepeaterForm(forms.Form):
                 label='Payload Format',
                 choices=self.formats,
             )
+        if toggles.REPEATER_CONCURRENT_REQUESTS.enabled(self.domain):
+            self.fields['max_concurrent_requests'] = forms.IntegerField(
+                label=_("Concurrent Requests"),
+                min_value=1,
+                max_value=MAX_CONCURRENT_REQUESTS,
+                initial=1,
+                required=True,
+                help_text=_("Send up to this many records at a time. Records for the same "
+                            "form or case are always sent in order."),
+            )
 
     def _initialize_crispy_layout(self):
         self.helper = FormHelper(self)
@@ -93,6 +105,8 @@ class GenericRepeaterForm(forms.Form):
         form_fields = ["connection_settings_id", "request_method"]
         if self.formats and len(self.formats) > 1:
             form_fields.append('format')
+        if 'max_concurrent_requests' in self.fields:
+            form_fields.append('max_concurrent_requests')
         return form_fields
 
     def clean(self):
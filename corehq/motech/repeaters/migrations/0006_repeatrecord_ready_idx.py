@@ -0,0 +1,21 @@
+# Generated by Django 2.2.24 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repeaters', '0005_rename_repeaterstub_to_sql_repeater'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='sqlrepeatrecord',
+            index=models.Index(
+                condition=models.Q(state__in=('PENDING', 'FAIL')),
+                fields=['repeater', 'registered_at'],
+                name='repeatrecord_ready_idx',
+            ),
+        ),
+    ]
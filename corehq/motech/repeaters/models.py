@@ -63,6 +63,7 @@ class.
 "Data Forwarding Records".
 
 """
+import threading
 import traceback
 import warnings
 from collections import OrderedDict
@@ -187,14 +188,17 @@ class RepeaterManager(models.Manager):
             models.Q(next_attempt_at__isnull=True)
             | models.Q(next_attempt_at__lte=timezone.now())
         )
-        repeat_records_ready_to_send = models.Q(
-            repeat_records__state__in=(RECORD_PENDING_STATE,
-                                       RECORD_FAILURE_STATE)
+        # Use a subquery rather than a join so that each repeater is
+        # returned once, however many repeat records it has ready
+        repeat_records_ready_to_send = SQLRepeatRecord.objects.filter(
+            repeater_id=models.OuterRef('pk'),
+            state__in=(RECORD_PENDING_STATE, RECORD_FAILURE_STATE),
         )
         return (self.get_queryset()
                 .filter(not_paused)
                 .filter(next_attempt_not_in_the_future)
-                .filter(repeat_records_ready_to_send))
+                .annotate(has_ready_records=models.Exists(repeat_records_ready_to_send))
+                .filter(has_ready_records=True))
 
 
 class SQLRepeater(models.Model):
@@ -273,6 +277,9 @@ class Repeater(QuickCachedDocumentMixin, Document):
     format = StringProperty()
     friendly_name = _("Data")
     paused = BooleanProperty(default=False)
+    # Send up to this many repeat records at a time. Records with the
+    # same payload ID are still sent in order.
+    max_concurrent_requests = IntegerProperty(default=1)
 
     # TODO: Use to collect stats to determine whether remote endpoint is valid
     started_at = DateTimeProperty(default=datetime.utcnow)
@@ -340,6 +347,29 @@ class Repeater(QuickCachedDocumentMixin, Document):
     def payload_doc(self, repeat_record):
         raise NotImplementedError
 
+    @property
+    @memoized
+    def _payload_doc_prefetch(self):
+        return PayloadDocPrefetch()
+
+    def prefetch_payload_docs(self, repeat_records):
+        """
+        Fetch the payload docs of ``repeat_records`` in bulk when the
+        first of them is needed, instead of one at a time.
+
+        Applies to repeaters whose ``payload_doc()`` uses
+        ``_get_payload_form()`` or ``_get_payload_case()``.
+        """
+        self._payload_doc_prefetch.add(repeat_records)
+
+    def _get_payload_form(self, repeat_record):
+        form = self._payload_doc_prefetch.get(repeat_record, _get_forms_by_id)
+        return form or FormAccessors(repeat_record.domain).get_form(repeat_record.payload_id)
+
+    def _get_payload_case(self, repeat_record):
+        case = self._payload_doc_prefetch.get(repeat_record, _get_cases_by_id)
+        return case or CaseAccessors(repeat_record.domain).get_case(repeat_record.payload_id)
+
     @memoized
     def get_payload(self, repeat_record):
         return self.generator.get_payload(repeat_record, self.payload_doc(repeat_record))
@@ -515,6 +545,7 @@ class Repeater(QuickCachedDocumentMixin, Document):
             notify_addresses=self.connection_settings.notify_addresses,
             payload_id=repeat_record.payload_id,
             method=self.request_method,
+            connection_settings=self.connection_settings,
         )
 
     def fire_for_record(self, repeat_record):
@@ -595,7 +626,7 @@ class FormRepeater(Repeater):
 
     @memoized
     def payload_doc(self, repeat_record):
-        return FormAccessors(repeat_record.domain).get_form(repeat_record.payload_id)
+        return self._get_payload_form(repeat_record)
 
     @property
     def form_class_name(self):
@@ -662,7 +693,7 @@ class CaseRepeater(Repeater):
 
     @memoized
     def payload_doc(self, repeat_record):
-        return CaseAccessors(repeat_record.domain).get_case(repeat_record.payload_id)
+        return self._get_payload_case(repeat_record)
 
     @property
     def form_class_name(self):
@@ -798,7 +829,7 @@ class ShortFormRepeater(Repeater):
 
     @memoized
     def payload_doc(self, repeat_record):
-        return FormAccessors(repeat_record.domain).get_form(repeat_record.payload_id)
+        return self._get_payload_form(repeat_record)
 
     def allowed_to_forward(self, payload):
         return payload.xmlns != DEVICE_LOG_XMLNS
@@ -1164,6 +1195,13 @@ class SQLRepeatRecord(models.Model):
             models.Index(fields=['couch_id']),
             models.Index(fields=['payload_id']),
             models.Index(fields=['registered_at']),
+            # Repeat records ready to send, for `RepeaterManager.all_ready()`
+            # and `SQLRepeater.repeat_records_ready`
+            models.Index(
+                fields=['repeater', 'registered_at'],
+                name='repeatrecord_ready_idx',
+                condition=models.Q(state__in=(RECORD_PENDING_STATE, RECORD_FAILURE_STATE)),
+            ),
         ]
         ordering = ['registered_at']
 
@@ -1320,6 +1358,49 @@ def attempt_forward_now(repeater: SQLRepeater):
     process_repeater.delay(repeater)
 
 
+class PayloadDocPrefetch:
+    """
+    The payload docs of a batch of repeat records, fetched in bulk when
+    the first of them is needed
+    """
+
+    def __init__(self):
+        self._pending_ids = set()
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def add(self, repeat_records):
+        with self._lock:
+            self._pending_ids.update(r.payload_id for r in repeat_records)
+
+    def get(self, repeat_record, fetch_docs):
+        """
+        Returns the payload doc of ``repeat_record``, or None if it
+        was not prefetched. ``fetch_docs(domain, doc_ids)`` returns a
+        dict of docs by ID.
+        """
+        with self._lock:
+            if repeat_record.payload_id in self._pending_ids:
+                self._docs.update(fetch_docs(repeat_record.domain, list(self._pending_ids)))
+                self._pending_ids = set()
+            # Repeater.payload_doc() is memoized, so docs are only needed once
+            return self._docs.pop(repeat_record.payload_id, None)
+
+
+def _get_forms_by_id(domain, form_ids):
+    return {
+        form.form_id: form for form in FormAccessors(domain).get_forms(form_ids)
+        if form.domain == domain
+    }
+
+
+def _get_cases_by_id(domain, case_ids):
+    return {
+        case.case_id: case for case in CaseAccessors(domain).get_cases(case_ids)
+        if case.domain == domain
+    }
+
+
 def get_payload(repeater: Repeater, repeat_record: SQLRepeatRecord) -> str:
     try:
         return repeater.get_payload(repeat_record)
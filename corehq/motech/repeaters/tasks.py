@@ -1,11 +1,18 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
 from django.conf import settings
+from django.db import connections
 
 from celery.schedules import crontab
 from celery.task import periodic_task, task
 from celery.utils.log import get_task_logger
 
+from dimagi.utils.chunked import chunked
 from dimagi.utils.couch import CriticalSection, get_redis_lock
 from dimagi.utils.couch.undo import DELETED_SUFFIX
 
@@ -13,6 +20,7 @@ from corehq.motech.models import RequestLog
 from corehq.util.metrics import (
     make_buckets_from_timedeltas,
     metrics_counter,
+    metrics_gauge,
     metrics_gauge_task,
     metrics_histogram_timer,
 )
@@ -26,6 +34,7 @@ from .const import (
     RECORD_FAILURE_STATE,
     RECORD_PENDING_STATE,
     RECORDS_AT_A_TIME,
+    SLOW_RESPONSE_SECONDS,
 )
 from .dbaccessors import (
     get_overdue_repeat_record_count,
@@ -33,6 +42,7 @@ from .dbaccessors import (
 )
 from .models import (
     SQLRepeater,
+    attempt_forward_now,
     domain_can_forward,
     get_payload,
     send_request,
@@ -51,6 +61,8 @@ _soft_assert = soft_assert(to=MOTECH_DEV)
 logging = get_task_logger(__name__)
 
 DELETE_CHUNK_SIZE = 5000
+# Fetch the payload docs of this many repeat records at a time
+PAYLOAD_CHUNK_SIZE = 100
 
 
 @periodic_task(
@@ -114,6 +126,29 @@ def check_repeaters():
         check_repeater_lock.release()
 
 
+@periodic_task(
+    run_every=CHECK_REPEATERS_INTERVAL,
+    queue=settings.CELERY_PERIODIC_QUEUE,
+)
+def check_sql_repeaters():
+    """
+    Queues ``process_repeater()`` for each SQLRepeater that has repeat
+    records ready to send.
+
+    This is separate from ``check_repeaters()`` so that SQLRepeaters are
+    not held up while it iterates Couch repeat records.
+    """
+    _process_ready_sql_repeaters()
+
+
+def _process_ready_sql_repeaters():
+    # Finds them in one query, so this takes as long as there are ready
+    # repeaters, not as long as there are repeat records waiting.
+    for sql_repeater in SQLRepeater.objects.all_ready():
+        metrics_counter("commcare.repeaters.check.attempt_forward_repeater")
+        attempt_forward_now(sql_repeater)
+
+
 @task(serializer='pickle', queue=settings.CELERY_REPEAT_RECORD_QUEUE)
 def process_repeat_record(repeat_record):
     _process_repeat_record(repeat_record)
@@ -184,7 +219,15 @@ def process_repeater(repeater: SQLRepeater):
         [f'process-repeater-{repeater.repeater_id}'],
         fail_hard=False, block=False, timeout=5 * 60 * 60,
     ):
-        for repeat_record in repeater.repeat_records_ready[:RECORDS_AT_A_TIME]:
+        repeat_records = repeater.repeat_records_ready[:RECORDS_AT_A_TIME]
+        max_workers = repeater.repeater.max_concurrent_requests or 1
+        if max_workers > 1:
+            repeat_records = list(repeat_records)
+            repeater.repeater.prefetch_payload_docs(repeat_records)
+            _process_repeat_records_concurrently(repeater, repeat_records, max_workers)
+            return
+
+        for repeat_record in _iter_prefetching_payload_docs(repeater.repeater, repeat_records):
             try:
                 payload = get_payload(repeater.repeater, repeat_record)
             except Exception:
@@ -195,3 +238,90 @@ def process_repeater(repeater: SQLRepeater):
                                             repeat_record, payload)
             if should_retry:
                 break
+
+
+def _iter_prefetching_payload_docs(repeater, repeat_records):
+    for chunk in chunked(repeat_records, PAYLOAD_CHUNK_SIZE, list):
+        repeater.prefetch_payload_docs(chunk)
+        yield from chunk
+
+
+def _process_repeat_records_concurrently(repeater, repeat_records, max_workers):
+    """
+    Sends ``repeat_records`` using up to ``max_workers`` threads.
+
+    Records are split into one queue per worker by payload ID, so that
+    the records of a form or case are still sent in order. As when
+    sending records one at a time, all workers stop at the first record
+    that needs to be retried.
+    """
+    records_by_worker = defaultdict(list)
+    for repeat_record in repeat_records:
+        records_by_worker[hash(repeat_record.payload_id) % max_workers].append(repeat_record)
+
+    limiter = ConcurrencyLimiter(max_workers)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_send_repeat_records, repeater.repeater, records, limiter, stop)
+            for records in records_by_worker.values()
+        ]
+        for future in futures:
+            future.result()
+    metrics_gauge('commcare.repeaters.concurrent_requests.limit', limiter.limit, tags={
+        'domain': repeater.domain,
+    })
+
+
+def _send_repeat_records(repeater, repeat_records, limiter, stop):
+    try:
+        for repeat_record in repeat_records:
+            if stop.is_set():
+                return
+            try:
+                payload = get_payload(repeater, repeat_record)
+            except Exception:
+                continue
+            with limiter.request():
+                should_retry = not send_request(repeater, repeat_record, payload)
+            if should_retry:
+                stop.set()
+    finally:
+        # worker threads use their own database connections
+        connections.close_all()
+
+
+class ConcurrencyLimiter:
+    """
+    Limits the number of requests in flight to a remote API.
+
+    Starts with one request at a time, and allows one more each time a
+    response is fast, up to ``max_limit``. Halves the limit when a
+    response is slower than ``SLOW_RESPONSE_SECONDS``, so that a busy
+    remote API gets fewer requests.
+    """
+
+    def __init__(self, max_limit):
+        self.max_limit = max_limit
+        self.limit = 1
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def request(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - start
+            with self._condition:
+                self.in_flight -= 1
+                if duration > SLOW_RESPONSE_SECONDS:
+                    self.limit = max(1, self.limit // 2)
+                elif self.limit < self.max_limit:
+                    self.limit += 1
+                self._condition.notify_all()
@@ -6,9 +6,11 @@ from django.conf import settings
 from django.db.models.deletion import ProtectedError
 from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
+from unittest.mock import Mock, patch
 
 from nose.tools import assert_in
 
+from corehq.form_processor.interfaces.dbaccessors import CaseAccessors, FormAccessors
 from corehq.motech.const import ALGO_AES, BASIC_AUTH
 from corehq.motech.models import ConnectionSettings
 from corehq.motech.utils import b64_aes_encrypt
@@ -23,7 +25,9 @@ from ..const import (
     RECORD_SUCCESS_STATE,
 )
 from ..models import (
+    CaseRepeater,
     FormRepeater,
+    PayloadDocPrefetch,
     SQLRepeater,
     are_repeat_records_migrated,
     format_response,
@@ -186,6 +190,13 @@ class RepeaterManagerTests(RepeaterTestCase):
             self.assertEqual(len(sql_repeaters), 1)
             self.assertEqual(sql_repeaters[0].id, self.sql_repeater.id)
 
+    def test_all_ready_many_repeat_records(self):
+        with make_repeat_record(self.sql_repeater, RECORD_PENDING_STATE), \
+                make_repeat_record(self.sql_repeater, RECORD_FAILURE_STATE):
+            sql_repeaters = SQLRepeater.objects.all_ready()
+            self.assertEqual(len(sql_repeaters), 1)
+            self.assertEqual(sql_repeaters[0].id, self.sql_repeater.id)
+
     def test_all_ready_succeeded_repeat_record(self):
         with make_repeat_record(self.sql_repeater, RECORD_SUCCESS_STATE):
             sql_repeaters = SQLRepeater.objects.all_ready()
@@ -303,6 +314,74 @@ class FormatResponseTests(SimpleTestCase):
                                                 '<h1>Hello World</h1>')
 
 
+class PayloadDocPrefetchTests(SimpleTestCase):
+
+    def test_fetches_in_bulk(self):
+        records = [Mock(domain=DOMAIN, payload_id=payload_id) for payload_id in ('a', 'b', 'c')]
+        fetch_docs = Mock(return_value={'a': 'doc a', 'b': 'doc b'})
+        prefetch = PayloadDocPrefetch()
+        prefetch.add(records)
+
+        self.assertEqual([prefetch.get(r, fetch_docs) for r in records], ['doc a', 'doc b', None])
+        fetch_docs.assert_called_once()
+        domain, doc_ids = fetch_docs.call_args[0]
+        self.assertEqual(domain, DOMAIN)
+        self.assertEqual(set(doc_ids), {'a', 'b', 'c'})
+
+    def test_not_prefetched(self):
+        fetch_docs = Mock()
+        prefetch = PayloadDocPrefetch()
+        self.assertIsNone(prefetch.get(Mock(domain=DOMAIN, payload_id='a'), fetch_docs))
+        fetch_docs.assert_not_called()
+
+
+class PayloadDocTests(SimpleTestCase):
+
+    def _get_records(self):
+        return [Mock(domain=DOMAIN, payload_id=payload_id) for payload_id in ('a', 'b', 'c')]
+
+    def test_form_repeater(self):
+        repeater = FormRepeater(domain=DOMAIN)
+        records = self._get_records()
+        repeater.prefetch_payload_docs(records)
+        forms = {
+            'a': Mock(form_id='a', domain=DOMAIN),
+            'b': Mock(form_id='b', domain='other-domain'),
+            'c': Mock(form_id='c', domain=DOMAIN),
+        }
+        with patch.object(FormAccessors, 'get_forms', return_value=list(forms.values())) as get_forms, \
+                patch.object(FormAccessors, 'get_form') as get_form:
+            payload_docs = [repeater.payload_doc(record) for record in records]
+
+        get_forms.assert_called_once()
+        self.assertEqual(set(get_forms.call_args[0][0]), {'a', 'b', 'c'})
+        # The form in another domain is not used; it is looked up
+        # individually as it would be without prefetching
+        get_form.assert_called_once_with('b')
+        self.assertEqual(payload_docs, [forms['a'], get_form.return_value, forms['c']])
+
+    def test_case_repeater(self):
+        repeater = CaseRepeater(domain=DOMAIN)
+        records = self._get_records()
+        repeater.prefetch_payload_docs(records)
+        cases = [Mock(case_id=case_id, domain=DOMAIN) for case_id in ('a', 'b', 'c')]
+        with patch.object(CaseAccessors, 'get_cases', return_value=cases) as get_cases, \
+                patch.object(CaseAccessors, 'get_case') as get_case:
+            payload_docs = [repeater.payload_doc(record) for record in records]
+
+        get_cases.assert_called_once()
+        get_case.assert_not_called()
+        self.assertEqual(payload_docs, cases)
+
+    def test_not_prefetched(self):
+        repeater = FormRepeater(domain=DOMAIN)
+        record = Mock(domain=DOMAIN, payload_id='a')
+        with patch.object(FormAccessors, 'get_forms') as get_forms, \
+                patch.object(FormAccessors, 'get_form') as get_form:
+            self.assertIs(repeater.payload_doc(record), get_form.return_value)
+        get_forms.assert_not_called()
+
+
 class AddAttemptsTests(RepeaterTestCase):
 
     def setUp(self):
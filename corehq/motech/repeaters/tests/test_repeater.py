@@ -265,6 +265,7 @@ class RepeaterTest(BaseRepeaterTest):
                     notify_addresses=[],
                     payload_id=repeat_record.payload_id,
                     method="POST",
+                    connection_settings=repeat_record.repeater.connection_settings,
                 )
 
         # The following is pretty fickle and depends on which of
@@ -777,6 +778,7 @@ class TestRepeaterFormat(BaseRepeaterTest):
                 payload_id='ABC123CASEID',
                 verify=self.repeater.verify,
                 method="POST",
+                connection_settings=self.connx,
             )
 
     def test_get_format_by_deprecated_name(self):
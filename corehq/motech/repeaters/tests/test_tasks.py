@@ -1,26 +1,36 @@
+import threading
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
 
 from corehq.apps.domain.shortcuts import create_domain
 from corehq.apps.receiverwrapper.util import submit_form_locally
 from corehq.form_processor.backends.sql.dbaccessors import FormAccessorSQL
+from corehq.form_processor.interfaces.dbaccessors import FormAccessors
 from corehq.form_processor.utils.xform import (
     FormSubmissionBuilder,
     TestFormMetadata,
 )
 from corehq.motech.models import ConnectionSettings, RequestLog
+from corehq.motech.session_pool import get_session_key, session_pool
 
 from ..const import (
     RECORD_CANCELLED_STATE,
     RECORD_FAILURE_STATE,
     RECORD_PENDING_STATE,
+    RECORD_SUCCESS_STATE,
 )
 from ..models import FormRepeater, SQLRepeater
-from ..tasks import process_repeater, delete_old_request_logs
+from ..tasks import (
+    ConcurrencyLimiter,
+    _process_ready_sql_repeaters,
+    _process_repeat_records_concurrently,
+    delete_old_request_logs,
+    process_repeater,
+)
 
 DOMAIN = 'gaidhlig'
 PAYLOAD_IDS = ['aon', 'dha', 'trì', 'ceithir', 'coig', 'sia', 'seachd', 'ochd',
@@ -131,6 +141,18 @@ class TestProcessRepeater(TestCase):
         self.assertTrue(all(r.attempts[0].state == RECORD_CANCELLED_STATE
                             for r in records))
 
+    def test_process_ready_sql_repeaters(self):
+        with patch('corehq.motech.repeaters.models.domain_can_forward', return_value=True), \
+                patch('corehq.motech.repeaters.tasks.process_repeater') as process_repeater_mock:
+            _process_ready_sql_repeaters()
+        process_repeater_mock.delay.assert_called_once_with(self.sql_repeater)
+
+    def test_process_ready_sql_repeaters_cannot_forward(self):
+        with patch('corehq.motech.repeaters.models.domain_can_forward', return_value=False), \
+                patch('corehq.motech.repeaters.tasks.process_repeater') as process_repeater_mock:
+            _process_ready_sql_repeaters()
+        process_repeater_mock.delay.assert_not_called()
+
     def test_send_request_fails(self):
         # If send_request() should be retried with the same repeat
         # record, process_repeater() should exit
@@ -145,6 +167,118 @@ class TestProcessRepeater(TestCase):
         self.assertListEqual(states, ([RECORD_FAILURE_STATE]
                                       + [RECORD_PENDING_STATE] * 9))
 
+    def test_payload_docs_are_fetched_in_bulk(self):
+        with form_context(PAYLOAD_IDS), \
+                patch('corehq.motech.repeaters.models.simple_request') as post_mock, \
+                patch('corehq.motech.repeaters.tasks.metrics_counter'), \
+                patch.object(FormAccessors, 'get_forms', autospec=True,
+                             side_effect=FormAccessors.get_forms) as get_forms, \
+                patch.object(FormAccessors, 'get_form', autospec=True,
+                             side_effect=FormAccessors.get_form) as get_form:
+            post_mock.return_value = Mock(status_code=200, reason='OK')
+            process_repeater(self.sql_repeater)
+
+        # One query for all of the forms in the chunk
+        get_forms.assert_called_once()
+        get_form.assert_not_called()
+        states = [r.state for r in self.sql_repeater.repeat_records.all()]
+        self.assertListEqual(states, [RECORD_SUCCESS_STATE] * 10)
+        sent_payload_ids = [c[1]['payload_id'] for c in post_mock.call_args_list]
+        self.assertListEqual(sent_payload_ids, PAYLOAD_IDS)
+
+
+@patch('corehq.motech.repeaters.tasks.metrics_gauge')
+@patch('corehq.motech.repeaters.tasks.get_payload', new=lambda repeater, record: record.payload_id)
+class TestProcessRepeatRecordsConcurrently(SimpleTestCase):
+
+    def _process(self, records, send_request):
+        repeater = Mock(domain=DOMAIN)
+        with patch('corehq.motech.repeaters.tasks.send_request', side_effect=send_request):
+            _process_repeat_records_concurrently(repeater, records, max_workers=3)
+
+    def test_records_for_a_payload_are_sent_in_order(self):
+        records = [Mock(payload_id=payload_id, index=i) for i, payload_id in enumerate(PAYLOAD_IDS * 3)]
+        sent = []
+        self._process(records, lambda repeater, record, payload: sent.append(record) or True)
+
+        self.assertEqual(len(sent), len(records))
+        for payload_id in PAYLOAD_IDS:
+            indexes = [r.index for r in sent if r.payload_id == payload_id]
+            self.assertEqual(indexes, sorted(indexes))
+
+    def test_stops_after_retry(self):
+        records = [Mock(payload_id=payload_id) for payload_id in PAYLOAD_IDS * 3]
+        sent = []
+
+        def send_request(repeater, record, payload):
+            sent.append(record)
+            return False  # retry
+
+        self._process(records, send_request)
+        # Each worker stops after the first record that needs a retry
+        self.assertLessEqual(len(sent), 3)
+
+    def test_unauthorized_response(self):
+        # A 401 discards the pooled session that other workers are using
+        connx = ConnectionSettings(pk=-1, domain=DOMAIN, url='http://localhost/api/')
+        self.addCleanup(session_pool.discard, get_session_key(connx))
+        discarded = threading.Event()
+        closed = []
+
+        def create_session(domain):
+            session = Mock(in_flight=[])
+
+            def request(method, url, **kwargs):
+                session.in_flight.append(url)
+                try:
+                    if url.endswith('/aon'):
+                        return Mock(status_code=401)
+                    # wait for the first session to be discarded
+                    discarded.wait(timeout=1)
+                    return Mock(status_code=200)
+                finally:
+                    session.in_flight.remove(url)
+
+            session.request.side_effect = request
+            session.close.side_effect = lambda: closed.append(list(session.in_flight))
+            return session
+
+        def send_request(repeater, record, payload):
+            requests = connx.get_requests(payload_id=payload, logger=lambda *args: None)
+            requests.post(payload)
+            return True
+
+        def discard(*args, **kwargs):
+            discard_session(*args, **kwargs)
+            discarded.set()
+
+        discard_session = session_pool.discard
+        records = [Mock(payload_id=payload_id) for payload_id in PAYLOAD_IDS]
+        with patch.object(ConnectionSettings, 'get_auth_manager') as get_auth_manager, \
+                patch.object(session_pool, 'discard', side_effect=discard):
+            get_auth_manager.return_value.get_session.side_effect = create_session
+            self._process(records, send_request)
+
+        self.assertTrue(discarded.is_set())
+        # The discarded session was closed once no requests were using it
+        self.assertEqual(closed, [[]])
+
+
+class TestConcurrencyLimiter(SimpleTestCase):
+
+    def test_limit(self):
+        limiter = ConcurrencyLimiter(max_limit=3)
+        self.assertEqual(limiter.limit, 1)
+        for __ in range(5):
+            with limiter.request():
+                pass
+        self.assertEqual(limiter.limit, 3)
+
+        with patch('corehq.motech.repeaters.tasks.time.monotonic', side_effect=[0, 60]):
+            with limiter.request():
+                pass
+        self.assertEqual(limiter.limit, 1)
+
 
 @contextmanager
 def form_context(form_ids):
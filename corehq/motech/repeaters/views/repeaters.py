@@ -138,6 +138,8 @@ class BaseRepeaterView(BaseAdminProjectSettingsView):
         repeater.connection_settings_id = int(cleaned_data['connection_settings_id'])
         repeater.request_method = cleaned_data['request_method']
         repeater.format = cleaned_data['format']
+        if cleaned_data.get('max_concurrent_requests'):
+            repeater.max_concurrent_requests = cleaned_data['max_concurrent_requests']
         return repeater
 
     def post_save(self, request, repeater):
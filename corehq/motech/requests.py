@@ -18,7 +18,8 @@ from corehq.motech.const import (
     REQUEST_PUT,
     REQUEST_TIMEOUT,
 )
-from corehq.motech.models import RequestLog, RequestLogEntry
+from corehq.motech.models import ConnectionSettings, RequestLog, RequestLogEntry
+from corehq.motech.session_pool import get_session_key, session_pool
 from corehq.motech.utils import (
     get_endpoint_url,
     pformat_json,
@@ -86,6 +87,10 @@ class Requests(object):
 
     To maintain a session of authenticated non-API requests, use
     Requests as a context manager.
+
+    If ``connection_settings`` are given, requests are sent using a
+    session from the session pool, which is kept open between requests
+    so that the connection to the remote server can be reused.
     """
 
     def __init__(
@@ -98,6 +103,7 @@ class Requests(object):
         notify_addresses: Optional[list] = None,
         payload_id: Optional[str] = None,
         logger: Optional[Callable] = None,
+        connection_settings: Optional[ConnectionSettings] = None,
     ):
         """
         Initialise instance
@@ -113,6 +119,8 @@ class Requests(object):
             associated with this request
         :param logger: function called after a request has been sent:
                         `logger(log_level, log_entry: RequestLogEntry)`
+        :param connection_settings: The ConnectionSettings that
+            ``auth_manager`` belongs to, if any. Used to pool sessions.
         """
         self.domain_name = domain_name
         self.base_url = base_url
@@ -123,13 +131,23 @@ class Requests(object):
         self.logger = logger or RequestLog.log
         self.send_request = log_request(self, self.send_request_unlogged, self.logger)
         self._session = None
+        self._session_key = get_session_key(connection_settings)
 
     def __enter__(self):
-        self._session = self.auth_manager.get_session(self.domain_name)
+        if self._session_key:
+            self._session = session_pool.get_session(
+                self._session_key,
+                lambda: self.auth_manager.get_session(self.domain_name),
+            )
+        else:
+            self._session = self.auth_manager.get_session(self.domain_name)
         return self
 
     def __exit__(self, *args):
-        self._session.close()
+        if self._session_key:
+            session_pool.release(self._session)
+        else:
+            self._session.close()
         self._session = None
 
     def send_request_unlogged(self, method, url, *args, **kwargs):
@@ -143,6 +161,10 @@ class Requests(object):
             # Mimics the behaviour of requests.api.request()
             with self:
                 response = self._session.request(method, url, *args, **kwargs)
+        if self._session_key and response.status_code == 401:
+            # The remote server may have revoked the session's token.
+            # Start a new session for the next request.
+            session_pool.discard(self._session_key, reason='unauthorized')
         if raise_for_status:
             response.raise_for_status()
         return response
@@ -244,7 +266,8 @@ def parse_request_exception(err):
 
 
 def simple_request(domain, url, data, *, headers, auth_manager, verify,
-                   method="POST", notify_addresses=None, payload_id=None):
+                   method="POST", notify_addresses=None, payload_id=None,
+                   connection_settings=None):
     if isinstance(data, str):
         # Encode as UTF-8, otherwise requests will send data containing
         # non-ASCII characters as 'data:application/octet-stream;base64,...'
@@ -261,6 +284,7 @@ def simple_request(domain, url, data, *, headers, auth_manager, verify,
         auth_manager=auth_manager,
         notify_addresses=notify_addresses,
         payload_id=payload_id,
+        connection_settings=connection_settings,
     )
 
     request_methods = {
@@ -285,7 +309,7 @@ def simple_request(domain, url, data, *, headers, auth_manager, verify,
 
 
 def simple_post(domain, url, data, *, headers, auth_manager, verify,
-                notify_addresses=None, payload_id=None):
+                notify_addresses=None, payload_id=None, connection_settings=None):
     """
     POST with a cleaner API, and return the actual HTTPResponse object, so
     that error codes can be interpreted.
@@ -300,6 +324,7 @@ def simple_post(domain, url, data, *, headers, auth_manager, verify,
         notify_addresses=notify_addresses,
         payload_id=payload_id,
         method="POST",
+        connection_settings=connection_settings,
     )
 
 
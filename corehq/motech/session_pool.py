@@ -0,0 +1,155 @@
+"""
+A process-wide pool of ``requests`` sessions, one per ConnectionSettings
+
+Creating a new session for every request means a new TCP connection,
+and a new TLS handshake, for every payload a repeater forwards. Reusing
+the session for the same connection settings lets urllib3 keep the
+connection to the remote server alive between requests.
+
+Sessions are keyed on the connection settings' URL and auth config, so
+that editing a connection starts a new session. Sessions that have not
+been used for ``SESSION_POOL_IDLE_TIMEOUT`` seconds are closed, and the
+least recently used session is closed when the pool is full.
+
+A session can be used by several threads at once, e.g. by repeaters that
+send requests concurrently. Callers ``release()`` a session when they are
+done with it, and a session that is removed from the pool while it is in
+use is only closed once it has been released by every caller.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from corehq.util.metrics import metrics_counter, metrics_gauge
+
+SESSION_POOL_MAX_SIZE = 50
+SESSION_POOL_IDLE_TIMEOUT = 5 * 60  # seconds
+
+# ConnectionSettings fields that change how a session is authenticated
+SESSION_KEY_FIELDS = (
+    'url',
+    'auth_type',
+    'api_auth_settings',
+    'username',
+    'password',
+    'client_id',
+    'client_secret',
+    'skip_cert_verify',
+    'token_url',
+    'refresh_url',
+    'pass_credentials_in_header',
+)
+
+
+def get_session_key(connection_settings):
+    """
+    Returns the key of the pooled session for ``connection_settings``,
+    or None if its sessions should not be pooled.
+    """
+    if connection_settings is None or connection_settings.pk is None:
+        return None
+    config = '\n'.join(
+        str(getattr(connection_settings, field)) for field in SESSION_KEY_FIELDS
+    )
+    # Hash the config so that the pool does not hold on to credentials
+    config_hash = hashlib.sha1(config.encode('utf-8')).hexdigest()
+    return connection_settings.domain, connection_settings.pk, config_hash
+
+
+class SessionPool:
+
+    def __init__(self, max_size=SESSION_POOL_MAX_SIZE, idle_timeout=SESSION_POOL_IDLE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._sessions = OrderedDict()  # key: (session, last_used)
+        self._in_use = Counter()  # session: number of callers using it
+        self._removed = set()  # sessions to close when they are released
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get_session(self, key, create_session):
+        """
+        Returns the pooled session for ``key``, calling
+        ``create_session()`` to create it if necessary. Pass the session
+        to ``release()`` when done with it.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            if key in self._sessions:
+                session, __ = self._sessions.pop(key)
+                self._sessions[key] = (session, now)
+                self._in_use[session] += 1
+                metrics_counter('commcare.motech.session_pool.get', tags={'result': 'reused'})
+                return session
+
+        # Creating a session can make a request for an auth token, so
+        # don't hold the lock while doing it
+        session = create_session()
+        with self._lock:
+            if key in self._sessions:
+                # Another thread created one first
+                session.close()
+                session, __ = self._sessions.pop(key)
+            self._sessions[key] = (session, now)
+            self._in_use[session] += 1
+            while len(self._sessions) > self.max_size:
+                __, (evicted, __) = self._sessions.popitem(last=False)
+                self._remove(evicted, 'pool_full')
+            metrics_gauge('commcare.motech.session_pool.size', len(self._sessions))
+        metrics_counter('commcare.motech.session_pool.get', tags={'result': 'created'})
+        return session
+
+    def release(self, session):
+        """
+        Called when done with a session returned by ``get_session()``.
+        Closes the session if it has been removed from the pool and no
+        one else is using it.
+        """
+        with self._lock:
+            self._in_use[session] -= 1
+            if self._in_use[session] <= 0:
+                del self._in_use[session]
+                if session in self._removed:
+                    self._removed.remove(session)
+                    session.close()
+
+    def discard(self, key, reason='discarded'):
+        """
+        Removes the session for ``key``, e.g. after its authentication
+        has failed, so that the next request gets a new session. The
+        session is closed once no one is using it.
+        """
+        with self._lock:
+            if key in self._sessions:
+                session, __ = self._sessions.pop(key)
+                self._remove(session, reason)
+
+    def clear(self):
+        with self._lock:
+            while self._sessions:
+                __, (session, __) = self._sessions.popitem()
+                self._remove(session, 'cleared')
+
+    def _evict_idle(self, now):
+        idle_keys = [
+            key for key, (session, last_used) in self._sessions.items()
+            if now - last_used > self.idle_timeout
+        ]
+        for key in idle_keys:
+            session, __ = self._sessions.pop(key)
+            self._remove(session, 'idle')
+
+    def _remove(self, session, reason):
+        # Called with the lock held, after ``session`` is removed from the pool
+        if self._in_use[session] > 0:
+            self._removed.add(session)
+        else:
+            session.close()
+        metrics_counter('commcare.motech.session_pool.evicted', tags={'reason': reason})
+
+
+session_pool = SessionPool()
@@ -0,0 +1,102 @@
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase
+
+import requests
+
+from corehq.motech.const import BASIC_AUTH
+from corehq.motech.models import ConnectionSettings
+from corehq.motech.session_pool import SessionPool, get_session_key, session_pool
+
+DOMAIN = 'test-domain'
+
+
+def noop_logger(*args, **kwargs):
+    pass
+
+
+class SessionPoolTests(SimpleTestCase):
+
+    def test_reuses_session(self):
+        pool = SessionPool()
+        create_session = Mock(side_effect=lambda: Mock())
+        session = pool.get_session('key', create_session)
+        self.assertIs(pool.get_session('key', create_session), session)
+        self.assertEqual(create_session.call_count, 1)
+
+    def test_evicts_least_recently_used(self):
+        pool = SessionPool(max_size=2)
+        session1 = pool.get_session('key1', Mock)
+        pool.get_session('key2', Mock)
+        pool.get_session('key1', Mock)
+        pool.get_session('key3', Mock)
+        self.assertEqual(len(pool), 2)
+        self.assertIs(pool.get_session('key1', Mock), session1)
+        session1.close.assert_not_called()
+
+    def test_evicts_idle(self):
+        pool = SessionPool(idle_timeout=60)
+        with patch('corehq.motech.session_pool.time.monotonic', return_value=1000):
+            session = pool.get_session('key', Mock)
+            pool.release(session)
+        with patch('corehq.motech.session_pool.time.monotonic', return_value=1061):
+            self.assertIsNot(pool.get_session('key', Mock), session)
+        session.close.assert_called_once()
+
+    def test_discard(self):
+        pool = SessionPool()
+        session = pool.get_session('key', Mock)
+        pool.release(session)
+        pool.discard('key')
+        session.close.assert_called_once()
+        self.assertIsNot(pool.get_session('key', Mock), session)
+
+    def test_discard_in_use(self):
+        pool = SessionPool()
+        session = pool.get_session('key', Mock)
+        self.assertIs(pool.get_session('key', Mock), session)
+        pool.discard('key')
+        self.assertIsNot(pool.get_session('key', Mock), session)
+        pool.release(session)
+        session.close.assert_not_called()
+        pool.release(session)
+        session.close.assert_called_once()
+
+
+class SessionKeyTests(SimpleTestCase):
+
+    def _get_connection_settings(self, **kwargs):
+        kwargs.setdefault('pk', 1)
+        return ConnectionSettings(
+            domain=DOMAIN,
+            url='https://example.com/api/',
+            auth_type=BASIC_AUTH,
+            username='admin',
+            password='district',
+            **kwargs
+        )
+
+    def test_unsaved(self):
+        self.assertIsNone(get_session_key(self._get_connection_settings(pk=None)))
+
+    def test_changed_auth(self):
+        self.assertEqual(
+            get_session_key(self._get_connection_settings()),
+            get_session_key(self._get_connection_settings(name='Renamed')),
+        )
+        self.assertNotEqual(
+            get_session_key(self._get_connection_settings()),
+            get_session_key(self._get_connection_settings(skip_cert_verify=True)),
+        )
+
+    def test_requests_reuse_session(self):
+        connx = self._get_connection_settings(pk=-1)
+        self.addCleanup(session_pool.discard, get_session_key(connx))
+        with patch.object(requests.Session, 'request'), \
+                patch.object(requests.Session, 'close') as close_mock, \
+                patch.object(ConnectionSettings, 'get_auth_manager') as get_auth_manager:
+            get_auth_manager.return_value.get_session.side_effect = lambda domain: requests.Session()
+            connx.get_requests(logger=noop_logger).get('me')
+            connx.get_requests(logger=noop_logger).get('me')
+        self.assertEqual(get_auth_manager.return_value.get_session.call_count, 1)
+        close_mock.assert_not_called()
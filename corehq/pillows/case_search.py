@@ -7,10 +7,16 @@ from corehq.apps.case_search.const import (
     INDEXED_ON,
     SPECIAL_CASE_PROPERTIES_MAP,
     SYSTEM_PROPERTIES,
+    TYPED_EXACT,
+    TYPED_PROPERTIES_PATH,
     VALUE,
 )
 from corehq.apps.case_search.exceptions import CaseSearchNotEnabledException
-from corehq.apps.case_search.models import case_search_enabled_domains
+from corehq.apps.case_search.models import (
+    bump_case_search_generation_after_write,
+    case_search_enabled_domains,
+    get_typed_properties,
+)
 from corehq.apps.change_feed import topics
 from corehq.apps.change_feed.consumer.feed import (
     KafkaChangeFeed,
@@ -42,9 +48,8 @@ from pillowtop.checkpoints.manager import (
     get_checkpoint_for_elasticsearch_pillow,
 )
 from pillowtop.es_utils import initialize_index_and_mapping, ElasticsearchIndexInfo
-from pillowtop.feed.interface import Change
 from pillowtop.pillow.interface import ConstructedPillow
-from pillowtop.processors.elastic import ElasticProcessor
+from pillowtop.processors.elastic import BulkElasticProcessor
 from pillowtop.reindexer.change_providers.case import (
     get_domain_case_change_provider,
 )
@@ -79,6 +84,7 @@ def transform_case_for_elasticsearch(doc_dict):
     doc['_id'] = doc_dict.get('_id')
     doc[INDEXED_ON] = json_format_datetime(datetime.utcnow())
     doc['case_properties'] = _get_case_properties(doc_dict)
+    doc[TYPED_PROPERTIES_PATH] = _get_typed_property_fields(doc_dict)
     return doc
 
 
@@ -107,22 +113,70 @@ def _get_case_properties(doc_dict):
     return base_case_properties + dynamic_mapping
 
 
-class CaseSearchPillowProcessor(ElasticProcessor):
+def _get_typed_property_fields(doc_dict):
+    typed_properties = get_typed_properties(doc_dict.get('domain'))
+    if not typed_properties:
+        return {}
+    case_json = doc_dict['case_json']
+    fields = {}
+    for key, type_ in typed_properties.items():
+        if key in SPECIAL_CASE_PROPERTIES_MAP:
+            value = SPECIAL_CASE_PROPERTIES_MAP[key].value_getter(doc_dict)
+            if value is None:
+                continue
+        elif key in case_json:
+            value = case_json[key]
+        else:
+            continue
+        # match the values in case_properties
+        if not isinstance(value, str):
+            value = str(value)
+        fields[key] = {TYPED_EXACT: value}
+        if type_ != TYPED_EXACT and value:
+            fields[key][type_] = value
+    return fields
 
-    def process_change(self, change):
-        assert isinstance(change, Change)
-        if self.change_filter_fn and self.change_filter_fn(change):
-            return
 
-        if change.metadata is not None:
-            # Comes from KafkaChangeFeed (i.e. running pillowtop)
-            domain = change.metadata.domain
-        else:
-            # comes from ChangeProvider (i.e reindexing)
-            domain = change.get_document()['domain']
+def _get_change_domain(change):
+    if change.metadata is not None:
+        # Comes from KafkaChangeFeed (i.e. running pillowtop)
+        return change.metadata.domain
+    # comes from ChangeProvider (i.e reindexing)
+    return change.get_document()['domain']
+
+
+class BulkCaseSearchPillowProcessor(BulkElasticProcessor):
+    """Indexes cases of domains that use the case search index
 
+    Changes for domains that don't use the case search index are dropped
+    before the chunk is fetched and sent to ES.
+    """
+
+    # Case search docs include every case property, so bound requests by size
+    bulk_max_chunk_bytes = 10 * 1024 * 1024
+
+    def process_change(self, change):
+        domain = _get_change_domain(change)
         if domain and domain_needs_search_index(domain):
-            super(CaseSearchPillowProcessor, self).process_change(change)
+            super().process_change(change)
+            bump_case_search_generation_after_write(domain)
+
+    def process_changes_chunk(self, changes_chunk):
+        search_domains = domains_needing_search_index()
+        domains = set()
+        changes_to_process = []
+        for change in changes_chunk:
+            domain = _get_change_domain(change)
+            if domain in search_domains:
+                domains.add(domain)
+                changes_to_process.append(change)
+        if not changes_to_process:
+            return [], []
+        try:
+            return super().process_changes_chunk(changes_to_process)
+        finally:
+            for domain in domains:
+                bump_case_search_generation_after_write(domain)
 
 
 def get_case_search_processor():
@@ -134,7 +188,7 @@ def get_case_search_processor():
     Writes to:
       - Case Search ES index
     """
-    return CaseSearchPillowProcessor(
+    return BulkCaseSearchPillowProcessor(
         elasticsearch=get_es_new(),
         index_info=CASE_SEARCH_INDEX_INFO,
         doc_prep_fn=transform_case_for_elasticsearch,
@@ -197,6 +251,7 @@ class CaseSearchReindexerFactory(ReindexerFactory):
             return PillowChangeProviderReindexer(
                 get_case_search_processor(),
                 change_provider=change_provider,
+                chunk_size=1000,
             )
 
 
@@ -205,7 +260,7 @@ def get_case_search_to_elasticsearch_pillow(pillow_id='CaseSearchToElasticsearch
     """Populates the `case search` Elasticsearch index.
 
         Processors:
-          - :py:class:`corehq.pillows.case_search.CaseSearchPillowProcessor`
+          - :py:class:`corehq.pillows.case_search.BulkCaseSearchPillowProcessor`
     """
     index_info = CASE_SEARCH_INDEX_INFO
     if 'index_name' in kwargs and 'index_alias' in kwargs:
@@ -218,7 +273,7 @@ def get_case_search_to_elasticsearch_pillow(pillow_id='CaseSearchToElasticsearch
         index_info.alias = kwargs['index_alias']
 
     checkpoint = get_checkpoint_for_elasticsearch_pillow(pillow_id, index_info, topics.CASE_TOPICS)
-    case_processor = CaseSearchPillowProcessor(
+    case_processor = BulkCaseSearchPillowProcessor(
         elasticsearch=get_es_new(),
         index_info=index_info,
         doc_prep_fn=transform_case_for_elasticsearch
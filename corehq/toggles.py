@@ -2169,3 +2169,45 @@ DO_NOT_REPUBLISH_DOCS = StaticToggle(
     TAG_INTERNAL,
     namespaces=[NAMESPACE_DOMAIN],
 )
+
+CACHE_LOCATION_FIXTURES = StaticToggle(
+    'cache_location_fixtures',
+    'Cache rendered location fixtures and share them between users syncing the same locations',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+INCREMENTAL_SUITE_GENERATION = StaticToggle(
+    'incremental_suite_generation',
+    'Reuse the suite.xml elements of unchanged modules from previous builds',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+CASE_IMPORT_PARALLEL_SUBMISSION = StaticToggle(
+    'case_import_parallel_submission',
+    'Submit the cases of each database shard concurrently during case imports',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+CASE_SEARCH_TYPED_PROPERTIES = StaticToggle(
+    'case_search_typed_properties',
+    'Search the properties set in the case search config as typed fields instead of nested case properties',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+CASE_SEARCH_RESULT_CACHE = StaticToggle(
+    'case_search_result_cache',
+    'Briefly cache the results of case searches until cases in the domain change',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
+
+REPEATER_CONCURRENT_REQUESTS = StaticToggle(
+    'repeater_concurrent_requests',
+    'Allow data forwarders to send repeat records to their remote API concurrently',
+    TAG_INTERNAL,
+    namespaces=[NAMESPACE_DOMAIN],
+)
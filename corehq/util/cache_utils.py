@@ -1,4 +1,6 @@
 import hashlib
+from uuid import uuid4
+
 from django.core.cache import cache
 
 
@@ -69,3 +71,28 @@ def get_exponential(rate_limit_key, exponential_base=2):
 
 def clear_limit(rate_limit_key):
     ExponentialCache.delete_key(rate_limit_key)
+
+
+def get_cache_generation(key):
+    """Get an opaque token identifying the current generation of some data
+
+    Include the token in cache keys for data derived from that data, and
+    call `bump_cache_generation` whenever it changes. Tokens are random
+    rather than counters so that losing one from the cache can only ever
+    cause a cache miss, never a stale hit.
+    """
+    cache_key = _get_generation_cache_key(key)
+    generation = cache.get(cache_key)
+    if generation is None:
+        generation = uuid4().hex
+        if not cache.add(cache_key, generation, timeout=None):
+            generation = cache.get(cache_key) or generation
+    return generation
+
+
+def bump_cache_generation(key):
+    cache.set(_get_generation_cache_key(key), uuid4().hex, timeout=None)
+
+
+def _get_generation_cache_key(key):
+    return 'cache-generation.{}'.format(key)
@@ -101,6 +101,17 @@ class AbstractElasticsearchInterface(metaclass=abc.ABCMeta):
         self._fix_hits_in_results(results)
         return results
 
+    def msearch(self, index_alias=None, doc_type=None, bodies=None):
+        """Runs several searches in one request and returns a list of their results"""
+        self._verify_is_alias(index_alias)
+        body = []
+        for query in bodies:
+            body.extend([{}, query])
+        results = self.es.msearch(body=body, index=index_alias, doc_type=doc_type)['responses']
+        for result in results:
+            self._fix_hits_in_results(result)
+        return results
+
     def scroll(self, scroll_id=None, body=None, params=None, **kwargs):
         results = self.es.scroll(scroll_id, body, params=params or {}, **kwargs)
         self._fix_hits_in_results(results)
@@ -0,0 +1,171 @@
+"""
+Aggregated profiling of requests made to Elasticsearch
+
+Every search, scroll, count and multi-get made through ``corehq.elastic`` is
+timed and reported as a histogram, tagged with the index, the operation and
+the caller that made it: the view for web requests, the task for celery and
+the pillow for change feed processors. Requests slower than
+``settings.ES_SLOW_QUERY_THRESHOLD`` seconds are also written to the
+``es_slow_queries`` log along with the query and, if the query was run with
+profiling enabled, Elasticsearch's profile output.
+
+Queries are identified in the log by a fingerprint of their shape, with all
+values stripped out, so that slow queries that differ only in the domain,
+ids or search terms searched for can be grouped together.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from celery._state import get_current_task
+
+from corehq.util.global_request import get_request
+from corehq.util.metrics import metrics_counter, metrics_histogram
+
+slow_query_logger = logging.getLogger('es_slow_queries')
+
+_caller = threading.local()
+
+DURATION_BUCKETS = [0.1, 0.5, 1, 5, 10, 30]
+HITS_BUCKETS = [0, 10, 100, 1000, 10000, 100000]
+
+
+def set_es_caller(name):
+    """Attribute Elasticsearch requests made in this thread to ``name``
+
+    For long running processes, like pillows, that are neither a request nor
+    a celery task.
+    """
+    _caller.name = name
+
+
+def get_es_caller():
+    name = getattr(_caller, 'name', None)
+    if name:
+        return name
+
+    task = get_current_task()
+    if task and task.request:
+        return task.name
+
+    request = get_request()
+    if request is not None:
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            return match.view_name or match._func_path
+        return 'unresolved_request'
+    return '-'
+
+
+def get_query_fingerprint(query):
+    """Returns a hash of the structure of ``query`` that ignores its values"""
+    shape = json.dumps(_get_query_shape(query), sort_keys=True)
+    return hashlib.md5(shape.encode('utf-8')).hexdigest()[:12]
+
+
+def _get_query_shape(value):
+    if isinstance(value, dict):
+        return {key: _get_query_shape(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        # the number of terms or ids in a list doesn't change the shape
+        return sorted({json.dumps(_get_query_shape(item), sort_keys=True) for item in value})
+    return '?'
+
+
+class ESRequestProfile(object):
+
+    def __init__(self, operation, index_cname, query):
+        self.operation = operation
+        self.index_cname = index_cname
+        self.query = query
+        self.caller = get_es_caller()
+        self.duration = None
+        self.hits = 0
+        self.took = 0
+        self.shard_failures = 0
+        self.profiles = []
+        self.error = False
+        self._paused_duration = 0
+
+    @contextmanager
+    def paused(self):
+        """Exclude time spent in the block, e.g. by the consumer of a scroll, from the duration"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self._paused_duration += time.time() - start
+
+    def add_results(self, results):
+        """Record the hits and shard failures of a search (or scroll page) response"""
+        if not isinstance(results, dict):
+            return
+        total = results.get('hits', {}).get('total')
+        if isinstance(total, int):
+            self.hits = max(self.hits, total)
+        self.took += results.get('took', 0)
+        self.shard_failures += results.get('_shards', {}).get('failed', 0)
+        if results.get('profile'):
+            self.profiles.append(results['profile'])
+
+    def report(self):
+        tags = {
+            'index': self.index_cname,
+            'operation': self.operation,
+            'caller': self.caller,
+            'error': 'yes' if self.error else 'no',
+        }
+        metrics_histogram(
+            'commcare.es.request.duration', self.duration,
+            bucket_tag='duration', buckets=DURATION_BUCKETS, bucket_unit='s',
+            tags=tags,
+        )
+        metrics_histogram(
+            'commcare.es.request.hits', self.hits,
+            bucket_tag='hits', buckets=HITS_BUCKETS,
+            tags=tags,
+        )
+        if self.shard_failures:
+            metrics_counter('commcare.es.request.shard_failures', self.shard_failures, tags=tags)
+
+        if self.duration >= settings.ES_SLOW_QUERY_THRESHOLD:
+            self._log_slow_query()
+
+    def _log_slow_query(self):
+        slow_query_logger.info(json.dumps({
+            'query': self.query,
+            'profile': self.profiles,
+        }, default=str), extra={
+            'index': self.index_cname,
+            'operation': self.operation,
+            'caller': self.caller,
+            'fingerprint': get_query_fingerprint(self.query),
+            'duration': round(self.duration, 3),
+            'took': self.took,
+            'hits': self.hits,
+            'shard_failures': self.shard_failures,
+        })
+
+
+@contextmanager
+def profile_es_request(operation, index_cname, query):
+    """Time an Elasticsearch request and report it when the block exits
+
+    Yields an ``ESRequestProfile``; pass it the response(s) with
+    ``add_results`` to record hits and shard failures.
+    """
+    profile = ESRequestProfile(operation, index_cname, query)
+    start = time.time()
+    try:
+        yield profile
+    except Exception:
+        profile.error = True
+        raise
+    finally:
+        profile.duration = time.time() - start - profile._paused_duration
+        profile.report()
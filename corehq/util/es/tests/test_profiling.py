@@ -0,0 +1,66 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from corehq.util.es.profiling import (
+    get_es_caller,
+    get_query_fingerprint,
+    profile_es_request,
+    set_es_caller,
+)
+
+
+class TestQueryFingerprint(SimpleTestCase):
+
+    def _query(self, domain, case_ids):
+        return {
+            "query": {"bool": {"filter": [
+                {"term": {"domain.exact": domain}},
+                {"terms": {"_id": case_ids}},
+            ]}},
+            "size": len(case_ids),
+        }
+
+    def test_values_are_ignored(self):
+        self.assertEqual(
+            get_query_fingerprint(self._query('domain1', ['a'])),
+            get_query_fingerprint(self._query('domain2', ['b', 'c', 'd'])),
+        )
+
+    def test_structure_is_not_ignored(self):
+        query = self._query('domain1', ['a'])
+        other_query = self._query('domain1', ['a'])
+        other_query["query"]["bool"]["filter"].append({"term": {"type": "person"}})
+        self.assertNotEqual(get_query_fingerprint(query), get_query_fingerprint(other_query))
+
+
+class TestProfileESRequest(SimpleTestCase):
+
+    def tearDown(self):
+        set_es_caller(None)
+        super().tearDown()
+
+    def test_caller(self):
+        self.assertEqual(get_es_caller(), '-')
+        set_es_caller('pillow:case-pillow')
+        self.assertEqual(get_es_caller(), 'pillow:case-pillow')
+
+    @override_settings(ES_SLOW_QUERY_THRESHOLD=0)
+    def test_slow_query_log(self):
+        results = {
+            "took": 7,
+            "_shards": {"total": 5, "successful": 4, "failed": 1},
+            "hits": {"total": 3, "hits": []},
+            "profile": {"shards": []},
+        }
+        with patch('corehq.util.es.profiling.slow_query_logger') as logger:
+            with profile_es_request('search', 'cases', {"query": {"match_all": {}}}) as profile:
+                profile.add_results(results)
+
+        extra = logger.info.call_args[1]['extra']
+        self.assertEqual(extra['index'], 'cases')
+        self.assertEqual(extra['operation'], 'search')
+        self.assertEqual(extra['took'], 7)
+        self.assertEqual(extra['hits'], 3)
+        self.assertEqual(extra['shard_failures'], 1)
+        self.assertIn('"profile": [{"shards": []}]', logger.info.call_args[0][0])
@@ -1,6 +1,10 @@
 from django.test import SimpleTestCase
 from django.core.cache import cache
-from corehq.util.cache_utils import ExponentialBackoff
+from corehq.util.cache_utils import (
+    ExponentialBackoff,
+    bump_cache_generation,
+    get_cache_generation,
+)
 
 
 class TestExponentialBackoff(SimpleTestCase):
@@ -30,3 +34,22 @@ class TestExponentialBackoff(SimpleTestCase):
         key = None
         ExponentialBackoff.increment(key)  # first incr is 1
         self.assertFalse(ExponentialBackoff.should_backoff(key))
+
+
+class TestCacheGeneration(SimpleTestCase):
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_generation_is_stable_until_bumped(self):
+        generation = get_cache_generation('thing')
+        self.assertEqual(generation, get_cache_generation('thing'))
+        self.assertNotEqual(generation, get_cache_generation('other-thing'))
+
+        bump_cache_generation('thing')
+        self.assertNotEqual(generation, get_cache_generation('thing'))
+
+    def test_lost_generation_changes(self):
+        generation = get_cache_generation('thing')
+        cache.clear()
+        self.assertNotEqual(generation, get_cache_generation('thing'))
@@ -123,6 +123,7 @@ del _formdesigner_path
 
 LOG_HOME = FILEPATH
 COUCH_LOG_FILE = "%s/%s" % (FILEPATH, "commcarehq.couch.log")
+ES_SLOW_QUERY_LOG_FILE = "%s/%s" % (FILEPATH, "commcarehq.es_slow_queries.log")
 DJANGO_LOG_FILE = "%s/%s" % (FILEPATH, "commcarehq.django.log")
 ACCOUNTING_LOG_FILE = "%s/%s" % (FILEPATH, "commcarehq.accounting.log")
 ANALYTICS_LOG_FILE = "%s/%s" % (FILEPATH, "commcarehq.analytics.log")
@@ -845,6 +846,8 @@ ELASTICSEARCH_PORT = 9200
 ELASTICSEARCH_MAJOR_VERSION = 2
 # If elasticsearch queries take more than this, they result in timeout errors
 ES_SEARCH_TIMEOUT = 30
+# elasticsearch requests that take longer than this many seconds are written to the slow query log
+ES_SLOW_QUERY_THRESHOLD = 5
 
 BITLY_OAUTH_TOKEN = None
 
@@ -1240,6 +1243,9 @@ LOGGING = {
         'couch-request-formatter': {
             'format': '%(asctime)s [%(username)s:%(domain)s] %(hq_url)s %(task_name)s %(database)s %(method)s %(status_code)s %(content_length)s %(path)s %(duration)s'
         },
+        'es-slow-query-formatter': {
+            'format': '%(asctime)s [%(username)s:%(domain)s] %(hq_url)s %(task_name)s %(caller)s %(index)s %(operation)s %(fingerprint)s %(duration)s %(took)s %(hits)s %(shard_failures)s %(message)s'
+        },
         'formplayer_timing': {
             'format': '%(asctime)s, %(action)s, %(control_duration)s, %(candidate_duration)s'
         },
@@ -1298,6 +1304,15 @@ LOGGING = {
             'maxBytes': 10 * 1024 * 1024,  # 10 MB
             'backupCount': 20  # Backup 200 MB of logs
         },
+        'es-slow-query-handler': {
+            'level': 'INFO',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'formatter': 'es-slow-query-formatter',
+            'filters': ['hqrequest', 'celerytask'],
+            'filename': ES_SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,  # 10 MB
+            'backupCount': 20  # Backup 200 MB of logs
+        },
         'accountinglog': {
             'level': 'INFO',
             'class': 'logging.handlers.RotatingFileHandler',
@@ -1368,6 +1383,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'es_slow_queries': {
+            'handlers': ['es-slow-query-handler'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django': {
             'handlers': ['file'],
             'level': 'ERROR',